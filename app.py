@@ -1,9 +1,11 @@
 import queue
+import time
 import tkinter as tk
 from tkinter import ttk
 
 # Import core components
-from core import DataManager, AnalysisWorker, BotWorker, get_logger, get_config
+from core import DataManager, AnalysisWorker, BotWorker, MessageChannel, get_logger, get_config, get_metrics
+from core.metrics import summarize
 
 # Import tab classes
 from gui.tabs import SetupTab, ColorsTab, ControlTab, PreviewTab
@@ -12,8 +14,12 @@ from gui.tabs import SetupTab, ColorsTab, ControlTab, PreviewTab
 config = get_config()
 
 # Constants
-MAX_MESSAGES_PER_CYCLE = 10
+MESSAGE_QUEUE_SIZE = 1000  # waiting messages before log lines are dropped
+QUEUE_PROCESS_BUDGET = 0.02  # seconds of message handling per cycle
 QUEUE_PROCESS_INTERVAL = 100  # milliseconds
+METRICS_REFRESH_INTERVAL = 1000  # milliseconds
+# Timers shown in the status bar while metrics are recorded
+STATUS_BAR_TIMERS = ('capture.grab', 'analysis.total', 'bot.click', 'bot.sleep_overshoot', 'bot.verify', 'gui.queue_latency')
 
 class PlaceBotGUI:
     """Main GUI application for Place Bot"""
@@ -38,7 +44,6 @@ class PlaceBotGUI:
         self.analysis_worker = AnalysisWorker(self.data_manager)
         self.bot_worker = BotWorker(self.data_manager)
         self.logger = get_logger()
-        self.logger.set_gui_callback(self._gui_log_callback)
         
         # Font scaling (load from settings, default to Extra Large 125%)
         self.font_scale = self.data_manager.user_settings['preferences'].get('font_scale', 1.25)
@@ -56,11 +61,13 @@ class PlaceBotGUI:
         self.preview_tab = None
         
         # Thread communication
-        self.message_queue = queue.Queue()
+        self.message_queue = MessageChannel(MESSAGE_QUEUE_SIZE)
+        self.logger.set_gui_queue(self.message_queue)
         
         # Setup UI and start processing
         self.setup_ui()
         self.load_saved_regions()
+        self._restore_analysis()
         self._setup_cleanup()
         self._setup_keyboard_shortcuts()
         self.process_queue()
@@ -181,7 +188,10 @@ class PlaceBotGUI:
         
         # Save settings before closing
         self.save_user_settings()
+        self.data_manager.flush_user_settings()
         config.save()
+        if get_metrics().enabled:
+            self._dump_metrics()
         
         # Close the application
         self.root.destroy()
@@ -226,6 +236,11 @@ class PlaceBotGUI:
         self.status_label = ttk.Label(self.status_frame, text="Ready", style='Info.TLabel')
         self.status_label.pack(side='left')
         
+        # Metrics summary, refreshed while metrics are recorded
+        self.metrics_label = ttk.Label(self.status_frame, text="", style='Info.TLabel')
+        self.metrics_label.pack(side='right')
+        self.root.after(METRICS_REFRESH_INTERVAL, self._refresh_metrics)
+        
         # Separator
         ttk.Separator(parent, orient='horizontal').pack(fill='x', pady=(2, 0))
     
@@ -260,6 +275,10 @@ class PlaceBotGUI:
         tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Tools", menu=tools_menu)
         tools_menu.add_command(label="Open Log File", command=self._open_log_file)
+        tools_menu.add_separator()
+        self.metrics_var = tk.BooleanVar(value=get_metrics().enabled)
+        tools_menu.add_checkbutton(label="Record Metrics", variable=self.metrics_var, command=self._toggle_metrics)
+        tools_menu.add_command(label="Save Metrics Snapshot", command=self._dump_metrics)
         
         # Help menu
         help_menu = tk.Menu(menubar, tearoff=0)
@@ -271,10 +290,9 @@ class PlaceBotGUI:
         """Open log file in default editor"""
         import os
         import subprocess
-        from datetime import datetime
         
-        log_file = f"placebot_{datetime.now().strftime('%Y%m%d')}.log"
-        if os.path.exists(log_file):
+        log_file = self.logger.log_file
+        if log_file and os.path.exists(log_file):
             try:
                 if os.name == 'nt':  # Windows
                     os.startfile(log_file)
@@ -285,12 +303,35 @@ class PlaceBotGUI:
         else:
             self.update_status("Log file not found", 'warning')
     
+    def _toggle_metrics(self):
+        """Start or stop recording metrics"""
+        metrics = get_metrics()
+        metrics.enabled = self.metrics_var.get()
+        if not metrics.enabled:
+            self.metrics_label.config(text="")
+    
+    def _dump_metrics(self):
+        """Write the metrics snapshot to the configured JSON file"""
+        try:
+            path = get_metrics().dump()
+            self.update_status(f"Metrics saved to {path}", 'success')
+        except OSError as e:
+            self.logger.error(f"Could not save metrics: {e}")
+    
+    def _refresh_metrics(self):
+        """Show the mean stage times in the status bar"""
+        metrics = get_metrics()
+        if metrics.enabled:
+            self.metrics_label.config(text=summarize(metrics.snapshot(), STATUS_BAR_TIMERS))
+        self.root.after(METRICS_REFRESH_INTERVAL, self._refresh_metrics)
+    
     def _show_shortcuts(self):
         """Show keyboard shortcuts dialog"""
         from tkinter import messagebox
         shortcuts = (
             "Keyboard Shortcuts:\n\n"
-            "Ctrl+S - Save Settings\n\n"
+            "Ctrl+S - Save Settings\n"
+            "P - Pause/resume the running bot (works while the browser has focus)\n\n"
             "Mouse Movement Cancellation:\n\n"
             "Move mouse to cancel bot while running"
         )
@@ -378,6 +419,9 @@ class PlaceBotGUI:
         if self.control_tab:
             self.data_manager.update_preference('pixel_limit', self.control_tab.pixel_limit_var.get())
             self.data_manager.update_preference('reanalyze_before_start', self.control_tab.reanalyze_var.get())
+            self.data_manager.update_preference('incremental_reanalysis', self.control_tab.incremental_var.get())
+            self.data_manager.update_preference('verify_placements', self.control_tab.verify_var.get())
+            self.data_manager.update_preference('unattended', self.control_tab.unattended_var.get())
         
         # Save font scale
         self.data_manager.update_preference('font_scale', self.font_scale)
@@ -405,25 +449,30 @@ class PlaceBotGUI:
                 )
     
     def save_user_settings(self):
-        """Save user settings including UI state"""
-        self._save_preferences()
-        self._save_color_settings()
+        """Save user settings including UI state, as a single write"""
+        with self.data_manager.settings_batch():
+            self._save_preferences()
+            self._save_color_settings()
 
     def load_saved_regions(self):
         """Load and display saved regions"""
         if self.setup_tab:
             self.setup_tab._load_saved_regions()
 
+    def _restore_analysis(self):
+        """Reuse the last session's analysis when the captured regions still match it (checked in the background)"""
+        self.analysis_worker.start_warm_start(self.message_queue)
+
     def get_enabled_colors(self):
         """Get list of enabled colors from colors tab"""
         if self.colors_tab:
             return self.colors_tab.get_enabled_colors()
         return []
     
-    def _gui_log_callback(self, message):
-        """Callback for logger to display messages in GUI"""
+    def _handle_log(self, message):
+        """Handle a log line forwarded by the logger"""
         if self.control_tab:
-            self.control_tab.log_message(message)
+            self.control_tab.log_message(message['message'])
 
 
     def _handle_analysis_complete(self, message):
@@ -449,6 +498,18 @@ class PlaceBotGUI:
         if self.control_tab:
             self.control_tab.update_progress(message['progress'], message['status'])
     
+    def _handle_bot_paused(self, message):
+        """Handle bot paused message"""
+        if self.control_tab:
+            self.control_tab.on_bot_paused(message.get('reason'))
+        self.update_status("Bot paused", 'warning')
+    
+    def _handle_bot_resumed(self, message):
+        """Handle bot resumed message"""
+        if self.control_tab:
+            self.control_tab.on_bot_resumed()
+        self.update_status("Bot resumed", 'info')
+    
     def _handle_bot_complete(self, message):
         """Handle bot complete message"""
         total_painted = message.get('total_painted', 0)
@@ -457,8 +518,17 @@ class PlaceBotGUI:
         
         if self.control_tab:
             self.control_tab.on_bot_complete(total_painted, limit_reached)
+            if message.get('total_clicks'):
+                self.control_tab.log_message(f"Click rate: {message.get('clicks_per_second', 0):.1f} clicks/s")
+            if message.get('verified'):
+                self.control_tab.log_message(
+                    f"Verified {total_painted} placements from {message.get('total_clicks', 0)} clicks"
+                    f" ({message.get('failed_pixels', 0)} failed after retries)"
+                )
+            self.control_tab.on_burst_complete(message)
         
         self.logger.bot_complete(total_painted, limit_reached)
+        self.logger.debug("GUI message channel: %s", self.message_queue.stats())
         
         if cancelled_by_mouse:
             status_msg = f"Bot cancelled by mouse movement: {total_painted} pixels painted"
@@ -480,13 +550,18 @@ class PlaceBotGUI:
             'analysis_complete': self._handle_analysis_complete,
             'analysis_error': self._handle_analysis_error,
             'progress': self._handle_progress,
+            'bot_paused': self._handle_bot_paused,
+            'bot_resumed': self._handle_bot_resumed,
             'bot_complete': self._handle_bot_complete,
-            'bot_error': self._handle_bot_error
+            'bot_error': self._handle_bot_error,
+            'log': self._handle_log
         }
         
         try:
-            # Process max messages per call to prevent GUI blocking
-            for _ in range(MAX_MESSAGES_PER_CYCLE):
+            # Handle messages for at most QUEUE_PROCESS_BUDGET per call to prevent GUI blocking;
+            # progress is coalesced in the channel, so the backlog stays short at any click rate
+            deadline = time.perf_counter() + QUEUE_PROCESS_BUDGET
+            while time.perf_counter() < deadline:
                 message = self.message_queue.get_nowait()
                 handler = message_handlers.get(message['type'])
                 if handler:
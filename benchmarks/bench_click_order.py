@@ -0,0 +1,122 @@
+"""
+Compares click orderings with the click cost model.
+
+Renders a synthetic Blue Marble canvas, analyzes it the same way the bot does
+(so 'map' is the real contour discovery order) and estimates the time of a
+painting run for each ordering.
+
+Usage: python benchmarks/bench_click_order.py [--pixel-limit N] [--delay MS] [--seed S]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.click_path import CLICK_ORDERS, ClickCostModel, schedule_clicks  # noqa: E402
+from core.image_analysis import analyze_canvas  # noqa: E402
+from core.paint_plan import PaintPlan  # noqa: E402
+
+
+def load_palette():
+    """Non-ignored palette entries from colors.json"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(root, 'colors.json')) as f:
+        return [c for c in json.load(f)['color_palette'] if not c.get('ignore')]
+
+
+def render_canvas(palette, cols=100, rows=60, pitch=15, colors=8, seed=0):
+    """
+    BGR canvas image: white cells with preview dots (center third of each cell) showing
+    a template of blobby color regions, about half of which still need painting.
+    """
+    rng = np.random.default_rng(seed)
+    chosen = rng.choice(len(palette), colors, replace=False)
+    palette_bgr = np.array([palette[i]['rgb'][::-1] for i in chosen], dtype=np.uint8)
+
+    # Blobby template: nearest of a few random seeds
+    seeds = rng.random((colors * 3, 2)) * (cols, rows)
+    grid_x, grid_y = np.meshgrid(np.arange(cols), np.arange(rows))
+    dist = (grid_x[..., None] - seeds[:, 0]) ** 2 + (grid_y[..., None] - seeds[:, 1]) ** 2
+    template = palette_bgr[np.argmin(dist, axis=2) % colors]
+    needs_paint = rng.random((rows, cols)) < 0.5
+
+    img = np.full((rows * pitch, cols * pitch, 3), 255, dtype=np.uint8)
+    third = pitch // 3
+    for r in range(rows):
+        for c in range(cols):
+            y, x = r * pitch, c * pitch
+            if not needs_paint[r, c]:
+                img[y:y + pitch, x:x + pitch] = template[r, c]
+            img[y + third:y + pitch - third, x + third:x + pitch - third] = template[r, c]
+    return img, [palette[i] for i in chosen]
+
+
+def run(pixel_limit, delay, seed):
+    palette = load_palette()
+    img, colors = render_canvas(palette, seed=seed)
+    canvas_region = (300, 150, img.shape[1], img.shape[0])
+    # Palette strip below the canvas, one swatch per color
+    color_position_map = {
+        tuple(color['rgb']): (canvas_region[0] + 40 * i + 20, canvas_region[1] + img.shape[0] + 60)
+        for i, color in enumerate(colors)
+    }
+
+    analysis = analyze_canvas(img, debug_filename=None, use_lattice=False)
+    plan = PaintPlan.build(analysis['pixel_map'], colors)
+    cost_model = ClickCostModel.for_delay(delay)
+    start = (canvas_region[0] + img.shape[1] // 2, canvas_region[1] + img.shape[0] // 2)
+
+    results = {
+        'pixel_limit': pixel_limit,
+        'delay_ms': delay,
+        'pending_pixels': plan.total_pending(),
+        'orders': {}
+    }
+    for strategy in CLICK_ORDERS:
+        t0 = time.perf_counter()
+        schedule = schedule_clicks(plan, colors, color_position_map, canvas_region, pixel_limit,
+                                   strategy=strategy, row_height=analysis['pixel_size'],
+                                   start=start, cost_model=cost_model)
+        plan_seconds = time.perf_counter() - t0
+
+        # Trim to the pixel limit the way the bot does, then use absolute coordinates
+        runs = []
+        remaining = pixel_limit
+        for color, positions in schedule:
+            taken = positions[:remaining]
+            remaining -= len(taken)
+            runs.append((tuple(color['rgb']),
+                         [(x + canvas_region[0], y + canvas_region[1]) for x, y in taken]))
+            if remaining <= 0:
+                break
+
+        estimate = cost_model.estimate(runs, color_position_map, start)
+        estimate['planning_seconds'] = plan_seconds
+        results['orders'][strategy] = estimate
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pixel-limit', type=int, default=500)
+    parser.add_argument('--delay', type=int, default=50, help="click delay in ms")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = run(args.pixel_limit, args.delay, args.seed)
+    print(f"{results['pending_pixels']} pending pixels, limit {args.pixel_limit}, delay {args.delay} ms")
+    print(f"{'order':<12}{'travel px':>12}{'switches':>10}{'est. s':>10}{'ms/pixel':>10}{'plan ms':>10}")
+    for strategy, estimate in results['orders'].items():
+        print(f"{strategy:<12}{estimate['travel_px']:>12.0f}{estimate['switches']:>10}"
+              f"{estimate['seconds']:>10.2f}{estimate['seconds_per_pixel'] * 1000:>10.2f}"
+              f"{estimate['planning_seconds'] * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
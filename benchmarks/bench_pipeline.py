@@ -0,0 +1,175 @@
+"""
+End-to-end headless benchmark of the analyze -> plan -> paint -> verify loop.
+
+A SimulatedCanvas stands in for the browser: the analysis and bot workers run unchanged
+against its frames and clicks. Each round re-analyzes (incrementally after the first)
+and paints up to the pixel limit, until the template is finished or the round limit is hit.
+
+Usage: python benchmarks/bench_pipeline.py [--cols N] [--rows N] [--pitch P] [--pixel-limit N]
+                                           [--latency MS] [--failure-rate F] [--no-verify]
+"""
+
+import argparse
+import glob
+import json
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.analysis_worker import AnalysisWorker  # noqa: E402
+from core.bot_worker import BotWorker  # noqa: E402
+from core.config import get_config  # noqa: E402
+from core.data_manager import DataManager  # noqa: E402
+from core.input_backend import set_input_backend  # noqa: E402
+from core.logger import get_logger  # noqa: E402
+from core.screen_capture import set_capture_backend  # noqa: E402
+from core.simulator import SimulatedCanvas  # noqa: E402
+
+
+def drain(message_queue):
+    """All queued messages, oldest first"""
+    messages = []
+    while not message_queue.empty():
+        messages.append(message_queue.get())
+    return messages
+
+
+def run(cols=60, rows=40, pitch=15, pixel_limit=200, delay=0, latency_ms=0, failure_rate=0.0,
+        verify=True, max_rounds=20, seed=0):
+    """Run the simulated pipeline and return timings and counters as a dictionary"""
+    # The repository config and the log file are opened before leaving ROOT (an open log
+    # file inside the scratch directory would block its removal on Windows)
+    previous_dir = os.getcwd()
+    os.chdir(ROOT)
+    get_config()
+    get_logger()
+    # Caches, the analysis snapshot and settings are written to the working directory:
+    # run in a scratch copy so the user's files are never replaced with simulator data
+    with tempfile.TemporaryDirectory(prefix='bench_pipeline_') as work_dir:
+        shutil.copy(os.path.join(ROOT, 'colors.json'), work_dir)
+        # Color lookup tables depend only on the palette; copied so round 1 does not rebuild them
+        for lut in glob.glob(os.path.join(ROOT, 'color_lut_*.npy')):
+            shutil.copy(lut, work_dir)
+        os.chdir(work_dir)
+        try:
+            return _run(cols, rows, pitch, pixel_limit, delay, latency_ms, failure_rate, verify, max_rounds, seed)
+        finally:
+            os.chdir(previous_dir)
+
+
+def _run(cols, rows, pitch, pixel_limit, delay, latency_ms, failure_rate, verify, max_rounds, seed):
+    config = get_config()
+    config.set('analysis.save_debug_images', False)
+    config.set('bot.verify_settle_ms', latency_ms)
+
+    simulator = SimulatedCanvas(cols=cols, rows=rows, pitch=pitch, latency_s=latency_ms / 1000.0,
+                                failure_rate=failure_rate, seed=seed)
+    set_capture_backend(simulator.capture_backend())
+    input_backend = simulator.input_backend()
+    set_input_backend(input_backend)
+
+    data_manager = DataManager()
+    # Assigned directly, so no user_settings.json is written even in the scratch directory
+    data_manager.canvas_region = simulator.canvas_region
+    data_manager.palette_region = simulator.palette_region
+    enabled_colors = data_manager.color_palette
+
+    analysis_worker = AnalysisWorker(data_manager)
+    bot_worker = BotWorker(data_manager)
+    message_queue = queue.Queue()
+    settings = {'pixel_limit': pixel_limit, 'tolerance': 5, 'delay': delay, 'verify': verify}
+
+    results = {
+        'canvas': {'cols': cols, 'rows': rows, 'pitch': pitch},
+        'settings': dict(settings, latency_ms=latency_ms, failure_rate=failure_rate),
+        'initial_remaining': simulator.remaining_pixels(),
+        'rounds': []
+    }
+
+    for round_index in range(max_rounds):
+        if simulator.remaining_pixels() == 0:
+            break
+
+        t0 = time.perf_counter()
+        analysis_worker._analyze_worker(message_queue, incremental=round_index > 0)
+        analysis_seconds = time.perf_counter() - t0
+        analysis = drain(message_queue)[-1]
+        if analysis['type'] != 'analysis_error' and round_index == 0:
+            results['pixel_size'] = analysis['pixel_size']
+            results['colors_found'] = analysis['colors_found']
+        if analysis['type'] == 'analysis_error':
+            results['error'] = analysis['error']
+            break
+
+        # run_bot instead of start_bot, so the round is timed synchronously
+        t0 = time.perf_counter()
+        bot_worker.run_bot(message_queue, enabled_colors, settings)
+        paint_seconds = time.perf_counter() - t0
+        complete = drain(message_queue)[-1]
+        if complete['type'] == 'bot_error':
+            results['error'] = complete['error']
+            break
+
+        results['rounds'].append({
+            'incremental': analysis.get('incremental', False),
+            'analysis_seconds': analysis_seconds,
+            'paint_seconds': paint_seconds,
+            'painted': complete['total_painted'],
+            'clicks': complete['total_clicks'],
+            'clicks_per_second': complete['clicks_per_second'],
+            'remaining': simulator.remaining_pixels()
+        })
+        if complete['total_painted'] == 0:
+            break
+
+    total_seconds = sum(r['analysis_seconds'] + r['paint_seconds'] for r in results['rounds'])
+    painted = sum(r['painted'] for r in results['rounds'])
+    results['final_remaining'] = simulator.remaining_pixels()
+    results['simulator'] = dict(simulator.stats)
+    results['total_seconds'] = total_seconds
+    results['pixels_per_second'] = painted / total_seconds if total_seconds else 0.0
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cols', type=int, default=60)
+    parser.add_argument('--rows', type=int, default=40)
+    parser.add_argument('--pitch', type=float, default=15)
+    parser.add_argument('--pixel-limit', type=int, default=200)
+    parser.add_argument('--delay', type=int, default=0, help="click delay in ms")
+    parser.add_argument('--latency', type=int, default=0, help="simulated click latency in ms")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="share of clicks that are dropped")
+    parser.add_argument('--no-verify', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.cols, args.rows, args.pitch, args.pixel_limit, args.delay, args.latency,
+                  args.failure_rate, not args.no_verify, seed=args.seed)
+
+    print(f"{results['initial_remaining']} pixels to paint, pixel size {results.get('pixel_size')}, "
+          f"{results.get('colors_found')} palette colors found")
+    for i, r in enumerate(results['rounds']):
+        kind = 'incremental' if r['incremental'] else 'full'
+        print(f"round {i + 1}: {kind:<11} analysis {r['analysis_seconds'] * 1000:7.1f} ms, "
+              f"paint {r['paint_seconds']:6.2f} s, {r['painted']} painted / {r['clicks']} clicks, "
+              f"{r['remaining']} remaining")
+    print(f"total {results['total_seconds']:.2f} s, {results['pixels_per_second']:.1f} pixels/s, "
+          f"{results['final_remaining']} remaining")
+    if 'error' in results:
+        print(f"error: {results['error']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+Benchmark suite for every stage of the analysis and paint pipeline.
+
+Synthetic inputs come from SimulatedCanvas with a fixed seed, so runs are reproducible
+across versions. Each stage is timed `--repeat` times per canvas size and pixel pitch;
+the best and median times are written as JSON (benchmarks/results/ by default).
+Pass --compare with an earlier results file to print the change per stage.
+
+Usage: python benchmarks/run_benchmarks.py [--sizes 500 1000 2000] [--pitches 18 24 36]
+                                           [--repeat 5] [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import types
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.color_detection import detect_palette_colors  # noqa: E402
+from core.image_analysis import (  # noqa: E402
+    analyze_canvas, build_pixel_map, estimate_grid_lattice, estimate_pixel_size,
+    get_preview_positions_from_estimation
+)
+from core.input_backend import ClickDispatcher, RecordingBackend  # noqa: E402
+from core.paint_engine import PaintEngine  # noqa: E402
+from core.paint_plan import PaintPlan  # noqa: E402
+from core.pixel_mapping import find_pixels_to_paint_from_map  # noqa: E402
+from core.simulator import SimulatedCanvas, load_palette  # noqa: E402
+
+CLICK_BENCHMARK_CLICKS = 5000
+
+
+def time_stage(func, repeat):
+    """Run func `repeat` times; returns ({'best', 'median'} in seconds, last result)"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t0)
+    return {'best': min(times), 'median': statistics.median(times)}, result
+
+
+def bench_canvas(size, pitch, palette, repeat):
+    """Time the analysis stages on a size x size canvas with the given pixel pitch"""
+    cells = max(1, int(size / pitch))
+    simulator = SimulatedCanvas(cols=cells, rows=cells, pitch=pitch, palette=palette, seed=0)
+    frame = simulator.frame()
+    left, top, width, height = simulator.canvas_region
+    canvas_bgr = np.ascontiguousarray(frame[top:top + height, left:left + width, ::-1])
+    p_left, p_top, p_width, p_height = simulator.palette_region
+    palette_rgb = np.ascontiguousarray(frame[p_top:p_top + p_height, p_left:p_left + p_width])
+
+    stages = {}
+    stages['estimate_pixel_size'], pixel_size = time_stage(
+        lambda: estimate_pixel_size(canvas_bgr, debug_filename=None), repeat)
+    stages['get_preview_positions_from_estimation'], positions = time_stage(
+        lambda: get_preview_positions_from_estimation(canvas_bgr, pixel_size), repeat)
+    stages['build_pixel_map'], pixel_map = time_stage(
+        lambda: build_pixel_map(canvas_bgr, pixel_size, positions), repeat)
+    stages['estimate_grid_lattice'], _ = time_stage(
+        lambda: estimate_grid_lattice(canvas_bgr), repeat)
+    stages['analyze_canvas'], analysis = time_stage(
+        lambda: analyze_canvas(canvas_bgr, debug_filename=None), repeat)
+    stages['detect_palette_colors'], color_map = time_stage(
+        lambda: detect_palette_colors(palette_rgb, simulator.palette_region, palette), repeat)
+
+    target_bgr = tuple(simulator.template[0, 0][::-1].tolist())
+    stages['find_pixels_to_paint_from_map'], _ = time_stage(
+        lambda: find_pixels_to_paint_from_map(pixel_map, target_bgr), repeat)
+    stages['paint_plan_build'], plan = time_stage(
+        lambda: PaintPlan.build(pixel_map, palette), repeat)
+
+    return {
+        'size': size,
+        'pitch': pitch,
+        'cells': cells * cells,
+        'pixel_size': pixel_size,
+        'previews': len(positions),
+        'pending_pixels': plan.total_pending(),
+        'palette_colors_found': len(color_map),
+        'analysis_method': analysis['method'],
+        'analysis_pixel_size': analysis['pixel_size'],
+        'stages': stages
+    }
+
+
+def bench_click_overhead(repeat):
+    """Per-click cost of the PaintEngine's dispatch path (movement check, schedule, backend call) with a fake backend"""
+    backend = RecordingBackend()
+    # Only the canvas offset is read while dispatching
+    engine = PaintEngine(types.SimpleNamespace(canvas_region=(0, 0, 1000, 1000)), on_event=None, input_backend=backend)
+    positions = [(i % 1000, i // 1000) for i in range(CLICK_BENCHMARK_CLICKS)]
+
+    async def click_all():
+        engine.dispatcher = ClickDispatcher(backend, 0.0)
+        engine.last_bot_mouse_pos = backend.position()
+        return await engine._click_cells(positions)
+
+    def dispatch():
+        backend.clicks.clear()
+        return asyncio.run(click_all())
+
+    timing, sent = time_stage(dispatch, repeat)
+    return {
+        'clicks': sent,
+        'per_click_us': {key: value / sent * 1e6 for key, value in timing.items()}
+    }
+
+
+def environment():
+    """Versions and revision the results were produced with"""
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                  capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {
+        'revision': revision or None,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds')
+    }
+
+
+def compare(results, previous):
+    """Print the median time change of every stage against an earlier results file"""
+    earlier = {(c['size'], c['pitch']): c for c in previous.get('canvases', [])}
+    print(f"\nCompared with {previous['environment'].get('revision')}:")
+    for canvas in results['canvases']:
+        before = earlier.get((canvas['size'], canvas['pitch']))
+        if before is None:
+            continue
+        for stage, timing in canvas['stages'].items():
+            if stage not in before['stages']:
+                continue
+            old = before['stages'][stage]['median']
+            change = (timing['median'] - old) / old * 100 if old else 0.0
+            print(f"  {canvas['size']:>5} px / {canvas['pitch']:>5}  {stage:<40}{change:+7.1f}%")
+
+    old_click = previous.get('click_overhead', {}).get('per_click_us', {}).get('median')
+    if old_click:
+        new_click = results['click_overhead']['per_click_us']['median']
+        print(f"  per-click overhead{'':<37}{(new_click - old_click) / old_click * 100:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 1000, 2000], help="canvas sizes in px")
+    parser.add_argument('--pitches', type=float, nargs='+', default=[18, 24, 36], help="pixel pitches in px")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', help="earlier results file to compare with")
+    args = parser.parse_args()
+
+    palette = load_palette(os.path.join(ROOT, 'colors.json'))
+    results = {'environment': environment(), 'repeat': args.repeat, 'canvases': []}
+
+    for size in args.sizes:
+        for pitch in args.pitches:
+            canvas = bench_canvas(size, pitch, palette, args.repeat)
+            results['canvases'].append(canvas)
+            print(f"{size:>5} px, pitch {pitch:>5}: {canvas['previews']} previews, pixel size "
+                  f"{canvas['pixel_size']} (contours) / {canvas['analysis_pixel_size']} ({canvas['analysis_method']})")
+            for stage, timing in canvas['stages'].items():
+                print(f"    {stage:<40}{timing['median'] * 1000:10.2f} ms")
+
+    results['click_overhead'] = bench_click_overhead(args.repeat)
+    print(f"per-click overhead: {results['click_overhead']['per_click_us']['median']:.1f} us")
+
+    output = args.output
+    if output is None:
+        results_dir = os.path.join(ROOT, 'benchmarks', 'results')
+        os.makedirs(results_dir, exist_ok=True)
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(results_dir, f"{stamp}-{results['environment']['revision'] or 'unknown'}.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,23 @@
 from .data_manager import DataManager
 from .analysis_worker import AnalysisWorker
 from .bot_worker import BotWorker
-from .screen_capture import get_screen
-from .image_analysis import estimate_pixel_size, find_pixels_to_paint, build_pixel_map, get_preview_positions_from_estimation
+from .paint_engine import PaintEngine
+from .message_channel import MessageChannel
+from .charge_scheduler import ChargeBucket, ChargeScheduler
+from .screen_capture import get_screen, get_screen_bgr, get_capture_backend, set_capture_backend, create_capture_backend
+from .input_backend import get_input_backend, set_input_backend, create_input_backend, ClickDispatcher
+from .image_analysis import estimate_pixel_size, find_pixels_to_paint, build_pixel_map, get_preview_positions_from_estimation, estimate_grid_lattice, get_preview_positions_from_lattice, analyze_canvas, validate_lattice
 from .color_detection import detect_palette_colors, save_palette_debug_image
+from .analysis_cache import PaletteCache, GeometryCache
+from .template import TemplateImage, quantize_to_palette, template_pixel_map
+from .color_matching import ColorMatcher, get_color_matcher
 from .automation import auto_click_positions
-from .pixel_mapping import find_pixels_to_paint_from_map
+from .pixel_mapping import find_pixels_to_paint_from_map, find_pixels_to_paint_from_arrays, pixel_map_arrays
+from .pixel_map import PixelMap
+from .paint_plan import PaintPlan
+from .incremental_analysis import incremental_update
 from .logger import get_logger
+from .metrics import get_metrics, Metrics
 from .config import get_config
 
-__all__ = ['DataManager', 'AnalysisWorker', 'BotWorker', 'get_screen', 'estimate_pixel_size', 'find_pixels_to_paint', 'detect_palette_colors', 'save_palette_debug_image', 'auto_click_positions', 'build_pixel_map']
\ No newline at end of file
+__all__ = ['DataManager', 'AnalysisWorker', 'BotWorker', 'get_screen', 'get_screen_bgr', 'estimate_pixel_size', 'find_pixels_to_paint', 'detect_palette_colors', 'save_palette_debug_image', 'auto_click_positions', 'build_pixel_map', 'analyze_canvas']
\ No newline at end of file
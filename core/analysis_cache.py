@@ -0,0 +1,157 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+from .logger import get_logger
+
+# dHash grid size: hash_size x hash_size bits
+HASH_SIZE = 16
+# Captures whose hashes differ by more bits than this are treated as a different palette
+PALETTE_HASH_MAX_DISTANCE = 10
+# Canvas geometries remembered per canvas region (e.g. one per zoom level in use)
+GEOMETRY_ENTRIES_PER_REGION = 4
+
+
+def difference_hash(img_rgb, hash_size=HASH_SIZE):
+    """
+    Perceptual difference hash of an RGB image as a hex string: the grayscale image is
+    shrunk to (hash_size + 1) x hash_size and each bit says whether a pixel is brighter
+    than its right neighbour. Small rendering noise leaves the hash (nearly) unchanged.
+    """
+    gray = cv2.cvtColor(np.ascontiguousarray(img_rgb), cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return np.packbits(bits).tobytes().hex()
+
+
+def hash_distance(hash_a, hash_b):
+    """Number of differing bits between two hex hashes (all bits if the lengths differ)"""
+    a = np.frombuffer(bytes.fromhex(hash_a), dtype=np.uint8)
+    b = np.frombuffer(bytes.fromhex(hash_b), dtype=np.uint8)
+    if a.shape != b.shape:
+        return max(a.size, b.size) * 8
+    return int(np.unpackbits(a ^ b).sum())
+
+
+def _region_key(region):
+    return ",".join(str(int(v)) for v in region)
+
+
+class _JsonCache:
+    """Entries keyed by screen region, persisted as JSON next to user_settings.json"""
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.logger = get_logger()
+        self.entries = self._load()
+
+    def _load(self):
+        """Load cached entries from file"""
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f).get('entries', {})
+        except Exception as e:
+            self.logger.warning(f"Failed to load {self.cache_file}: {e}")
+            return {}
+
+    def save(self):
+        """Save cached entries to file"""
+        try:
+            with open(self.cache_file, 'w') as f:
+                json.dump({'entries': self.entries}, f, indent=2)
+        except Exception as e:
+            self.logger.warning(f"Failed to save {self.cache_file}: {e}")
+
+    def clear(self):
+        """Forget all cached entries"""
+        self.entries = {}
+        self.save()
+
+
+class PaletteCache(_JsonCache):
+    """
+    Palette swatch positions persisted between runs, keyed by the palette region.
+    An entry is reused while the capture's perceptual hash stays close, the known
+    colors are the same and no premium color was bought since it was stored.
+    """
+
+    def __init__(self, cache_file='palette_cache.json'):
+        super().__init__(cache_file)
+
+    @staticmethod
+    def _color_ids(known_colors):
+        return sorted(int(color['id']) for color in known_colors)
+
+    def lookup(self, palette_img_rgb, palette_region, known_colors, bought_ids):
+        """
+        Cached color_position_map for this palette capture, or None if it has to be detected again.
+        Returns (color_position_map or None, reason) where reason says why the cache was not used.
+        """
+        entry = self.entries.get(_region_key(palette_region))
+        if entry is None:
+            return None, "no cached palette for this region"
+        if entry.get('colors') != self._color_ids(known_colors):
+            return None, "known colors changed"
+        if set(bought_ids) - set(entry.get('bought', [])):
+            return None, "new premium color bought"
+
+        distance = hash_distance(entry['hash'], difference_hash(palette_img_rgb))
+        if distance > PALETTE_HASH_MAX_DISTANCE:
+            return None, f"palette capture changed ({distance} bits)"
+
+        color_position_map = {tuple(item['rgb']): tuple(item['position']) for item in entry['swatches']}
+        return color_position_map, None
+
+    def store(self, palette_img_rgb, palette_region, known_colors, bought_ids, color_position_map):
+        """Remember the detected swatch positions for this palette capture"""
+        self.entries[_region_key(palette_region)] = {
+            'hash': difference_hash(palette_img_rgb),
+            'colors': self._color_ids(known_colors),
+            'bought': sorted(int(color_id) for color_id in bought_ids),
+            'swatches': [
+                {'rgb': [int(c) for c in rgb], 'position': [int(position[0]), int(position[1])]}
+                for rgb, position in color_position_map.items()
+            ]
+        }
+        self.save()
+
+
+class GeometryCache(_JsonCache):
+    """
+    Canvas grid geometry (pitch and origin phase) persisted between runs, keyed by the
+    canvas region, with a perceptual hash of the capture it was measured on. The hash
+    only ranks the candidates: painting changes it too much to decide reuse, so the
+    caller validates each candidate lattice against the new capture.
+    """
+
+    def __init__(self, cache_file='geometry_cache.json'):
+        super().__init__(cache_file)
+
+    def candidates(self, canvas_img_bgr, canvas_region):
+        """Cached lattices for this region, closest capture fingerprint first"""
+        stored = self.entries.get(_region_key(canvas_region), [])
+        if not stored:
+            return []
+        fingerprint = difference_hash(canvas_img_bgr[..., ::-1])
+        ranked = sorted(stored, key=lambda entry: hash_distance(entry['hash'], fingerprint))
+        return [
+            {'pitch': entry['pitch'], 'origin': tuple(entry['origin']), 'confidence': entry['confidence']}
+            for entry in ranked
+        ]
+
+    def store(self, canvas_img_bgr, canvas_region, lattice):
+        """Remember a lattice measured on this capture, replacing one with the same pitch"""
+        key = _region_key(canvas_region)
+        entry = {
+            'hash': difference_hash(canvas_img_bgr[..., ::-1]),
+            'pitch': float(lattice['pitch']),
+            'origin': [float(lattice['origin'][0]), float(lattice['origin'][1])],
+            'confidence': float(lattice['confidence']),
+        }
+        stored = [e for e in self.entries.get(key, []) if abs(e['pitch'] - entry['pitch']) >= 0.05]
+        self.entries[key] = ([entry] + stored)[:GEOMETRY_ENTRIES_PER_REGION]
+        self.save()
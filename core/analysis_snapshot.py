@@ -0,0 +1,144 @@
+import os
+
+import numpy as np
+
+from .analysis_cache import difference_hash, hash_distance
+from .image_analysis import validate_lattice
+from .pixel_map import PixelMap
+
+SNAPSHOT_VERSION = 1
+# Captures whose hashes differ from the snapshot's by more bits than this are treated as moved.
+# The hash cannot tell small pans from painting, so the grid lattice is validated as well.
+SNAPSHOT_HASH_MAX_DISTANCE = 10
+# Share of the saved preview dots that must still show their color at the saved positions.
+# Painting leaves the dots in place, while a pan of whole cells moves them onto other colors.
+SNAPSHOT_MIN_PREVIEW_MATCH = 0.95
+SNAPSHOT_PREVIEW_TOLERANCE = 2
+
+
+def _region_array(region):
+    return np.asarray(region if region else [], dtype=np.int32)
+
+
+def _template_source(data_manager):
+    """What the pixel map was built from in template mode: file, modification time, offset and dithering"""
+    if not data_manager.template_mode():
+        return ''
+    path = data_manager.template.path
+    mtime = os.path.getmtime(path) if os.path.exists(path) else 0
+    offset = tuple(data_manager.get_preference('template_offset', [0, 0]))
+    return f"{path}|{mtime}|{offset}|{data_manager.get_preference('template_dither', False)}"
+
+
+def preview_match(pixel_map, img_bgr, tolerance=SNAPSHOT_PREVIEW_TOLERANCE):
+    """Share of pixel map entries whose preview color in `img_bgr` matches the stored one (1.0 for an empty map)"""
+    if len(pixel_map) == 0:
+        return 1.0
+    xs = pixel_map.positions[:, 0].astype(np.int64)
+    ys = pixel_map.positions[:, 1].astype(np.int64)
+    inside = (xs < img_bgr.shape[1]) & (ys < img_bgr.shape[0])
+    diff = np.abs(img_bgr[ys[inside], xs[inside]].astype(np.int16) - pixel_map.preview_colors[inside])
+    return float(np.all(diff <= tolerance, axis=1).sum()) / len(pixel_map)
+
+
+def save_snapshot(path, data_manager, palette_hash):
+    """
+    Write the current analysis to an uncompressed .npz file: pixel map arrays, palette
+    positions, grid lattice and the canvas frame, with the regions, template source and
+    hashes of the canvas and palette captures. Written atomically through a temporary file.
+    """
+    pixel_map = data_manager.pixel_map
+    lattice = data_manager.grid_lattice
+    color_position_map = data_manager.color_position_map
+    arrays = {
+        'version': np.int32(SNAPSHOT_VERSION),
+        'canvas_region': _region_array(data_manager.analysis_canvas_region),
+        'palette_region': _region_array(data_manager.palette_region),
+        'template': np.str_(_template_source(data_manager)),
+        'bought_ids': np.asarray(sorted(int(i) for i in data_manager.get_bought_color_ids()), dtype=np.int32),
+        'canvas_hash': np.str_(difference_hash(data_manager.canvas_frame[..., ::-1])),
+        'palette_hash': np.str_(palette_hash),
+        'pixel_size': np.int32(data_manager.pixel_size),
+        'positions': pixel_map.positions,
+        'preview_colors': pixel_map.preview_colors,
+        'pixel_colors': pixel_map.pixel_colors,
+        'palette_rgb': np.asarray(list(color_position_map.keys()), dtype=np.int32).reshape(-1, 3),
+        'palette_positions': np.asarray(list(color_position_map.values()), dtype=np.int32).reshape(-1, 2),
+        'lattice': np.asarray(
+            [lattice['pitch'], lattice['origin'][0], lattice['origin'][1], lattice['confidence']] if lattice else [],
+            dtype=np.float64
+        ),
+        'canvas_frame': data_manager.canvas_frame,
+    }
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, path)
+
+
+def load_snapshot(path):
+    """Read a snapshot written by save_snapshot(). Returns (snapshot or None, reason it could not be used)"""
+    if not os.path.exists(path):
+        return None, "no snapshot"
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != SNAPSHOT_VERSION:
+                return None, f"snapshot version {int(data['version'])} is not {SNAPSHOT_VERSION}"
+            snapshot = {key: data[key] for key in data.files}
+    except Exception as e:
+        return None, f"unreadable snapshot: {e}"
+
+    lattice = snapshot['lattice']
+    pixel_size = int(snapshot['pixel_size'])
+    return {
+        'canvas_region': tuple(int(v) for v in snapshot['canvas_region']),
+        'palette_region': tuple(int(v) for v in snapshot['palette_region']),
+        'template': str(snapshot['template']),
+        'bought_ids': [int(i) for i in snapshot['bought_ids']],
+        'canvas_hash': str(snapshot['canvas_hash']),
+        'palette_hash': str(snapshot['palette_hash']),
+        'pixel_size': pixel_size,
+        'pixel_map': PixelMap(snapshot['positions'], snapshot['preview_colors'], snapshot['pixel_colors'], pixel_size),
+        'color_position_map': {
+            tuple(int(c) for c in rgb): (int(position[0]), int(position[1]))
+            for rgb, position in zip(snapshot['palette_rgb'], snapshot['palette_positions'])
+        },
+        'grid_lattice': (
+            {'pitch': float(lattice[0]), 'origin': (float(lattice[1]), float(lattice[2])), 'confidence': float(lattice[3])}
+            if len(lattice) else None
+        ),
+        'canvas_frame': snapshot['canvas_frame'],
+    }, None
+
+
+def check_snapshot(snapshot, data_manager, canvas_img_bgr, palette_img_rgb):
+    """
+    Reason the snapshot does not match the current setup and screen, or None if it can be used:
+    same regions, template and bought colors, captures close to the snapshot's hashes, a
+    saved grid lattice that still fits the canvas capture (catches pans of a few pixels) and
+    preview dots still at the saved positions (catches pans of whole cells).
+    """
+    if snapshot['canvas_region'] != tuple(data_manager.canvas_region or ()):
+        return "canvas region changed"
+    if snapshot['palette_region'] != tuple(data_manager.palette_region or ()):
+        return "palette region changed"
+    if snapshot['template'] != _template_source(data_manager):
+        return "template changed"
+    if set(data_manager.get_bought_color_ids()) - set(snapshot['bought_ids']):
+        return "new premium color bought"
+    if canvas_img_bgr.shape != snapshot['canvas_frame'].shape:
+        return "canvas capture size changed"
+    distance = hash_distance(snapshot['canvas_hash'], difference_hash(canvas_img_bgr[..., ::-1]))
+    if distance > SNAPSHOT_HASH_MAX_DISTANCE:
+        return f"canvas moved ({distance} bits)"
+    distance = hash_distance(snapshot['palette_hash'], difference_hash(palette_img_rgb))
+    if distance > SNAPSHOT_HASH_MAX_DISTANCE:
+        return f"palette moved ({distance} bits)"
+    if snapshot['grid_lattice'] is None:
+        return "no grid lattice saved"
+    if not validate_lattice(canvas_img_bgr, snapshot['grid_lattice']):
+        return "grid lattice no longer fits the canvas"
+    match = preview_match(snapshot['pixel_map'], canvas_img_bgr)
+    if match < SNAPSHOT_MIN_PREVIEW_MATCH:
+        return f"preview dots moved ({match:.0%} still in place)"
+    return None
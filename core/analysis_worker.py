@@ -1,6 +1,7 @@
 import threading
-import cv2
+import time
 from .logger import get_logger
+from .metrics import get_metrics
 
 class AnalysisWorker:
     """Handles analysis logic in separate thread"""
@@ -9,50 +10,288 @@ class AnalysisWorker:
         self.data_manager = data_manager
         self.thread = None
         self.logger = get_logger()
+        # Hash of the palette capture behind the current analysis, stored in the snapshot
+        self.palette_hash = None
     
-    def start_analysis(self, message_queue):
-        """Start analysis in a separate thread"""
+    def start_analysis(self, message_queue, incremental=False):
+        """Start analysis in a separate thread.
+        With incremental=True, only changes since the last analysis are applied when possible."""
         self.thread = threading.Thread(
             target=self._analyze_worker, 
-            args=(message_queue,)
+            args=(message_queue, incremental)
         )
         self.thread.daemon = True
         self.thread.start()
     
-    def _analyze_worker(self, message_queue):
+    def _analyze_worker(self, message_queue, incremental=False):
         """Worker function for analysis (runs in separate thread)"""
+        metrics = get_metrics()
         try:
-            from core import get_screen, estimate_pixel_size, detect_palette_colors, save_palette_debug_image, build_pixel_map, get_preview_positions_from_estimation
+            from core import get_config
+            save_debug_images = get_config().get('analysis.save_debug_images', True)
             
-            # Take screenshots using data_manager regions
-            palette_img_rgb = get_screen(self.data_manager.palette_region)
-            canvas_img_rgb = get_screen(self.data_manager.canvas_region)
-            canvas_img_bgr = cv2.cvtColor(canvas_img_rgb, cv2.COLOR_RGB2BGR)
+            # Template mode needs only the grid and pixel samples, so it is always cheap
+            if self.data_manager.template_mode():
+                self._template_analysis(message_queue, save_debug_images)
+                return
             
-            # Analyze
-            pixel_size = estimate_pixel_size(canvas_img_bgr)
-            self.logger.debug(f"Estimated pixel size: {pixel_size}x{pixel_size}")
+            if incremental and self.data_manager.can_analyze_incrementally():
+                with metrics.timer('analysis.incremental'):
+                    done = self._incremental_analysis(message_queue)
+                if done:
+                    return
             
-            preview_positions = get_preview_positions_from_estimation(canvas_img_bgr, pixel_size)
-            pixel_map = build_pixel_map(canvas_img_bgr, pixel_size, preview_positions)
-            self.logger.debug(f"Built pixel map with {len(pixel_map)} pixels")
+            with metrics.timer('analysis.total'):
+                self._full_analysis(message_queue, save_debug_images)
             
-            color_position_map = detect_palette_colors(
-                palette_img_rgb, self.data_manager.palette_region, self.data_manager.color_palette
+        except Exception as e:
+            message_queue.put({'type': 'analysis_error', 'error': str(e)})
+    
+    def _full_analysis(self, message_queue, save_debug_images):
+        """Capture both regions and analyze them from scratch"""
+        from core import get_screen, get_screen_bgr, analyze_canvas, validate_lattice, get_config
+        metrics = get_metrics()
+        
+        # Take screenshots using data_manager regions
+        with metrics.timer('analysis.capture'):
+            palette_img_rgb = get_screen(self.data_manager.palette_region)
+            canvas_img_bgr = get_screen_bgr(self.data_manager.canvas_region)
+        
+        # Analyze: size, previews and pixel map from a single pass
+        use_geometry_cache = get_config().get('analysis.geometry_cache', True)
+        geometry_cache = self.data_manager.geometry_cache
+        canvas_analysis = analyze_canvas(
+            canvas_img_bgr, debug_filename="debug_size_estimation.png" if save_debug_images else None,
+            cached_lattices=(
+                geometry_cache.candidates(canvas_img_bgr, self.data_manager.canvas_region)
+                if use_geometry_cache else ()
             )
-            self.logger.debug(f"Detected {len(color_position_map)} colors in palette")
-            
-            save_palette_debug_image(palette_img_rgb, color_position_map, self.data_manager.palette_region)
-            
-            # Store results in data_manager
-            self.data_manager.set_analysis_results(pixel_size, pixel_map, color_position_map)
-            
-            message_queue.put({
-                'type': 'analysis_complete',
-                'pixel_size': pixel_size,
-                'pixel_count': len(pixel_map),
-                'colors_found': len(color_position_map)
-            })
-            
+        )
+        # Only a lattice that validates on its own capture can be reused later
+        if (use_geometry_cache and canvas_analysis['method'] == 'lattice'
+                and validate_lattice(canvas_img_bgr, canvas_analysis['lattice'])):
+            geometry_cache.store(canvas_img_bgr, self.data_manager.canvas_region, canvas_analysis['lattice'])
+        pixel_size = canvas_analysis['pixel_size']
+        pixel_map = canvas_analysis['pixel_map']
+        self.logger.debug(f"Estimated pixel size: {pixel_size}x{pixel_size} ({canvas_analysis['method']} detection)")
+        self.logger.debug(f"Built pixel map with {len(pixel_map)} pixels")
+        
+        color_position_map = self._palette_positions(palette_img_rgb, save_debug_images)
+        
+        # Store results in data_manager (a private copy of the frame, capture buffers may be reused)
+        self.data_manager.set_analysis_results(
+            pixel_size, pixel_map, color_position_map,
+            canvas_frame=canvas_img_bgr.copy(), grid_lattice=canvas_analysis['lattice']
+        )
+        metrics.count(f"analysis.method.{canvas_analysis['method']}")
+        self._save_snapshot(palette_img_rgb)
+        
+        message_queue.put({
+            'type': 'analysis_complete',
+            'pixel_size': pixel_size,
+            'pixel_count': len(pixel_map),
+            'colors_found': len(color_position_map),
+            'incremental': False
+        })
+    
+    def _template_analysis(self, message_queue, save_debug_images):
+        """Build the pixel map from the template file instead of the preview overlay"""
+        from core import get_screen, get_screen_bgr, template_pixel_map
+        
+        metrics = get_metrics()
+        with metrics.timer('analysis.capture'):
+            palette_img_rgb = get_screen(self.data_manager.palette_region)
+            canvas_img_bgr = get_screen_bgr(self.data_manager.canvas_region)
+        
+        with metrics.timer('analysis.estimate'):
+            lattice = self._template_lattice(canvas_img_bgr)
+        if lattice is None:
+            message_queue.put({'type': 'analysis_error', 'error': "Template mode needs a visible canvas grid, none was detected"})
+            return
+        pixel_size = int(round(lattice['pitch']))
+        
+        template = self.data_manager.template
+        template_rgb = template.quantized(
+            self.data_manager.get_enabled_colors(), self.data_manager.get_preference('template_dither', False)
+        )
+        offset = tuple(self.data_manager.get_preference('template_offset', [0, 0]))
+        with metrics.timer('analysis.map'):
+            pixel_map = template_pixel_map(canvas_img_bgr, lattice, template_rgb, template.mask, offset)
+        self.logger.debug(f"Template {template.name} ({template.size[0]}x{template.size[1]}) at cell {offset}: "
+                          f"{len(pixel_map)} cells on screen, pixel size {pixel_size}")
+        
+        color_position_map = self._palette_positions(palette_img_rgb, save_debug_images)
+        
+        self.data_manager.set_analysis_results(
+            pixel_size, pixel_map, color_position_map,
+            canvas_frame=canvas_img_bgr.copy(), grid_lattice=lattice
+        )
+        self._save_snapshot(palette_img_rgb)
+        
+        message_queue.put({
+            'type': 'analysis_complete',
+            'pixel_size': pixel_size,
+            'pixel_count': len(pixel_map),
+            'colors_found': len(color_position_map),
+            'incremental': False
+        })
+    
+    def _template_lattice(self, canvas_img_bgr):
+        """Grid lattice for template mode: the previous or a cached one if still valid, else a new estimate"""
+        from core import estimate_grid_lattice, validate_lattice, get_config
+        from core.image_analysis import LATTICE_MIN_CONFIDENCE
+        
+        use_geometry_cache = get_config().get('analysis.geometry_cache', True)
+        geometry_cache = self.data_manager.geometry_cache
+        candidates = []
+        if self.data_manager.grid_lattice is not None and self.data_manager.can_analyze_incrementally():
+            candidates.append(self.data_manager.grid_lattice)
+        if use_geometry_cache:
+            candidates.extend(geometry_cache.candidates(canvas_img_bgr, self.data_manager.canvas_region))
+        
+        for lattice in candidates:
+            if validate_lattice(canvas_img_bgr, lattice):
+                return lattice
+        
+        lattice = estimate_grid_lattice(canvas_img_bgr)
+        if lattice is None or lattice['confidence'] < LATTICE_MIN_CONFIDENCE:
+            return None
+        if use_geometry_cache and validate_lattice(canvas_img_bgr, lattice):
+            geometry_cache.store(canvas_img_bgr, self.data_manager.canvas_region, lattice)
+        return lattice
+    
+    def _palette_positions(self, palette_img_rgb, save_debug_images):
+        """Palette swatch positions, from the palette cache when the capture still matches"""
+        with get_metrics().timer('analysis.palette'):
+            return self._find_palette_positions(palette_img_rgb, save_debug_images)
+    
+    def _find_palette_positions(self, palette_img_rgb, save_debug_images):
+        from core import detect_palette_colors, save_palette_debug_image, get_config
+        palette_region = self.data_manager.palette_region
+        known_colors = self.data_manager.color_palette
+        bought_ids = self.data_manager.get_bought_color_ids()
+        use_cache = get_config().get('analysis.palette_cache', True)
+        
+        if use_cache:
+            cache = self.data_manager.palette_cache
+            color_position_map, reason = cache.lookup(palette_img_rgb, palette_region, known_colors, bought_ids)
+            if color_position_map is not None:
+                get_metrics().count('analysis.palette_cache_hits')
+                self.logger.debug(f"Reused {len(color_position_map)} cached palette colors")
+                return color_position_map
+            self.logger.debug(f"Detecting palette colors: {reason}")
+        
+        color_position_map = detect_palette_colors(palette_img_rgb, palette_region, known_colors)
+        self.logger.debug(f"Detected {len(color_position_map)} colors in palette")
+        if use_cache:
+            cache.store(palette_img_rgb, palette_region, known_colors, bought_ids, color_position_map)
+        
+        if save_debug_images:
+            save_palette_debug_image(palette_img_rgb, color_position_map, palette_region)
+        return color_position_map
+    
+    def _incremental_analysis(self, message_queue):
+        """Apply only the canvas changes since the last analysis. Returns False if a full analysis is needed."""
+        from core import get_screen_bgr, incremental_update
+        
+        canvas_img_bgr = get_screen_bgr(self.data_manager.canvas_region)
+        update = incremental_update(
+            self.data_manager.canvas_frame, canvas_img_bgr, self.data_manager.pixel_map,
+            self.data_manager.pixel_size, self.data_manager.grid_lattice
+        )
+        
+        if update['full_analysis_reason']:
+            self.logger.info(f"Running full analysis: {update['full_analysis_reason']}")
+            return False
+        
+        pixel_map = update['pixel_map']
+        self.logger.debug(f"Incremental analysis: {update['changed_tiles']} changed tiles, "
+                          f"{update['updated']} pixel map entries updated")
+        
+        # Palette positions are reused from the previous analysis
+        self.data_manager.set_analysis_results(
+            self.data_manager.pixel_size, pixel_map, self.data_manager.color_position_map,
+            canvas_frame=canvas_img_bgr.copy(), grid_lattice=self.data_manager.grid_lattice
+        )
+        self._save_snapshot()
+        
+        message_queue.put({
+            'type': 'analysis_complete',
+            'pixel_size': self.data_manager.pixel_size,
+            'pixel_count': len(pixel_map),
+            'colors_found': len(self.data_manager.color_position_map),
+            'incremental': True
+        })
+        return True
+    
+    def _save_snapshot(self, palette_img_rgb=None):
+        """Persist the current analysis for the next start (the palette hash is kept when not recaptured)"""
+        from core import get_config
+        from core.analysis_cache import difference_hash
+        from core.analysis_snapshot import save_snapshot
+        
+        if palette_img_rgb is not None:
+            self.palette_hash = difference_hash(palette_img_rgb)
+        config = get_config()
+        if not config.get('analysis.snapshot', True) or self.palette_hash is None:
+            return
+        try:
+            with get_metrics().timer('analysis.snapshot_save'):
+                save_snapshot(config.get('analysis.snapshot_file', 'analysis_snapshot.npz'), self.data_manager, self.palette_hash)
         except Exception as e:
-            message_queue.put({'type': 'analysis_error', 'error': str(e)})
\ No newline at end of file
+            self.logger.warning(f"Failed to save analysis snapshot: {e}")
+    
+    def start_warm_start(self, message_queue):
+        """Try warm_start() in a separate thread, putting its 'analysis_complete' message on success"""
+        self.thread = threading.Thread(target=self._warm_start_worker, args=(message_queue,))
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def _warm_start_worker(self, message_queue):
+        start = time.perf_counter()
+        try:
+            message = self.warm_start()
+        except Exception as e:
+            self.logger.warning(f"Could not restore the last analysis: {e}")
+            return
+        if message:
+            self.logger.info(f"Restored the last analysis in {(time.perf_counter() - start) * 1000:.0f} ms")
+            message_queue.put(message)
+    
+    def warm_start(self):
+        """
+        Restore the last session's analysis if the screen still matches it, checked with one
+        capture of each region. Returns an 'analysis_complete' message (with 'restored': True),
+        or None when a new analysis is needed.
+        """
+        from core import get_screen, get_screen_bgr, get_config
+        from core.analysis_snapshot import load_snapshot, check_snapshot
+        
+        config = get_config()
+        if not config.get('analysis.snapshot', True) or not self.data_manager.has_regions():
+            return None
+        snapshot, reason = load_snapshot(config.get('analysis.snapshot_file', 'analysis_snapshot.npz'))
+        if snapshot is not None:
+            palette_img_rgb = get_screen(self.data_manager.palette_region)
+            canvas_img_bgr = get_screen_bgr(self.data_manager.canvas_region)
+            reason = check_snapshot(snapshot, self.data_manager, canvas_img_bgr, palette_img_rgb)
+        if not reason and self.data_manager.has_analysis_data():
+            reason = "a new analysis finished first"
+        if reason:
+            self.logger.debug(f"Analysis snapshot not restored: {reason}")
+            return None
+        
+        # The snapshot frame stays the baseline, so the next incremental analysis picks up any changes
+        self.data_manager.set_analysis_results(
+            snapshot['pixel_size'], snapshot['pixel_map'], snapshot['color_position_map'],
+            canvas_frame=snapshot['canvas_frame'], grid_lattice=snapshot['grid_lattice']
+        )
+        self.palette_hash = snapshot['palette_hash']
+        return {
+            'type': 'analysis_complete',
+            'pixel_size': snapshot['pixel_size'],
+            'pixel_count': len(snapshot['pixel_map']),
+            'colors_found': len(snapshot['color_position_map']),
+            'incremental': False,
+            'restored': True
+        }
@@ -0,0 +1,95 @@
+import math
+import time
+
+from .config import get_config
+
+
+class ChargeBucket:
+    """
+    Model of the account's pixel charges: up to `capacity` charges, one regenerated every
+    `regen_seconds`. The level is an estimate that burst results keep correcting.
+    """
+
+    def __init__(self, capacity, regen_seconds, charges=None, clock=time.monotonic):
+        self.capacity = max(1, int(capacity))
+        self.regen_seconds = max(0.001, float(regen_seconds))
+        self.clock = clock
+        self._level = float(self.capacity if charges is None else charges)
+        self._updated = clock()
+
+    def level(self):
+        """Estimated charges now, including the fraction of the one regenerating"""
+        regenerated = (self.clock() - self._updated) / self.regen_seconds
+        return min(float(self.capacity), self._level + regenerated)
+
+    def available(self):
+        """Whole charges available now"""
+        return int(math.floor(self.level() + 1e-9))
+
+    def set_charges(self, charges):
+        """Correct the estimate with an observed level"""
+        self._level = max(0.0, min(float(self.capacity), float(charges)))
+        self._updated = self.clock()
+
+    def spend(self, charges):
+        """Account for `charges` placed pixels"""
+        self.set_charges(self.level() - charges)
+
+    def seconds_until(self, charges):
+        """Time until `charges` (capped at the capacity) are available"""
+        missing = min(charges, self.capacity) - self.level()
+        return max(0.0, missing * self.regen_seconds)
+
+
+class ChargeScheduler:
+    """
+    Plans unattended painting in bursts: each burst spends the charges available at its start,
+    and the next one is timed for when `min_burst` charges have regenerated (0 = a full bucket,
+    which is the last moment before regeneration would be wasted).
+    Burst results correct the model: with verification only confirmed placements count as
+    spent, and a burst cut short by a fully rejected batch means the bucket is empty.
+    """
+
+    def __init__(self, bucket, min_burst=0):
+        self.bucket = bucket
+        self.min_burst = bucket.capacity if min_burst <= 0 else min(int(min_burst), bucket.capacity)
+        self.started = bucket.clock()
+        self.bursts = 0
+        self.placed = 0
+
+    @classmethod
+    def from_config(cls):
+        """Scheduler for the 'charges' config section, starting from a full bucket"""
+        config = get_config()
+        bucket = ChargeBucket(config.get('charges.capacity', 30), config.get('charges.regen_seconds', 30))
+        return cls(bucket, config.get('charges.min_burst', 0))
+
+    def burst_size(self):
+        """Pixels the next burst can place"""
+        return self.bucket.available()
+
+    def record_burst(self, result):
+        """Update the model from a 'bot_complete' message"""
+        if result.get('verified'):
+            spent = result['total_painted']
+        else:
+            spent = result.get('total_clicks', result['total_painted'])
+        self.bucket.spend(spent)
+        if result.get('out_of_charges'):
+            self.bucket.set_charges(0)
+        self.bursts += 1
+        self.placed += result['total_painted']
+
+    def seconds_until_next_burst(self, result=None):
+        """
+        Wait before the next burst. After a burst that found nothing to paint, the next
+        check waits for a full bucket (at least one regeneration interval).
+        """
+        if result is not None and result['total_painted'] == 0 and not result.get('out_of_charges'):
+            return max(self.bucket.seconds_until(self.bucket.capacity), self.bucket.regen_seconds)
+        return self.bucket.seconds_until(self.min_burst)
+
+    def pixels_per_hour(self):
+        """Confirmed placements per hour since the scheduler started"""
+        elapsed = self.bucket.clock() - self.started
+        return self.placed * 3600.0 / elapsed if elapsed > 0 else 0.0
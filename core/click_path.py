@@ -0,0 +1,225 @@
+import numpy as np
+
+# 2-opt is O(n^2) per pass; longer tours keep their nearest-neighbor order
+TWO_OPT_MAX_POINTS = 400
+TWO_OPT_MAX_PASSES = 4
+CLICK_ORDERS = ('optimized', 'serpentine', 'map')
+
+
+class ClickCostModel:
+    """
+    Rough time model of a painting run, in seconds:
+    every click costs `click_s`, every pixel of cursor travel `travel_s_per_px`,
+    and every palette selection `palette_switch_s` on top of its own click.
+    """
+
+    def __init__(self, click_s=0.05, travel_s_per_px=0.0002, palette_switch_s=0.2):
+        self.click_s = click_s
+        self.travel_s_per_px = travel_s_per_px
+        self.palette_switch_s = palette_switch_s
+
+    @classmethod
+    def for_delay(cls, delay_ms):
+        """Cost model matching the bot's click delay (ms) and its fixed palette wait"""
+        return cls(click_s=delay_ms / 1000.0)
+
+    def run_cost(self, travel_px, clicks, switches=1):
+        """Estimated time of `clicks` canvas clicks plus `switches` palette selections"""
+        return (
+            (clicks + switches) * self.click_s
+            + switches * self.palette_switch_s
+            + travel_px * self.travel_s_per_px
+        )
+
+    def estimate(self, runs, palette_positions, start=None):
+        """
+        Estimate a schedule given as [(rgb, positions), ...] (positions in canvas-absolute
+        coordinates). Returns {'seconds', 'travel_px', 'clicks', 'switches', 'seconds_per_pixel'}.
+        """
+        travel = 0.0
+        clicks = 0
+        current = start
+        for rgb, positions in runs:
+            if not positions:
+                continue
+            path = [palette_positions[rgb]] + list(positions)
+            if current is not None:
+                path = [current] + path
+            travel += path_length(np.asarray(path, dtype=np.float64))
+            clicks += len(positions)
+            current = positions[-1]
+
+        switches = sum(1 for _, positions in runs if positions)
+        seconds = self.run_cost(travel, clicks, switches)
+        return {
+            'seconds': seconds,
+            'travel_px': travel,
+            'clicks': clicks,
+            'switches': switches,
+            'seconds_per_pixel': seconds / clicks if clicks else 0.0
+        }
+
+
+def path_length(points):
+    """Total length of a polyline given as an (N, 2) array"""
+    if len(points) < 2:
+        return 0.0
+    return float(np.hypot(*np.diff(points, axis=0).T).sum())
+
+
+def serpentine_order(positions, row_height):
+    """
+    Boustrophedon order: rows of height `row_height` top to bottom,
+    alternating left-to-right and right-to-left. Returns indices into positions.
+    """
+    points = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    rows = (points[:, 1] - points[:, 1].min()) // max(1, int(row_height))
+    # Odd rows run right to left
+    x_key = np.where(rows % 2 == 0, points[:, 0], -points[:, 0])
+    return np.lexsort((x_key, rows))
+
+
+def nearest_neighbor_order(positions, start, limit=None):
+    """
+    Greedy nearest-neighbor tour from `start`, visiting at most `limit` positions.
+    Because each step takes the closest remaining cell, a limited tour also picks a compact subset.
+    Returns indices into positions.
+    """
+    points = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    count = len(points) if limit is None else min(limit, len(points))
+    order = np.empty(count, dtype=np.int64)
+    if count == 0:
+        return order
+
+    remaining = np.ones(len(points), dtype=bool)
+    dist_sq = np.empty(len(points), dtype=np.float64)
+    current = np.asarray(start, dtype=np.float64)
+    for step in range(count):
+        np.sum((points - current) ** 2, axis=1, out=dist_sq)
+        dist_sq[~remaining] = np.inf
+        nearest = int(np.argmin(dist_sq))
+        order[step] = nearest
+        remaining[nearest] = False
+        current = points[nearest]
+    return order
+
+
+def two_opt(points, start, order, max_passes=TWO_OPT_MAX_PASSES):
+    """
+    Improves an open tour (fixed start, free end) by reversing segments while that shortens it.
+    Returns the improved order.
+    """
+    order = np.array(order, dtype=np.int64)
+    if len(order) < 3:
+        return order
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(len(order) - 1):
+            path = np.vstack([np.asarray(start, dtype=np.float64), points[order]])
+            # Reversing order[i..j] replaces edges (i-1, i) and (j, j+1) with (i-1, j) and (i, j+1);
+            # path is shifted by one because of the start point
+            before = path[i]
+            first = path[i + 1]
+            ends = path[i + 2:]
+            after = np.vstack([path[i + 3:], np.full((1, 2), np.nan)])
+
+            removed = np.hypot(*(first - before)) + np.hypot(*(after - ends).T)
+            added = np.hypot(*(ends - before).T) + np.hypot(*(after - first).T)
+            # Reversing up to the last point has no following edge
+            removed[-1] = np.hypot(*(first - before))
+            added[-1] = np.hypot(*(ends[-1] - before))
+
+            gain = removed - added
+            best = int(np.argmax(gain))
+            if gain[best] > 1e-9:
+                j = i + 1 + best
+                order[i:j + 1] = order[i:j + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return order
+
+
+def order_positions(positions, start, strategy='optimized', row_height=1, limit=None):
+    """
+    Order canvas positions for clicking, starting from `start` (the palette entry just clicked).
+    strategy: 'optimized' (nearest neighbor + 2-opt), 'serpentine' or 'map' (keep pixel map order).
+    Returns at most `limit` positions.
+    """
+    positions = list(positions)
+    if strategy == 'map' or len(positions) < 2:
+        return positions[:limit]
+
+    if strategy == 'serpentine':
+        order = serpentine_order(positions, row_height)[:limit]
+    elif strategy == 'optimized':
+        order = nearest_neighbor_order(positions, start, limit)
+        if len(order) <= TWO_OPT_MAX_POINTS:
+            order = two_opt(positions, start, order)
+    else:
+        raise ValueError(f"Unknown click order: {strategy}")
+
+    return [positions[i] for i in order]
+
+
+def schedule_clicks(plan, enabled_colors, color_position_map, canvas_offset, pixel_limit,
+                    strategy='optimized', row_height=1, start=None, cost_model=None):
+    """
+    Build the click schedule for a run: a list of (color, positions) with canvas-relative positions.
+    Each color's pending cells are ordered from its palette entry. With 'optimized' or 'serpentine',
+    colors are then picked greedily by lowest estimated time per placed pixel (palette switch,
+    travel to the palette and tour length), so a pixel limit is filled with as few switches as possible.
+    'map' keeps the enabled color order and pixel map order.
+    """
+    cost_model = cost_model or ClickCostModel()
+    offset = np.asarray(canvas_offset[:2], dtype=np.float64)
+
+    runs = []
+    for color in enabled_colors:
+        rgb = tuple(color["rgb"])
+        positions = plan.positions_for(rgb)
+        if rgb not in color_position_map or not positions:
+            continue
+        palette_pos = np.asarray(color_position_map[rgb], dtype=np.float64)
+        ordered = order_positions(positions, palette_pos - offset, strategy, row_height, pixel_limit)
+        runs.append((color, ordered))
+
+    if strategy == 'map':
+        return runs
+
+    # Cumulative travel along each tour, measured from the palette entry
+    tour_travel = {}
+    for color, ordered in runs:
+        rgb = tuple(color["rgb"])
+        path = np.vstack([np.asarray(color_position_map[rgb], dtype=np.float64) - offset,
+                          np.asarray(ordered, dtype=np.float64)])
+        tour_travel[rgb] = np.concatenate([[0.0], np.cumsum(np.hypot(*np.diff(path, axis=0).T))])
+
+    scheduled = []
+    remaining = pixel_limit
+    current = None if start is None else np.asarray(start, dtype=np.float64) - offset
+    candidates = list(runs)
+    while candidates and remaining > 0:
+        def cost_per_pixel(run):
+            color, ordered = run
+            rgb = tuple(color["rgb"])
+            clicks = min(len(ordered), remaining)
+            travel = tour_travel[rgb][clicks]
+            if current is not None:
+                travel += np.hypot(*(np.asarray(color_position_map[rgb], dtype=np.float64) - offset - current))
+            return cost_model.run_cost(travel, clicks) / clicks
+
+        best = min(candidates, key=cost_per_pixel)
+        candidates.remove(best)
+        color, ordered = best
+        taken = min(len(ordered), remaining)
+        scheduled.append(best)
+        remaining -= taken
+        current = np.asarray(ordered[taken - 1], dtype=np.float64)
+
+    return scheduled
@@ -2,40 +2,124 @@ import cv2
 import numpy as np
 
 
+# Swatches smaller than this (in pixels) are ignored
+MIN_SWATCH_AREA = 100
+
+_lut_cache = {}
+
+
+def build_palette_lut(known_colors, tolerance=3):
+    """
+    Precomputed 3D lookup table indexed [b, g, r] -> 1-based index into known_colors,
+    0 where no color is within `tolerance` on every channel. Where tolerance boxes
+    overlap the nearest color wins. Only the boxes are written, so most of the
+    16 MB table stays untouched zero pages.
+    """
+    key = (tuple(tuple(color["rgb"]) for color in known_colors), tolerance)
+    lut = _lut_cache.get(key)
+    if lut is not None:
+        return lut
+
+    lut = np.zeros((256, 256, 256), dtype=np.uint8)
+    label_colors = {}
+    offsets = np.arange(-tolerance, tolerance + 1)
+    for label, color_data in enumerate(known_colors, start=1):
+        b, g, r = np.asarray(color_data["rgb"][::-1], dtype=np.int64)
+        bs = np.clip(b + offsets, 0, 255)
+        gs = np.clip(g + offsets, 0, 255)
+        rs = np.clip(r + offsets, 0, 255)
+        box = lut[bs[0]:bs[-1] + 1, gs[0]:gs[-1] + 1, rs[0]:rs[-1] + 1]
+
+        grid_b, grid_g, grid_r = np.meshgrid(np.unique(bs), np.unique(gs), np.unique(rs), indexing="ij")
+        distance = (grid_b - b) ** 2 + (grid_g - g) ** 2 + (grid_r - r) ** 2
+        if box.any():
+            # Overlapping boxes: keep whichever color is nearer
+            current = np.where(box > 0, _box_distance(label_colors, box, grid_b, grid_g, grid_r), np.inf)
+            take = distance < current
+        else:
+            take = np.ones(box.shape, dtype=bool)
+        box[take] = label
+        label_colors[label] = (b, g, r)
+
+    _lut_cache.clear()
+    _lut_cache[key] = lut
+    return lut
+
+
+def _box_distance(label_colors, box, grid_b, grid_g, grid_r):
+    """Squared distance from each box cell to the color its current label points at"""
+    colors = np.zeros(box.shape + (3,), dtype=np.int64)
+    for label in np.unique(box[box > 0]):
+        colors[box == label] = label_colors[int(label)]
+    return (grid_b - colors[..., 0]) ** 2 + (grid_g - colors[..., 1]) ** 2 + (grid_r - colors[..., 2]) ** 2
+
+
 def detect_palette_colors(palette_img_rgb, palette_region, known_colors, tolerance=3):
     """
-    Detects color swatches by searching for each known color individually.
+    Detects color swatches in a single pass: every pixel is labelled with its known color
+    through a 3D lookup table, then connected components run once over the label image.
+    Each component is measured by its outer contour, holes filled, as the per-color search did.
     Expects an RGB image.
-    Returns a dictionary mapping color tuple -> screen coordinates.
+    Returns a dictionary mapping color tuple -> screen coordinates (centroid of each color's largest swatch).
     """
-    color_map = {}
-    palette_img_bgr = cv2.cvtColor(palette_img_rgb, cv2.COLOR_RGB2BGR)
+    if not known_colors:
+        return {}
 
-    for color_data in known_colors:
-        target_rgb = tuple(color_data["rgb"])
-        target_bgr = target_rgb[::-1]
+    lut = build_palette_lut(known_colors, tolerance)
+    labels = lut[palette_img_rgb[..., 2], palette_img_rgb[..., 1], palette_img_rgb[..., 0]]
 
-        lower_bound = np.array([max(0, c - tolerance) for c in target_bgr])
-        upper_bound = np.array([min(255, c + tolerance) for c in target_bgr])
+    # Break the boundary between touching swatches of different colors so they stay separate
+    # components (4-connectivity, so diagonal contact does not join them either)
+    foreground = labels > 0
+    right_differs = (labels[:, :-1] != labels[:, 1:]) & foreground[:, :-1] & foreground[:, 1:]
+    below_differs = (labels[:-1, :] != labels[1:, :]) & foreground[:-1, :] & foreground[1:, :]
+    foreground[:, :-1] &= ~right_differs
+    foreground[:-1, :] &= ~below_differs
 
-        mask = cv2.inRange(palette_img_bgr, lower_bound, upper_bound)
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    count, components, stats, _ = cv2.connectedComponentsWithStats(
+        foreground.view(np.uint8), connectivity=4
+    )
 
-        if contours:
-            largest_contour = max(contours, key=cv2.contourArea)
-            if cv2.contourArea(largest_contour) > 100:
-                M = cv2.moments(largest_contour)
-                if M["m00"] != 0:
-                    cx = int(M["m10"] / M["m00"])
-                    cy = int(M["m01"] / M["m00"])
+    # Every component holds a single color label
+    component_labels = np.zeros(count, dtype=np.int64)
+    component_labels[components[foreground]] = labels[foreground]
 
-                    screen_x = palette_region[0] + cx
-                    screen_y = palette_region[1] + cy
-                    color_map[target_rgb] = (screen_x, screen_y)
+    # Largest swatch per color
+    largest = {}
+    for component in range(1, count):
+        x, y, width, height = stats[component, :4]
+        if width * height <= MIN_SWATCH_AREA:
+            continue  # cannot reach the minimum area even with its holes filled
+        area, centroid = _outer_contour(components[y:y + height, x:x + width] == component)
+        if area <= MIN_SWATCH_AREA:
+            continue
+        label = component_labels[component]
+        if label not in largest or area > largest[label][0]:
+            largest[label] = (area, (x + centroid[0], y + centroid[1]))
+
+    color_map = {}
+    for label, color_data in enumerate(known_colors, start=1):
+        if label in largest:
+            cx, cy = largest[label][1]
+            color_map[tuple(color_data["rgb"])] = (palette_region[0] + int(cx), palette_region[1] + int(cy))
 
     return color_map
 
 
+def _outer_contour(mask):
+    """
+    Area and centroid of the largest outer contour of a boolean mask, so holes such as the
+    icons drawn on swatches count as part of the swatch. Returns (0, None) for an empty contour.
+    """
+    padded = np.pad(mask, 1).view(np.uint8)
+    contours, _ = cv2.findContours(padded, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contour = max(contours, key=cv2.contourArea)
+    moments = cv2.moments(contour)
+    if moments["m00"] == 0:
+        return 0, None
+    return moments["m00"], (moments["m10"] / moments["m00"] - 1, moments["m01"] / moments["m00"] - 1)
+
+
 def save_palette_debug_image(palette_img_rgb, color_map, palette_region, filename="debug_palette.png"):
     """Save debug image showing detected palette colors."""
     debug_img = cv2.cvtColor(palette_img_rgb, cv2.COLOR_RGB2BGR)
@@ -0,0 +1,189 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from .config import get_config
+from .logger import get_logger
+
+# Bump when the table layout or distance formula changes, so stale cache files are rebuilt
+LUT_VERSION = 1
+# Quantized colors per distance block while building the table
+LUT_BUILD_CHUNK = 4096
+
+LUT_DTYPE = np.dtype([('index', np.uint8), ('delta_e', np.float32)])
+
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+
+def srgb_to_lab(rgb):
+    """Convert (..., 3) sRGB values in 0-255 to CIE L*a*b* (D65 white point)"""
+    srgb = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+    matrix = np.array([
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+    ])
+    xyz = linear @ matrix.T / np.array([0.95047, 1.0, 1.08883])
+
+    epsilon, kappa = 216 / 24389, 24389 / 27
+    f = np.where(xyz > epsilon, np.cbrt(xyz), (kappa * xyz + 16) / 116)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+def ciede2000(lab1, lab2):
+    """CIEDE2000 color difference between broadcastable (..., 3) Lab arrays"""
+    L1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    L2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    C_mean = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2
+    G = 0.5 * (1 - np.sqrt(C_mean ** 7 / (C_mean ** 7 + 25.0 ** 7)))
+    a1p, a2p = (1 + G) * a1, (1 + G) * a2
+    C1p, C2p = np.hypot(a1p, b1), np.hypot(a2p, b2)
+    h1p = np.mod(np.degrees(np.arctan2(b1, a1p)), 360)
+    h2p = np.mod(np.degrees(np.arctan2(b2, a2p)), 360)
+
+    dLp = L2 - L1
+    dCp = C2p - C1p
+    dhp = h2p - h1p
+    dhp = np.where(dhp > 180, dhp - 360, np.where(dhp < -180, dhp + 360, dhp))
+    dhp = np.where(C1p * C2p == 0, 0, dhp)
+    dHp = 2 * np.sqrt(C1p * C2p) * np.sin(np.radians(dhp / 2))
+
+    Lp_mean = (L1 + L2) / 2
+    Cp_mean = (C1p + C2p) / 2
+    hp_sum = h1p + h2p
+    hp_mean = np.where(
+        C1p * C2p == 0, hp_sum,
+        np.where(np.abs(h1p - h2p) <= 180, hp_sum / 2,
+                 np.where(hp_sum < 360, (hp_sum + 360) / 2, (hp_sum - 360) / 2))
+    )
+
+    T = (1 - 0.17 * np.cos(np.radians(hp_mean - 30)) + 0.24 * np.cos(np.radians(2 * hp_mean))
+         + 0.32 * np.cos(np.radians(3 * hp_mean + 6)) - 0.20 * np.cos(np.radians(4 * hp_mean - 63)))
+    d_theta = 30 * np.exp(-(((hp_mean - 275) / 25) ** 2))
+    R_C = 2 * np.sqrt(Cp_mean ** 7 / (Cp_mean ** 7 + 25.0 ** 7))
+    S_L = 1 + 0.015 * (Lp_mean - 50) ** 2 / np.sqrt(20 + (Lp_mean - 50) ** 2)
+    S_C = 1 + 0.045 * Cp_mean
+    S_H = 1 + 0.015 * Cp_mean * T
+    R_T = -np.sin(np.radians(2 * d_theta)) * R_C
+
+    return np.sqrt(
+        (dLp / S_L) ** 2 + (dCp / S_C) ** 2 + (dHp / S_H) ** 2 + R_T * (dCp / S_C) * (dHp / S_H)
+    )
+
+
+def build_lab_lut(palette_rgb, bits=5):
+    """
+    Lookup table over RGB quantized to `bits` per channel, indexed [r, g, b]: the nearest
+    palette index by CIEDE2000 and its distance, measured from the center of each bucket.
+    A bucket holding an exact palette color maps to that color with distance 0.
+    """
+    palette_rgb = np.asarray(palette_rgb, dtype=np.int64).reshape(-1, 3)
+    size = 1 << bits
+    step = 256 // size
+
+    levels = np.arange(size) * step + (step - 1) / 2
+    grid = np.stack(np.meshgrid(levels, levels, levels, indexing='ij'), axis=-1).reshape(-1, 3)
+    palette_lab = srgb_to_lab(palette_rgb)
+
+    table = np.zeros(len(grid), dtype=LUT_DTYPE)
+    for start in range(0, len(grid), LUT_BUILD_CHUNK):
+        lab = srgb_to_lab(grid[start:start + LUT_BUILD_CHUNK])
+        distances = ciede2000(lab[:, None, :], palette_lab[None, :, :])
+        nearest = np.argmin(distances, axis=1)
+        table['index'][start:start + LUT_BUILD_CHUNK] = nearest
+        table['delta_e'][start:start + LUT_BUILD_CHUNK] = distances[np.arange(len(nearest)), nearest]
+
+    table = table.reshape(size, size, size)
+    buckets = palette_rgb // step
+    table[buckets[:, 0], buckets[:, 1], buckets[:, 2]] = [(i, 0.0) for i in range(len(palette_rgb))]
+    return table
+
+
+class ColorMatcher:
+    """
+    Perceptual palette matching through a precomputed CIEDE2000 lookup table.
+    Every color is classified with one array index: nearest palette color and its distance.
+    Tolerances are CIEDE2000 distances.
+    """
+
+    def __init__(self, palette, bits=5, cache_dir='.'):
+        self.palette_rgb = np.array([color['rgb'] for color in palette], dtype=np.uint8).reshape(-1, 3)
+        self.bits = bits
+        self.shift = 8 - bits
+        self.logger = get_logger()
+        self.table = self._load_or_build(cache_dir)
+        self._flat = self.table.reshape(-1)
+        self._palette_index = {tuple(rgb): i for i, rgb in enumerate(self.palette_rgb.tolist())}
+
+    def _cache_path(self, cache_dir):
+        digest = hashlib.sha1(self.palette_rgb.tobytes() + bytes([self.bits, LUT_VERSION])).hexdigest()[:12]
+        return os.path.join(cache_dir, f"color_lut_{self.bits}bit_{digest}.npy")
+
+    def _load_or_build(self, cache_dir):
+        """Load the table from its .npy cache file, building and saving it if missing"""
+        path = self._cache_path(cache_dir)
+        size = 1 << self.bits
+        if os.path.exists(path):
+            try:
+                table = np.load(path)
+                if table.dtype == LUT_DTYPE and table.shape == (size, size, size):
+                    return table
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Failed to load color lookup table {path}: {e}")
+
+        table = build_lab_lut(self.palette_rgb, self.bits)
+        try:
+            np.save(path, table)
+        except OSError as e:
+            self.logger.warning(f"Failed to save color lookup table {path}: {e}")
+        return table
+
+    def classify(self, colors_bgr):
+        """(nearest palette index, CIEDE2000 distance) for every row of a (N, 3) BGR array"""
+        colors = np.asarray(colors_bgr, dtype=np.uint8).reshape(-1, 3) >> self.shift
+        shift = self.bits
+        flat_index = (colors[:, 2].astype(np.intp) << (2 * shift)) | (colors[:, 1].astype(np.intp) << shift) | colors[:, 0]
+        entries = self._flat[flat_index]
+        return entries['index'].astype(np.int64), entries['delta_e']
+
+    def snap(self, colors_bgr, tolerance):
+        """Nearest palette index per row, or -1 where it is further than `tolerance`"""
+        index, delta_e = self.classify(colors_bgr)
+        return np.where(delta_e <= tolerance, index, -1)
+
+    def palette_index(self, target_bgr):
+        """Palette index of a BGR color (its nearest entry if it is not a palette color)"""
+        rgb = tuple(int(c) for c in target_bgr[::-1])
+        if rgb in self._palette_index:
+            return self._palette_index[rgb]
+        return int(self.classify([target_bgr])[0][0])
+
+    def matches(self, colors_bgr, target_bgr, tolerance):
+        """Mask of rows whose nearest palette color is the target's, within `tolerance`"""
+        index, delta_e = self.classify(colors_bgr)
+        return (index == self.palette_index(target_bgr)) & (delta_e <= tolerance)
+
+
+def get_color_matcher(palette):
+    """
+    Shared ColorMatcher for `palette` when 'color_matching.mode' is 'lab', or None for
+    the per-channel RGB tolerance ('rgb', the default). Opting in to 'lab' makes the
+    saved tolerance a CIEDE2000 delta E instead of an RGB channel difference.
+    """
+    config = get_config()
+    if config.get('color_matching.mode', 'rgb') != 'lab':
+        return None
+    bits = int(config.get('color_matching.lut_bits', 5))
+    key = (tuple(tuple(color['rgb']) for color in palette), bits)
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is None:
+            matcher = ColorMatcher(palette, bits)
+            _matchers.clear()
+            _matchers[key] = matcher
+        return matcher
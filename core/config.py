@@ -19,7 +19,17 @@ class Config:
             'default_tolerance': 5,
             'default_delay': 50,
             'max_pixel_limit': 1000,
-            'safety_checks': True
+            'safety_checks': True,
+            'verify_batch_size': 20,  # clicks per verification capture
+            'verify_retries': 2,  # extra attempts for a pixel that did not take
+            'verify_settle_ms': 250,  # wait before re-sampling clicked cells
+            'click_order': 'optimized',  # optimized, serpentine or map
+            'mouse_move_action': 'cancel'  # cancel or pause the bot when the user moves the mouse
+        },
+        'charges': {
+            'capacity': 30,  # charges the account can hold
+            'regen_seconds': 30,  # time to regenerate one charge
+            'min_burst': 0  # charges to wait for between unattended bursts: 0 = a full bucket
         },
         'logging': {
             'level': 'INFO',
@@ -30,7 +40,25 @@ class Config:
         'analysis': {
             'auto_refresh_interval': 0,  # 0 = disabled
             'save_debug_images': True,
+            'palette_cache': True,  # reuse palette positions while the palette capture matches
+            'geometry_cache': True,  # reuse the grid pitch and phase while sampled grid lines match
+            'snapshot': True,  # save each analysis and restore it on startup while the screen still matches
+            'snapshot_file': 'analysis_snapshot.npz',
             'image_quality': 'high'
+        },
+        'color_matching': {
+            'mode': 'rgb',  # rgb (per-channel tolerance) or lab (CIEDE2000 lookup table, tolerance in delta E; opt-in, saved tolerances are RGB units)
+            'lut_bits': 5  # bits per channel of the lookup table: 5 = 32K entries, 6 = 262K
+        },
+        'capture': {
+            'backend': 'auto'  # auto, mss or pyautogui
+        },
+        'metrics': {
+            'enabled': False,  # stage timers, counters and histograms (Tools menu toggles it at runtime)
+            'dump_file': 'metrics.json'  # written on exit and from the Tools menu while enabled
+        },
+        'input': {
+            'backend': 'pyautogui'  # pyautogui or xtest (Linux/X11, needs python-xlib)
         }
     }
     
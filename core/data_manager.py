@@ -1,6 +1,12 @@
 import json
 import os
 from tkinter import messagebox
+from .paint_plan import PaintPlan
+from .pixel_map import PixelMap
+from .analysis_cache import PaletteCache, GeometryCache
+from .template import TemplateImage
+from .color_matching import get_color_matcher
+from .settings_store import SettingsStore
 
 class DataManager:
     """Manages color palette and user settings data"""
@@ -8,6 +14,7 @@ class DataManager:
     def __init__(self):
         self.color_palette = self._load_color_palette()
         self.user_settings = self._load_user_settings()
+        self.settings_store = SettingsStore('user_settings.json')
         
         # Analysis state
         self.canvas_region = self.user_settings.get('preferences', {}).get('last_canvas_region')
@@ -15,6 +22,18 @@ class DataManager:
         self.pixel_map = None
         self.color_position_map = None
         self.pixel_size = None
+        self._paint_plan = None
+        self.palette_cache = PaletteCache()
+        self.geometry_cache = GeometryCache()
+        
+        # Kept for incremental re-analysis
+        self.canvas_frame = None
+        self.grid_lattice = None
+        self.analysis_canvas_region = None
+        
+        # Template-file mode: target image painted instead of the preview overlay
+        self.template = None
+        self._load_saved_template()
     
     def _load_color_palette(self):
         """Load color palette from JSON file, excluding ignored colors"""
@@ -102,8 +121,27 @@ class DataManager:
         new_settings['color_profiles']['Default']['colors'] = colors_data
         return new_settings
 
+    def _load_saved_template(self):
+        """Reload the template image used in the last session"""
+        path = self.get_preference('template_path')
+        if path and os.path.exists(path):
+            try:
+                self.template = TemplateImage(path)
+            except ValueError as e:
+                print(f"Failed to load template: {e}")
+    
+    def load_template(self, path):
+        """Load a template image and remember it for the next session. Raises ValueError on unreadable files."""
+        self.template = TemplateImage(path)
+        self.update_preference('template_path', path)
+        return self.template
+    
+    def template_mode(self):
+        """Check if analysis should paint from the template file"""
+        return self.template is not None and self.get_preference('template_enabled', False)
+    
     def save_user_settings(self):
-        """Save user settings to JSON file"""
+        """Save user settings to JSON file (written in the background once changes settle)"""
         try:
             # Save current regions
             if self.canvas_region:
@@ -111,12 +149,19 @@ class DataManager:
             if self.palette_region:
                 self.user_settings['preferences']['last_palette_region'] = self.palette_region
             
-            with open('user_settings.json', 'w') as f:
-                json.dump(self.user_settings, f, indent=2)
+            self.settings_store.save(self.user_settings)
                 
         except Exception as e:
             print(f"Failed to save user settings: {e}")
     
+    def settings_batch(self):
+        """Context manager grouping setting changes into a single write"""
+        return self.settings_store.batch()
+    
+    def flush_user_settings(self):
+        """Write pending settings now, e.g. before exiting"""
+        self.settings_store.flush()
+    
     def update_preference(self, key, value):
         """Update a preference setting"""
         self.user_settings['preferences'][key] = value
@@ -220,12 +265,52 @@ class DataManager:
                 enabled_colors.append(color)
         return enabled_colors
     
-    def set_analysis_results(self, pixel_size, pixel_map, color_position_map):
-        """Store analysis results"""
+    def get_bought_color_ids(self):
+        """Get ids of premium colors marked as bought in the active profile"""
+        return [
+            color['id'] for color in self.color_palette
+            if color.get('premium', False) and self.get_color_setting(color['id'], 'bought', False)
+        ]
+    
+    def set_analysis_results(self, pixel_size, pixel_map, color_position_map, canvas_frame=None, grid_lattice=None):
+        """Store analysis results, plus the canvas frame and grid lattice used to produce them"""
         self.pixel_size = pixel_size
+        if not isinstance(pixel_map, PixelMap):
+            pixel_map = PixelMap.from_dict(pixel_map, pixel_size)
         self.pixel_map = pixel_map
         self.color_position_map = color_position_map
+        self.canvas_frame = canvas_frame
+        self.grid_lattice = grid_lattice
+        self.analysis_canvas_region = tuple(self.canvas_region) if self.canvas_region else None
+        self._paint_plan = None
+    
+    def can_analyze_incrementally(self):
+        """Check if a previous frame exists for the current canvas region"""
+        return (
+            self.has_analysis_data()
+            and self.canvas_frame is not None
+            and self.canvas_region is not None
+            and tuple(self.canvas_region) == self.analysis_canvas_region
+        )
     
+    def get_paint_plan(self, tolerance):
+        """Get the paint plan for the current analysis, rebuilt only when analysis or tolerance changes"""
+        if self.pixel_map is None:
+            return None
+        matcher = self.get_color_matcher()
+        if (self._paint_plan is None or self._paint_plan.tolerance != tolerance
+                or self._paint_plan.matcher is not matcher):
+            self._paint_plan = PaintPlan.build(self.pixel_map, self.color_palette, tolerance, matcher=matcher)
+        return self._paint_plan
+    
+    def get_color_matcher(self):
+        """Perceptual color matcher for the palette, or None when matching per RGB channel"""
+        return get_color_matcher(self.color_palette)
+
+    def invalidate_paint_plan(self):
+        """Drop the cached paint plan after pixel map entries were updated in place"""
+        self._paint_plan = None
+
     def has_analysis_data(self):
         """Check if analysis data is available"""
         return self.pixel_map is not None and self.color_position_map is not None
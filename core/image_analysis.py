@@ -1,51 +1,68 @@
 import cv2
+import numpy as np
 import statistics
+from .metrics import get_metrics
+from .pixel_map import PixelMap
 
+# Below this lattice confidence (or with too few previews) a newly estimated lattice falls back to contours
+LATTICE_MIN_CONFIDENCE = 0.5
+LATTICE_MIN_PREVIEWS = 10
+# A cached lattice is reused when this share of sampled edges falls on its predicted grid lines
+LATTICE_VALIDATION_MIN_MATCH = 0.8
 
-def estimate_pixel_size(img, min_size=5, max_size=50, debug_filename="debug_size_estimation.png"):
+
+def _find_square_rects(img, min_size=5, max_size=50):
     """
-    Estimates the grid pixel size and saves a debug image showing the process.
+    The expensive contour pass shared by size estimation and preview extraction.
+    Returns bounding rects (x, y, w, h) of square-like contours in the size range.
     """
-    debug_img = img.copy()
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     edges = cv2.Canny(gray, 0, 0, apertureSize=3)
     contours, _ = cv2.findContours(edges, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
 
-    square_sizes = []
-    square_contours = []
-
+    square_rects = []
     for cnt in contours:
         x, y, w, h = cv2.boundingRect(cnt)
         is_square_like = 0.8 <= w / h <= 1.2
         is_right_size = min_size < w < max_size and min_size < h < max_size
 
         if is_square_like and is_right_size:
-            square_sizes.append(w)
-            square_contours.append((cnt, w, h))
+            square_rects.append((x, y, w, h))
+
+    return square_rects
+
+
+def _preview_median(square_rects):
+    """Median width of the smallest quartile of squares, i.e. the preview dot size"""
+    sorted_sizes = sorted(w for _, _, w, _ in square_rects)
+    preview_count = max(1, len(sorted_sizes) // 4)
+    return statistics.median(sorted_sizes[:preview_count])
 
-    if len(square_sizes) < 10:
+
+def _estimate_size_from_rects(img, square_rects, debug_filename="debug_size_estimation.png"):
+    """Size estimation from pre-computed square rects. Pass debug_filename=None to skip the debug image."""
+    if len(square_rects) < 10:
         print("Warning: Could not find enough squares. Falling back to default (22).")
         return 22
 
-    sorted_sizes = sorted(square_sizes)
-    preview_count = max(1, len(sorted_sizes) // 4)
-    potential_previews = sorted_sizes[:preview_count]
-    preview_median = statistics.median(potential_previews)
+    preview_median = _preview_median(square_rects)
     expected_pixel_size = preview_median * 3
     pixel_min = expected_pixel_size * 0.8
     pixel_max = expected_pixel_size * 1.2
 
+    debug_img = img.copy() if debug_filename else None
     pixel_sizes = []
-    for cnt, w, h in square_contours:
-        x, y, _, _ = cv2.boundingRect(cnt)
-
+    for x, y, w, h in square_rects:
         if w <= preview_median * 1.5:
-            cv2.rectangle(debug_img, (x, y), (x + w, y + h), (0, 255, 0), 1)
+            color = (0, 255, 0)
         elif pixel_min <= w <= pixel_max:
-            cv2.rectangle(debug_img, (x, y), (x + w, y + h), (0, 0, 255), 1)
+            color = (0, 0, 255)
             pixel_sizes.append(w)
         else:
-            cv2.rectangle(debug_img, (x, y), (x + w, y + h), (128, 128, 128), 1)
+            color = (128, 128, 128)
+
+        if debug_img is not None:
+            cv2.rectangle(debug_img, (x, y), (x + w, y + h), color, 1)
 
     if not pixel_sizes:
         print("Warning: Could not find valid single pixel squares. Using calculated size.")
@@ -53,11 +70,33 @@ def estimate_pixel_size(img, min_size=5, max_size=50, debug_filename="debug_size
     else:
         estimated_size = round(statistics.median(pixel_sizes))
 
-    cv2.imwrite(debug_filename, debug_img)
-    print(f"Size estimation debug image saved: {debug_filename}")
+    if debug_img is not None:
+        cv2.imwrite(debug_filename, debug_img)
+        print(f"Size estimation debug image saved: {debug_filename}")
     return estimated_size
 
 
+def _preview_positions_from_rects(square_rects):
+    """Preview centers from pre-computed square rects (squares no wider than 1.5x the preview median)"""
+    if len(square_rects) < 10:
+        return []
+
+    preview_median = _preview_median(square_rects)
+    return [
+        (x + w // 2, y + h // 2)
+        for x, y, w, h in square_rects
+        if w <= preview_median * 1.5
+    ]
+
+
+def estimate_pixel_size(img, min_size=5, max_size=50, debug_filename="debug_size_estimation.png"):
+    """
+    Estimates the grid pixel size and saves a debug image showing the process.
+    """
+    square_rects = _find_square_rects(img, min_size, max_size)
+    return _estimate_size_from_rects(img, square_rects, debug_filename)
+
+
 def find_pixels_to_paint(img, target_color_bgr, pixel_size, tolerance=1, debug_filename=None):
     """
     Finds pixels to paint. Expects a BGR image and a BGR target color.
@@ -108,68 +147,375 @@ def find_pixels_to_paint(img, target_color_bgr, pixel_size, tolerance=1, debug_f
 def build_pixel_map(img, pixel_size, preview_positions):
     """
     Builds a map of all pixel positions with their preview and pixel colors.
-    Returns a dictionary: {(x, y): {'preview_color': bgr, 'pixel_color': bgr}}
+    Returns a PixelMap (reads like {(x, y): {'preview_color': bgr, 'pixel_color': bgr}}).
     """
-    pixel_map = {}
-
-    for preview_x, preview_y in preview_positions:
-        pixel_x = preview_x - pixel_size // 2
-        pixel_y = preview_y - pixel_size // 2
-
-        if (
-            pixel_y + 2 < img.shape[0] and pixel_x + 2 < img.shape[1]
-            and pixel_y >= 0 and pixel_x >= 0
-            and preview_y >= 0 and preview_x >= 0
-            and preview_y < img.shape[0] and preview_x < img.shape[1]
-        ):
-            preview_color = img[preview_y, preview_x]
-            pixel_color = img[pixel_y + 2, pixel_x + 2]
-
-            pixel_map[(preview_x, preview_y)] = {
-                "preview_color": tuple(preview_color),
-                "pixel_color": tuple(pixel_color),
-            }
-
-    return pixel_map
+    return PixelMap.from_samples(img, pixel_size, preview_positions)
 
 
 def get_preview_positions_from_estimation(img, pixel_size):
     """
     Extract all preview positions from the size estimation process.
     """
+    # Use same logic as estimate_pixel_size to find previews
+    return _preview_positions_from_rects(_find_square_rects(img, 5, 50))
+
+
+def analyze_canvas(img, min_size=5, max_size=50, debug_filename="debug_size_estimation.png", use_lattice=True,
+                   cached_lattices=()):
+    """
+    Single entry point for canvas analysis: pixel size, preview positions and pixel map.
+    Tries lattice detection first; otherwise runs the contour pass once and derives both
+    the size and the previews from it. Pass debug_filename=None to skip the debug image.
+    The first of cached_lattices (e.g. from earlier runs) that passes validate_lattice
+    replaces the full lattice estimate; method is then 'cached', however few previews remain.
+    Returns a dictionary:
+    {'pixel_size', 'preview_positions', 'pixel_map', 'lattice', 'method', 'debug_image'}
+    """
+    metrics = get_metrics()
+    for cached in cached_lattices if use_lattice else ():
+        with metrics.timer('analysis.validate'):
+            valid = validate_lattice(img, cached)
+        if valid:
+            # A validated lattice is trusted even near the end of a job, when few previews are left
+            return _lattice_analysis(img, cached, 'cached', debug_filename, min_previews=0)
+
+    with metrics.timer('analysis.estimate'):
+        lattice = estimate_grid_lattice(img, min_size, max_size) if use_lattice else None
+    if lattice is not None and lattice['confidence'] >= LATTICE_MIN_CONFIDENCE:
+        result = _lattice_analysis(img, lattice, 'lattice', debug_filename)
+        if result is not None:
+            return result
+
+    with metrics.timer('analysis.contours'):
+        square_rects = _find_square_rects(img, min_size, max_size)
+        pixel_size = _estimate_size_from_rects(img, square_rects, debug_filename)
+    with metrics.timer('analysis.previews'):
+        preview_positions = _preview_positions_from_rects(square_rects)
+    with metrics.timer('analysis.map'):
+        pixel_map = build_pixel_map(img, pixel_size, preview_positions)
+    return {
+        'pixel_size': pixel_size,
+        'preview_positions': preview_positions,
+        'pixel_map': pixel_map,
+        'lattice': None,
+        'method': 'contour',
+        'debug_image': debug_filename if len(square_rects) >= 10 else None,
+    }
+
+
+def _lattice_analysis(img, lattice, method, debug_filename, min_previews=LATTICE_MIN_PREVIEWS):
+    """analyze_canvas result for a known lattice, or None if it yields fewer than `min_previews` previews"""
+    metrics = get_metrics()
+    with metrics.timer('analysis.previews'):
+        preview_positions = get_preview_positions_from_lattice(img, lattice)
+    if len(preview_positions) < min_previews:
+        return None
+    pixel_size = int(round(lattice['pitch']))
+    if debug_filename:
+        with metrics.timer('analysis.debug_image'):
+            save_lattice_debug_image(img, lattice, preview_positions, debug_filename)
+    with metrics.timer('analysis.map'):
+        pixel_map = build_pixel_map(img, pixel_size, preview_positions)
+    return {
+        'pixel_size': pixel_size,
+        'preview_positions': preview_positions,
+        'pixel_map': pixel_map,
+        'lattice': lattice,
+        'method': method,
+        'debug_image': debug_filename,
+    }
+
+
+def validate_lattice(img, lattice, samples=16, min_match=LATTICE_VALIDATION_MIN_MATCH):
+    """
+    Cheap check that a known lattice still fits the image, without re-estimating it.
+    Edges along a few sampled rows and columns must fall on the lines the lattice predicts:
+    cell borders, plus the preview dot outline for lines crossing the dot's middle third.
+    The dot rule is what tells the true phase from one shifted by a third of a cell.
+    """
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    edges = cv2.Canny(gray, 0, 0, apertureSize=3)
-    contours, _ = cv2.findContours(edges, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    pitch = lattice['pitch']
+    origin_x, origin_y = lattice['origin']
+    matched = total = 0
+
+    for lines, across_origin, along_origin in (
+        (gray, origin_y, origin_x),      # rows: vertical edges
+        (gray.T, origin_x, origin_y),    # columns: horizontal edges
+    ):
+        # Evenly spread lines, jittered so they do not alias with the pitch and hit every phase
+        spread = np.linspace(0, lines.shape[0] - 1 - pitch, samples)
+        jitter = np.mod(np.arange(samples) * 0.618, 1.0) * pitch
+        picks = np.unique(np.clip(spread + jitter, 0, lines.shape[0] - 1).astype(np.int64))
+
+        # Offset of each line from its cell center; lines near the dot band edge may see either
+        offsets = np.abs(np.mod(picks - across_origin + pitch / 2, pitch) - pitch / 2)
+        outside_dot = offsets > pitch / 6 + 1
+
+        for line, outside in zip(lines[picks], outside_dot):
+            # An edge at diff index i sits on pixel boundary i + 1; the cell center is at origin + 0.5
+            boundaries = np.flatnonzero(line[1:] != line[:-1]) + 1
+            relative = np.abs(np.mod(boundaries - along_origin - 0.5 + pitch / 2, pitch) - pitch / 2)
+            expected = [pitch / 2] if outside else [pitch / 2, pitch / 6]
+            distance = np.min(np.abs(relative[:, None] - np.array(expected)[None, :]), axis=1)
+            matched += int(np.count_nonzero(distance <= 1.0))
+            total += len(boundaries)
+
+    return total >= samples and matched >= min_match * total
+
+
+def estimate_grid_lattice(img, min_size=5, max_size=50):
+    """
+    Recovers the canvas grid from the periodic edge structure instead of contours.
+    Pitch comes from the autocorrelation of the row/column edge projections (refined
+    to sub-pixel with a harmonic DFT), phase from edges folded onto one grid cell.
+    Returns {'pitch': float, 'origin': (x, y), 'confidence': float} where origin is the
+    pixel at the center of one grid cell, or None if no periodic structure was found.
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    vertical_edges = (gray[:, 1:] != gray[:, :-1]).view(np.uint8)
+    horizontal_edges = (gray[1:, :] != gray[:-1, :]).view(np.uint8)
+
+    col_profile = vertical_edges.sum(axis=0, dtype=np.float64)
+    row_profile = horizontal_edges.sum(axis=1, dtype=np.float64)
+
+    lag, confidence = _lattice_lag([col_profile, row_profile], min_size, max_size)
+    if lag is None:
+        return None
+
+    # Pixel i covers [i, i + 1): a vertical edge at diff index i lies on boundary i + 1
+    profiles = [col_profile, row_profile]
+    pitch = _refine_pitch(profiles, lag, offset=1.0)
+
+    # When every cell holds a preview dot, dot edges and cell borders are evenly spaced
+    # and the projections repeat every third of a cell. Folded in 2D they differ (borders
+    # are full lines, dot edges are not), so check whether a multiple is the real pitch.
+    for multiple in (3, 2):
+        if lag * multiple > max_size:
+            continue
+        candidate = _refine_pitch(profiles, lag * multiple, offset=1.0)
+        if not _fold_repeats(candidate, multiple, vertical_edges, horizontal_edges):
+            pitch = candidate
+            break
+
+    center_x, center_y = _lattice_phase(pitch, vertical_edges, horizontal_edges)
+
+    return {
+        'pitch': pitch,
+        'origin': (center_x - 0.5, center_y - 0.5),
+        'confidence': confidence,
+    }
+
+
+def _smooth_profile(profile, sigma=1.0):
+    """Gaussian-smooth an edge projection so fractional pitches still line up across lags"""
+    radius = int(3 * sigma)
+    kernel = np.exp(-0.5 * (np.arange(-radius, radius + 1) / sigma) ** 2)
+    return np.convolve(profile, kernel / kernel.sum(), mode='same')
+
+
+def _lattice_lag(profiles, min_size, max_size):
+    """Pick the grid pitch (integer lag) shared by the edge projections and its confidence"""
+    scores = None
+    for profile in profiles:
+        n = len(profile)
+        max_lag = min(max_size + 1, n // 2)
+        if max_lag <= min_size:
+            return None, 0.0
+
+        smoothed = _smooth_profile(profile)
+        centered = smoothed - smoothed.mean()
+        spectrum = np.fft.rfft(centered, 2 * n)
+        autocorr = np.fft.irfft(spectrum * np.conj(spectrum))[:max_lag + 1]
+        if autocorr[0] <= 0:
+            return None, 0.0
+
+        # Unbiased, normalized autocorrelation so long lags are not penalized
+        overlap = n - np.arange(max_lag + 1)
+        normalized = (autocorr / overlap) / (autocorr[0] / n)
+        scores = normalized if scores is None else scores[:len(normalized)] + normalized[:len(scores)]
+
+    scores = scores / len(profiles)
+    best = float(scores[min_size:max_size + 1].max())
+    if best <= 0:
+        return None, 0.0
+
+    # Multiples of the pitch score as high as the pitch itself: take the first strong local peak
+    for lag in range(min_size, min(max_size, len(scores) - 2) + 1):
+        if scores[lag] >= 0.8 * best and scores[lag] >= scores[lag - 1] and scores[lag] >= scores[lag + 1]:
+            return lag, min(1.0, float(scores[lag]))
+
+    lag = min_size + int(np.argmax(scores[min_size:max_size + 1]))
+    return lag, min(1.0, best)
+
+
+def _refine_pitch(profiles, lag, offset=0.0, harmonics=3):
+    """Refine an integer lag to a sub-pixel pitch by maximizing DFT energy at its harmonics"""
+    def energy(candidates):
+        total = np.zeros(len(candidates))
+        for profile in profiles:
+            positions = np.arange(len(profile)) + offset
+            weights = profile - profile.mean()
+            for harmonic in range(1, harmonics + 1):
+                phase = 2j * np.pi * harmonic * positions[None, :] / candidates[:, None]
+                total += np.abs(np.exp(-phase) @ weights)
+        return total
+
+    # Coarse then fine search around the integer lag
+    coarse = np.arange(max(2.0, lag - 1.0), lag + 1.0 + 1e-9, 0.1)
+    best = coarse[int(np.argmax(energy(coarse)))]
+    fine = np.arange(best - 0.1, best + 0.1 + 1e-9, 0.01)
+    return float(fine[int(np.argmax(energy(fine)))])
+
+
+def _fold_edges(edges, pitch, bins, x_start, y_start):
+    """
+    Sum an edge map onto one grid cell of `bins` x `bins`.
+    `x_start` / `y_start` are the coordinates of the first column / row of `edges`;
+    bin k is centered on coordinate k * pitch / bins plus the fractional part of the start,
+    so whole- and half-pixel coordinates both land exactly on a bin.
+    """
+    def bin_index(start, length):
+        coords = np.arange(length) + (start - start % 1)
+        return np.rint(np.mod(coords, pitch) * bins / pitch).astype(np.int64) % bins
+
+    row_bins = bin_index(y_start, edges.shape[0])
+    col_bins = bin_index(x_start, edges.shape[1])
+
+    by_row = np.zeros((bins, edges.shape[1]), dtype=np.int64)
+    for fy in range(bins):
+        by_row[fy] = edges[row_bins == fy].sum(axis=0, dtype=np.int64)
+
+    folded = np.zeros((bins, bins), dtype=np.float64)
+    for fx in range(bins):
+        folded[:, fx] = by_row[:, col_bins == fx].sum(axis=1)
+    return folded
+
+
+def _fold_repeats(pitch, multiple, vertical_edges, horizontal_edges, threshold=0.8):
+    """Check whether edges folded at `pitch` repeat every pitch / multiple (i.e. pitch is a multiple of the grid)"""
+    # A whole number of bins per sub-period makes the shift exact for fractional pitches
+    shift = max(3, int(round(pitch / multiple)))
+    bins = shift * multiple
+    folded = (
+        _fold_edges(vertical_edges, pitch, bins, 1.0, 0.5)
+        + _fold_edges(horizontal_edges, pitch, bins, 0.5, 1.0)
+    )
+
+    # Blur by one bin (wrapping) so rounding jitter on thin lines does not break the match
+    for axis in (0, 1):
+        folded = folded + 0.5 * (np.roll(folded, 1, axis=axis) + np.roll(folded, -1, axis=axis))
+
+    for axis in (0, 1):
+        a = folded - folded.mean()
+        b = np.roll(folded, shift, axis=axis)
+        b = b - b.mean()
+        norm = np.sqrt((a * a).sum() * (b * b).sum())
+        if norm == 0 or (a * b).sum() / norm < threshold:
+            return False
+    return True
+
+
+def _lattice_phase(pitch, vertical_edges, horizontal_edges):
+    """
+    Fold edges onto one grid cell and locate the cell center (in pixel-boundary coordinates).
+    Cell borders fold into full lines across the folded cell and are removed with a
+    median; the preview dot outline that remains is centered on the cell center.
+    Without preview dots, the center is half a pitch from the strongest border.
+    """
+    bins = max(3, int(round(pitch)))
+
+    # Vertical edges sit on column boundaries (x = i + 1) and span pixel rows (y = i + 0.5);
+    # horizontal edges are the transpose
+    folded_vertical = _fold_edges(vertical_edges, pitch, bins, 1.0, 0.5)
+    folded_horizontal = _fold_edges(horizontal_edges, pitch, bins, 0.5, 1.0)
+
+    dot_vertical = np.clip(folded_vertical - np.median(folded_vertical, axis=0)[None, :], 0, None)
+    dot_horizontal = np.clip(folded_horizontal - np.median(folded_horizontal, axis=1)[:, None], 0, None)
+    dot_mass = dot_vertical.sum() + dot_horizontal.sum()
+    total_mass = folded_vertical.sum() + folded_horizontal.sum()
+
+    def circular_mean(*weighted_bins):
+        """Circular mean over (weights, bin shift) pairs, returned as a coordinate in [0, pitch)"""
+        sin_sum = cos_sum = 0.0
+        for weights, shift in weighted_bins:
+            angles = 2 * np.pi * (np.arange(bins) / bins + shift / pitch)
+            sin_sum += (weights * np.sin(angles)).sum()
+            cos_sum += (weights * np.cos(angles)).sum()
+        return float(np.mod(np.arctan2(sin_sum, cos_sum), 2 * np.pi) / (2 * np.pi) * pitch)
+
+    if total_mass > 0 and dot_mass >= 0.2 * total_mass:
+        center_x = circular_mean((dot_vertical.sum(axis=0), 0.0), (dot_horizontal.sum(axis=0), 0.5))
+        center_y = circular_mean((dot_vertical.sum(axis=1), 0.5), (dot_horizontal.sum(axis=1), 0.0))
+    else:
+        border_x = np.argmax(np.median(folded_vertical, axis=0)) * pitch / bins
+        border_y = np.argmax(np.median(folded_horizontal, axis=1)) * pitch / bins
+        center_x = float(np.mod(border_x + pitch / 2, pitch))
+        center_y = float(np.mod(border_y + pitch / 2, pitch))
 
-    preview_positions = []
+    return center_x, center_y
 
-    # Use same logic as estimate_pixel_size to find previews
-    square_sizes = []
-    square_contours = []
 
-    for cnt in contours:
-        x, y, w, h = cv2.boundingRect(cnt)
+def lattice_cell_centers(shape, lattice):
+    """Integer pixel centers of every grid column and row that falls inside an image of `shape`"""
+    height, width = shape[:2]
+    pitch = lattice['pitch']
+    origin_x, origin_y = lattice['origin']
 
-        is_square_like = 0.8 <= w / h <= 1.2
-        is_right_size = 5 < w < 50 and 5 < h < 50
+    def axis_centers(origin, length):
+        first = int(np.ceil((-0.5 - origin) / pitch))
+        last = int(np.floor((length - 0.5 - origin) / pitch))
+        centers = np.rint(origin + pitch * np.arange(first, last + 1)).astype(np.int64)
+        return centers[(centers >= 0) & (centers < length)]
+
+    return axis_centers(origin_x, width), axis_centers(origin_y, height)
 
-        if is_square_like and is_right_size:
-            square_sizes.append(w)
-            square_contours.append((cnt, w, h))
 
-    if len(square_sizes) < 10:
+def get_preview_positions_from_lattice(img, lattice):
+    """
+    Extract preview positions by sampling every lattice cell with strided indexing.
+    A cell holds a preview when its center dot is uniform and differs from the
+    pixel color sampled the same way build_pixel_map does.
+    """
+    pixel_size = int(round(lattice['pitch']))
+    centers_x, centers_y = lattice_cell_centers(img.shape, lattice)
+
+    pixel_x = centers_x - pixel_size // 2 + 2
+    pixel_y = centers_y - pixel_size // 2 + 2
+    keep_x = (pixel_x >= 2) & (pixel_x < img.shape[1])
+    keep_y = (pixel_y >= 2) & (pixel_y < img.shape[0])
+    centers_x, pixel_x = centers_x[keep_x], pixel_x[keep_x]
+    centers_y, pixel_y = centers_y[keep_y], pixel_y[keep_y]
+    if len(centers_x) == 0 or len(centers_y) == 0:
         return []
 
-    sorted_sizes = sorted(square_sizes)
-    preview_count = max(1, len(sorted_sizes) // 4)
-    potential_previews = sorted_sizes[:preview_count]
-    preview_median = statistics.median(potential_previews)
+    center_colors = img[np.ix_(centers_y, centers_x)]
+    pixel_colors = img[np.ix_(pixel_y, pixel_x)]
+    has_preview = np.any(center_colors != pixel_colors, axis=2)
+
+    # The dot must be uniform around its center, which rejects textured non-grid areas
+    reach = max(1, pixel_size // 6 - 1)
+    width, height = img.shape[1], img.shape[0]
+    for dx, dy in ((-reach, 0), (reach, 0), (0, -reach), (0, reach)):
+        xs = np.clip(centers_x + dx, 0, width - 1)
+        ys = np.clip(centers_y + dy, 0, height - 1)
+        has_preview &= np.all(img[np.ix_(ys, xs)] == center_colors, axis=2)
+
+    rows, cols = np.nonzero(has_preview)
+    return list(zip(centers_x[cols].tolist(), centers_y[rows].tolist()))
+
 
-    for cnt, w, h in square_contours:
-        if w <= preview_median * 1.5:  # This is a preview
-            x, y, _, _ = cv2.boundingRect(cnt)
-            center_x = x + w // 2
-            center_y = y + h // 2
-            preview_positions.append((center_x, center_y))
+def save_lattice_debug_image(img, lattice, preview_positions, debug_filename="debug_size_estimation.png"):
+    """Save debug image showing lattice cells (red) and detected preview dots (green)."""
+    debug_img = img.copy()
+    pixel_size = int(round(lattice['pitch']))
+    dot_half = max(1, pixel_size // 6)
+
+    for center_x, center_y in preview_positions:
+        left = center_x - pixel_size // 2
+        top = center_y - pixel_size // 2
+        cv2.rectangle(debug_img, (left, top), (left + pixel_size, top + pixel_size), (0, 0, 255), 1)
+        cv2.rectangle(debug_img, (center_x - dot_half, center_y - dot_half),
+                      (center_x + dot_half, center_y + dot_half), (0, 255, 0), 1)
 
-    return preview_positions
\ No newline at end of file
+    cv2.imwrite(debug_filename, debug_img)
+    print(f"Size estimation debug image saved: {debug_filename}")
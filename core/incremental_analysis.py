@@ -0,0 +1,124 @@
+import cv2
+import numpy as np
+from .image_analysis import build_pixel_map, get_preview_positions_from_lattice
+
+# Above this share of changed tiles the canvas is assumed to have panned or zoomed
+MAX_CHANGED_TILE_FRACTION = 0.35
+# Global shift (in pixels) from phase correlation that counts as a pan
+MAX_GRID_SHIFT = 1.0
+DEFAULT_TILE_SIZE = 64
+
+
+def changed_tiles(previous_frame, frame, tile_size=DEFAULT_TILE_SIZE):
+    """
+    Diffs two frames of the same shape.
+    Returns (changed_pixels, tile_mask): a per-pixel boolean mask and a per-tile boolean mask.
+    """
+    changed_pixels = np.any(cv2.absdiff(previous_frame, frame) > 0, axis=2)
+
+    height, width = changed_pixels.shape
+    tiles_y = -(-height // tile_size)
+    tiles_x = -(-width // tile_size)
+    padded = np.zeros((tiles_y * tile_size, tiles_x * tile_size), dtype=bool)
+    padded[:height, :width] = changed_pixels
+    tile_mask = padded.reshape(tiles_y, tile_size, tiles_x, tile_size).any(axis=(1, 3))
+    return changed_pixels, tile_mask
+
+
+def detect_grid_shift(previous_frame, frame, crop_size=512):
+    """
+    Estimate the global (dx, dy) shift between two frames with phase correlation.
+    Works on a full-resolution center crop: downsampling aliases fine grids into false sub-cell shifts.
+    """
+    height, width = frame.shape[:2]
+    crop_h, crop_w = min(height, crop_size), min(width, crop_size)
+    top, left = (height - crop_h) // 2, (width - crop_w) // 2
+
+    def prepare(img):
+        crop = np.ascontiguousarray(img[top:top + crop_h, left:left + crop_w])
+        return cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY).astype(np.float32)
+
+    window = cv2.createHanningWindow((crop_w, crop_h), cv2.CV_32F)
+    (dx, dy), _ = cv2.phaseCorrelate(prepare(previous_frame), prepare(frame), window)
+    return dx, dy
+
+
+def incremental_update(previous_frame, frame, pixel_map, pixel_size, lattice=None, tile_size=DEFAULT_TILE_SIZE):
+    """
+    Updates a pixel map from a new capture of the same canvas region instead of rebuilding it.
+    Only entries whose sampled pixels changed are re-sampled. With a known lattice, cells in
+    changed tiles are also re-checked for previews that appeared or disappeared.
+    Returns a dictionary:
+    {'pixel_map', 'changed_tiles', 'updated', 'full_analysis_reason'}
+    where full_analysis_reason is set (and pixel_map is None) when the grid moved.
+    """
+    result = {'pixel_map': None, 'changed_tiles': 0, 'updated': 0, 'full_analysis_reason': None}
+
+    if previous_frame is None or previous_frame.shape != frame.shape:
+        result['full_analysis_reason'] = "canvas size changed"
+        return result
+
+    changed_pixels, tile_mask = changed_tiles(previous_frame, frame, tile_size)
+    result['changed_tiles'] = int(tile_mask.sum())
+    if not tile_mask.any():
+        result['pixel_map'] = pixel_map
+        return result
+
+    if tile_mask.mean() > MAX_CHANGED_TILE_FRACTION:
+        result['full_analysis_reason'] = f"{tile_mask.mean():.0%} of tiles changed (pan or zoom)"
+        return result
+
+    dx, dy = detect_grid_shift(previous_frame, frame)
+    if max(abs(dx), abs(dy)) >= MAX_GRID_SHIFT:
+        result['full_analysis_reason'] = f"grid shifted by ({dx:.1f}, {dy:.1f}) px"
+        return result
+
+    def touched(positions):
+        """Entries whose preview or pixel sample lies on a changed pixel"""
+        if len(positions) == 0:
+            return np.zeros(0, dtype=bool)
+        xs, ys = positions[:, 0], positions[:, 1]
+        pixel_xs = xs - pixel_size // 2 + 2
+        pixel_ys = ys - pixel_size // 2 + 2
+        height, width = changed_pixels.shape
+        inside = (xs >= 0) & (ys >= 0) & (xs < width) & (ys < height)
+        pixel_inside = (pixel_xs >= 0) & (pixel_ys >= 0) & (pixel_xs < width) & (pixel_ys < height)
+
+        hit = np.zeros(len(positions), dtype=bool)
+        hit[inside] |= changed_pixels[ys[inside], xs[inside]]
+        hit[pixel_inside] |= changed_pixels[pixel_ys[pixel_inside], pixel_xs[pixel_inside]]
+        return hit
+
+    old_positions = pixel_map.positions.astype(np.int64)
+    old_touched = touched(old_positions)
+
+    if lattice is not None:
+        # Re-detect previews in changed tiles: painted cells lose their dot, griefed ones gain one
+        candidates = np.array(get_preview_positions_from_lattice(frame, lattice), dtype=np.int64).reshape(-1, 2)
+        refresh_positions = candidates[touched(candidates)]
+    else:
+        refresh_positions = old_positions[old_touched]
+
+    refreshed = build_pixel_map(frame, pixel_size, refresh_positions)
+
+    # Touched entries are replaced in place when still present and dropped otherwise;
+    # previews that are new to the map are appended
+    touched_indices = np.flatnonzero(old_touched)
+    replacement = refreshed.indices_of(old_positions[touched_indices])
+    still_present = replacement >= 0
+    replaced_indices, replacement = touched_indices[still_present], replacement[still_present]
+
+    keep = ~old_touched
+    keep[replaced_indices] = True
+    updated_map = pixel_map.take(np.flatnonzero(keep))
+    replaced_rows = np.cumsum(keep)[replaced_indices] - 1
+    updated_map.preview_colors[replaced_rows] = refreshed.preview_colors[replacement]
+    updated_map.pixel_colors[replaced_rows] = refreshed.pixel_colors[replacement]
+
+    is_new = np.ones(len(refreshed), dtype=bool)
+    is_new[replacement] = False
+    updated_map = updated_map.concatenate(refreshed.take(np.flatnonzero(is_new)))
+
+    result['pixel_map'] = updated_map
+    result['updated'] = int(old_touched.sum()) + int(is_new.sum())
+    return result
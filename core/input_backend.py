@@ -0,0 +1,221 @@
+import threading
+import time
+from .config import get_config
+
+
+class InputBackend:
+    """
+    Base class for mouse input backends.
+    Coordinates are absolute screen pixels; position() returns an (x, y) tuple.
+    """
+
+    name = 'base'
+
+    def click(self, x, y):
+        """Move to (x, y) and left-click"""
+        raise NotImplementedError
+
+    def position(self):
+        """Current pointer position as an (x, y) tuple"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the backend"""
+        pass
+
+
+class PyAutoGuiBackend(InputBackend):
+    """
+    pyautogui without its per-call PAUSE: timing is left to the ClickDispatcher.
+    The fail-safe corner check stays active.
+    """
+
+    name = 'pyautogui'
+
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def click(self, x, y):
+        self._pyautogui.click(x, y, _pause=False)
+
+    def position(self):
+        x, y = self._pyautogui.position()
+        return x, y
+
+
+class XTestBackend(InputBackend):
+    """
+    Direct XTest fake input through python-xlib (Linux/X11): one motion and one
+    button press/release per click, flushed with a single round trip.
+    """
+
+    name = 'xtest'
+
+    def __init__(self):
+        from Xlib import X, display
+        from Xlib.ext import xtest
+        self._X = X
+        self._xtest = xtest
+        self._display = display.Display()
+        if not self._display.has_extension('XTEST'):
+            self._display.close()
+            raise RuntimeError("X server does not support the XTEST extension")
+        self._root = self._display.screen().root
+        # Xlib connections are not thread-safe
+        self._lock = threading.Lock()
+
+    def click(self, x, y):
+        with self._lock:
+            self._xtest.fake_input(self._display, self._X.MotionNotify, x=int(x), y=int(y))
+            self._xtest.fake_input(self._display, self._X.ButtonPress, 1)
+            self._xtest.fake_input(self._display, self._X.ButtonRelease, 1)
+            self._display.sync()
+
+    def position(self):
+        with self._lock:
+            pointer = self._root.query_pointer()
+        return pointer.root_x, pointer.root_y
+
+    def close(self):
+        with self._lock:
+            self._display.close()
+
+
+class RecordingBackend(InputBackend):
+    """
+    Records clicks instead of sending them, for headless runs and benchmarks.
+    `on_click(x, y)` is called for every click (e.g. to apply it to a simulated canvas).
+    """
+
+    name = 'recording'
+
+    def __init__(self, on_click=None, clock=time.monotonic):
+        self.on_click = on_click
+        self.clock = clock
+        self.clicks = []  # [(timestamp, x, y), ...]
+        self._position = (0, 0)
+        self._lock = threading.Lock()
+
+    def click(self, x, y):
+        with self._lock:
+            self.clicks.append((self.clock(), x, y))
+            self._position = (x, y)
+        if self.on_click is not None:
+            self.on_click(x, y)
+
+    def position(self):
+        return self._position
+
+    def move_to(self, x, y):
+        """Move the recorded pointer without clicking (simulates the user moving the mouse)"""
+        self._position = (x, y)
+
+
+class ClickDispatcher:
+    """
+    Sends click sequences on a monotonic-clock schedule: click i goes out at start + i * interval,
+    so time spent in the backend is absorbed instead of added on top of the delay.
+    When the schedule falls behind (e.g. after a palette wait) it restarts from now
+    rather than bursting to catch up.
+    """
+
+    def __init__(self, backend, interval_s, clock=time.monotonic, sleep=time.sleep):
+        self.backend = backend
+        self.interval_s = max(0.0, interval_s)
+        self.clock = clock
+        self.sleep = sleep
+        self.clicks = 0
+        self._next_deadline = None
+        self._first_click = None
+        self._last_click = None
+
+    def dispatch(self, points, should_continue=None, on_click=None):
+        """
+        Click every (x, y) in points on schedule.
+        `should_continue()` is checked before each click and `on_click(x, y)` called after it.
+        Returns the number of clicks sent.
+        """
+        sent = 0
+        for x, y in points:
+            if should_continue is not None and not should_continue():
+                break
+
+            wait = self.next_wait()
+            if wait > 0:
+                self.sleep(wait)
+
+            self.backend.click(x, y)
+            self.record_click()
+            if on_click is not None:
+                on_click(x, y)
+            sent += 1
+        return sent
+
+    def next_wait(self):
+        """
+        Seconds until the next click is due, for callers that wait on their own (e.g. an event loop).
+        Restarts the schedule from now if it fell behind.
+        """
+        now = self.clock()
+        if self._next_deadline is None or now - self._next_deadline > self.interval_s:
+            self._next_deadline = now
+        return max(0.0, self._next_deadline - now)
+
+    def record_click(self):
+        """Count a click sent at its deadline and move the schedule to the next slot"""
+        clicked_at = self.clock()
+        if self._first_click is None:
+            self._first_click = clicked_at
+        self._last_click = clicked_at
+        if self._next_deadline is None:
+            self._next_deadline = clicked_at
+        self._next_deadline += self.interval_s
+        self.clicks += 1
+
+    def pause(self):
+        """Forget the schedule, e.g. before an unscheduled wait, so the next click restarts it"""
+        self._next_deadline = None
+
+    @property
+    def clicks_per_second(self):
+        """Achieved click rate over the dispatched clicks"""
+        if self.clicks < 2 or self._last_click <= self._first_click:
+            return 0.0
+        return (self.clicks - 1) / (self._last_click - self._first_click)
+
+    def stats(self):
+        """Dispatch statistics: {'clicks', 'elapsed', 'clicks_per_second'}"""
+        elapsed = 0.0 if self._first_click is None else self._last_click - self._first_click
+        return {'clicks': self.clicks, 'elapsed': elapsed, 'clicks_per_second': self.clicks_per_second}
+
+
+def create_input_backend(name='pyautogui'):
+    """Create an input backend by name: 'pyautogui' or 'xtest'"""
+    if name == 'pyautogui':
+        return PyAutoGuiBackend()
+    if name == 'xtest':
+        return XTestBackend()
+    raise ValueError(f"Unknown input backend: {name}")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_input_backend():
+    """Get the active input backend, created from the 'input.backend' config on first use"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_input_backend(get_config().get('input.backend', 'pyautogui'))
+        return _backend
+
+
+def set_input_backend(backend):
+    """Replace the active input backend (e.g. with a RecordingBackend for headless runs)"""
+    global _backend
+    with _backend_lock:
+        if _backend is not None and _backend is not backend:
+            _backend.close()
+        _backend = backend
@@ -1,108 +1,257 @@
+import atexit
+import glob
 import logging
 import os
-from datetime import datetime
+import queue
+import time
+from datetime import datetime, timedelta
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
+from .config import get_config
+
+LOG_FILE_PATTERN = "placebot_{date}.log"
+FILE_BATCH_SIZE = 50  # records buffered before the log file is flushed
+FILE_FLUSH_INTERVAL_S = 1.0  # longest time a record waits in the buffer
+
+
+def log_file_name(when=None):
+    """Daily log file name for the given datetime (today by default)"""
+    return LOG_FILE_PATTERN.format(date=(when or datetime.now()).strftime('%Y%m%d'))
+
+
+def prune_log_files(directory, max_log_files):
+    """Delete the oldest daily log files so at most `max_log_files` remain (0 = keep all)"""
+    if max_log_files <= 0:
+        return []
+    files = sorted(glob.glob(os.path.join(directory or '.', LOG_FILE_PATTERN.format(date='[0-9]' * 8))))
+    removed = []
+    for path in files[:-max_log_files]:
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError:
+            pass
+    return removed
+
+
+class _LazyQueueHandler(QueueHandler):
+    """Queues records as they are, leaving all formatting to the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+class _BatchingFileHandler(logging.FileHandler):
+    """
+    Daily log file written in batches: records are buffered and flushed every
+    FILE_BATCH_SIZE records, after FILE_FLUSH_INTERVAL_S, or at once for warnings and above.
+    At midnight it switches to the next day's file and prunes the old ones.
+    """
+
+    def __init__(self, directory, max_log_files):
+        self.directory = directory
+        self.max_log_files = max_log_files
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._next_rollover = self._midnight_after(time.time())
+        super().__init__(os.path.join(directory, log_file_name()))
+        prune_log_files(directory, max_log_files)
+
+    @staticmethod
+    def _midnight_after(timestamp):
+        day = datetime.fromtimestamp(timestamp).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (day + timedelta(days=1)).timestamp()
+
+    def _roll_over(self, record):
+        self.close()
+        self.baseFilename = os.path.abspath(os.path.join(self.directory, log_file_name(datetime.fromtimestamp(record.created))))
+        self._next_rollover = self._midnight_after(record.created)
+        self.stream = self._open()
+        prune_log_files(self.directory, self.max_log_files)
+
+    def emit(self, record):
+        try:
+            if record.created >= self._next_rollover:
+                self._roll_over(record)
+            self.stream.write(self.format(record) + self.terminator)
+            self._pending += 1
+            if (self._pending >= FILE_BATCH_SIZE or record.levelno >= logging.WARNING
+                    or time.monotonic() - self._last_flush >= FILE_FLUSH_INTERVAL_S):
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        super().flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+
+class _MessageQueueHandler(logging.Handler):
+    """Forwards log lines to the GUI message queue as {'type': 'log', 'message': ...}"""
+
+    def __init__(self, message_queue):
+        super().__init__(logging.INFO)
+        self.message_queue = message_queue
+        self.setFormatter(logging.Formatter('[%(levelname)s] %(message)s'))
+
+    def emit(self, record):
+        try:
+            self.message_queue.put({'type': 'log', 'message': self.format(record)})
+        except Exception:
+            self.handleError(record)
+
+
+class _LogListener(QueueListener):
+    """QueueListener that flushes its handlers whenever the queue goes idle"""
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, timeout=FILE_FLUSH_INTERVAL_S)
+            except queue.Empty:
+                if not block:
+                    raise
+                for handler in self.handlers:
+                    handler.flush()
+
+
 class PlaceBotLogger:
-    """Centralized logging system for Place Bot"""
-    
+    """
+    Centralized logging system for Place Bot.
+    Callers only enqueue records; formatting, console output, batched file writes and GUI
+    lines are handled on a background listener thread, so logging never blocks the click loop.
+    """
+
     def __init__(self, log_file: Optional[str] = None):
+        config = get_config()
         self.logger = logging.getLogger('PlaceBot')
-        self.logger.setLevel(logging.DEBUG)
-        
+        self.logger.propagate = False
+
         # Clear existing handlers
         self.logger.handlers.clear()
-        
+
         # Create formatters
         detailed_formatter = logging.Formatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
         simple_formatter = logging.Formatter('%(levelname)s: %(message)s')
-        
+        console_level = logging.getLevelName(str(config.get('logging.level', 'INFO')).upper())
+        if not isinstance(console_level, int):
+            console_level = logging.INFO
+
+        handlers = []
+
         # Console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(simple_formatter)
-        self.logger.addHandler(console_handler)
-        
-        # File handler
-        if log_file is None:
-            log_file = f"placebot_{datetime.now().strftime('%Y%m%d')}.log"
-        
-        try:
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setLevel(logging.DEBUG)
-            file_handler.setFormatter(detailed_formatter)
-            self.logger.addHandler(file_handler)
-        except Exception as e:
-            self.logger.warning(f"Could not create log file {log_file}: {e}")
-        
-        # GUI callback for displaying messages
-        self.gui_callback = None
-    
-    def set_gui_callback(self, callback):
-        """Set callback function for GUI message display"""
-        self.gui_callback = callback
-    
-    def _log_to_gui(self, level: str, message: str):
-        """Send message to GUI if callback is set"""
-        if self.gui_callback:
-            self.gui_callback(f"[{level}] {message}")
-    
-    def debug(self, message: str):
-        """Log debug message"""
-        self.logger.debug(message)
-    
-    def info(self, message: str):
+        if config.get('logging.log_to_console', True):
+            console_handler = logging.StreamHandler()
+            console_handler.setLevel(console_level)
+            console_handler.setFormatter(simple_formatter)
+            handlers.append(console_handler)
+
+        # File handler (daily files, pruned to 'logging.max_log_files')
+        self.log_file = None
+        file_error = None
+        if config.get('logging.log_to_file', True):
+            try:
+                if log_file is None:
+                    file_handler = _BatchingFileHandler('.', int(config.get('logging.max_log_files', 7)))
+                else:
+                    file_handler = logging.FileHandler(log_file)
+                file_handler.setLevel(logging.DEBUG)
+                file_handler.setFormatter(detailed_formatter)
+                handlers.append(file_handler)
+                self.log_file = file_handler.baseFilename
+            except Exception as e:
+                file_error = f"Could not create log file {log_file or log_file_name()}: {e}"
+
+        # GUI lines go to the message queue once one is set
+        self.gui_handler = None
+
+        self._closed = False
+        self._queue = queue.SimpleQueue()
+        self.logger.addHandler(_LazyQueueHandler(self._queue))
+        self.listener = _LogListener(self._queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        self._set_logger_level()
+        atexit.register(self.close)
+
+        if file_error:
+            self.logger.warning(file_error)
+
+    def _set_logger_level(self):
+        """Drop records no handler wants before they are queued"""
+        levels = [handler.level for handler in self.listener.handlers]
+        self.logger.setLevel(min(levels) if levels else logging.CRITICAL + 1)
+
+    def set_gui_queue(self, message_queue):
+        """Send INFO and above to the GUI as 'log' messages on `message_queue`"""
+        handlers = [handler for handler in self.listener.handlers if handler is not self.gui_handler]
+        self.gui_handler = _MessageQueueHandler(message_queue) if message_queue is not None else None
+        if self.gui_handler:
+            handlers.append(self.gui_handler)
+        self.listener.handlers = tuple(handlers)
+        self._set_logger_level()
+
+    def close(self):
+        """Drain the queue and flush every handler"""
+        if not self._closed:
+            self._closed = True
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+
+    def debug(self, message: str, *args):
+        """Log debug message (args are %-formatted on the listener thread)"""
+        self.logger.debug(message, *args)
+
+    def info(self, message: str, *args):
         """Log info message"""
-        self.logger.info(message)
-        self._log_to_gui("INFO", message)
-    
-    def warning(self, message: str):
+        self.logger.info(message, *args)
+
+    def warning(self, message: str, *args):
         """Log warning message"""
-        self.logger.warning(message)
-        self._log_to_gui("WARNING", message)
-    
-    def error(self, message: str):
+        self.logger.warning(message, *args)
+
+    def error(self, message: str, *args):
         """Log error message"""
-        self.logger.error(message)
-        self._log_to_gui("ERROR", message)
-    
-    def critical(self, message: str):
+        self.logger.error(message, *args)
+
+    def critical(self, message: str, *args):
         """Log critical message"""
-        self.logger.critical(message)
-        self._log_to_gui("CRITICAL", message)
-    
+        self.logger.critical(message, *args)
+
     def analysis_start(self):
         """Log analysis start"""
         self.info("Starting canvas and palette analysis...")
-    
+
     def analysis_complete(self, pixel_count: int, colors_found: int):
         """Log analysis completion"""
-        self.info(f"Analysis completed successfully. Found {pixel_count} pixels and {colors_found} colors.")
-    
+        self.info("Analysis completed successfully. Found %d pixels and %d colors.", pixel_count, colors_found)
+
     def analysis_error(self, error: str):
         """Log analysis error"""
-        self.error(f"Analysis failed: {error}")
-    
+        self.error("Analysis failed: %s", error)
+
     def bot_start(self, pixel_limit: int):
         """Log bot start"""
-        self.info(f"Starting bot with pixel limit: {pixel_limit}")
-    
+        self.info("Starting bot with pixel limit: %d", pixel_limit)
+
     def bot_progress(self, painted: int, total: int, color: str):
         """Log bot progress"""
-        self.debug(f"Painting progress: {painted}/{total} pixels with {color}")
-    
+        self.debug("Painting progress: %d/%d pixels with %s", painted, total, color)
+
     def bot_complete(self, total_painted: int, limit_reached: bool):
         """Log bot completion"""
         if limit_reached:
-            self.info(f"Bot stopped - pixel limit reached! Total pixels painted: {total_painted}")
+            self.info("Bot stopped - pixel limit reached! Total pixels painted: %d", total_painted)
         else:
-            self.info(f"Painting completed successfully! Total pixels painted: {total_painted}")
-    
+            self.info("Painting completed successfully! Total pixels painted: %d", total_painted)
+
     def bot_error(self, error: str):
         """Log bot error"""
-        self.error(f"Bot error: {error}")
+        self.error("Bot error: %s", error)
 
 # Global logger instance
 _logger_instance = None
@@ -112,4 +261,4 @@ def get_logger() -> PlaceBotLogger:
     global _logger_instance
     if _logger_instance is None:
         _logger_instance = PlaceBotLogger()
-    return _logger_instance
\ No newline at end of file
+    return _logger_instance
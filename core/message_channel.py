@@ -0,0 +1,93 @@
+import collections
+import queue
+import threading
+import time
+
+from .metrics import get_metrics
+
+# Message types where only the latest value matters
+COALESCED_TYPES = ('progress',)
+# Message types that may be dropped when the channel is full
+DROPPABLE_TYPES = ('log',)
+
+
+class MessageChannel:
+    """
+    Worker -> GUI channel with the put/get_nowait/empty interface of queue.Queue.
+
+    Coalesced types ('progress') live in a latest-value slot per type, so a fast
+    producer overwrites instead of appending. All other messages keep their order.
+    A pending slot value is moved into the ordered queue ahead of the next non-log
+    event, so a consumer never sees progress that is older than a completion.
+    Once `maxsize` messages are waiting, droppable types ('log') are discarded.
+    Completion, error and pause events are never dropped.
+    """
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self.metrics = get_metrics()
+        self._lock = threading.Lock()
+        self._events = collections.deque()
+        self._latest = {}
+        self._stats = {'put': 0, 'delivered': 0, 'coalesced': 0, 'dropped': 0, 'max_depth': 0, 'max_latency_ms': 0.0}
+
+    def put(self, message, block=True, timeout=None):
+        """Queue a message; never blocks (the arguments exist for queue.Queue compatibility)"""
+        now = time.perf_counter()
+        kind = message.get('type')
+        with self._lock:
+            self._stats['put'] += 1
+            if kind in COALESCED_TYPES:
+                if kind in self._latest:
+                    self._stats['coalesced'] += 1
+                    self.metrics.count('gui.coalesced')
+                self._latest[kind] = (now, message)
+                return
+            if kind in DROPPABLE_TYPES and len(self._events) >= self.maxsize:
+                self._stats['dropped'] += 1
+                self.metrics.count('gui.dropped')
+                return
+            if kind not in DROPPABLE_TYPES:
+                self._flush_latest()
+            self._events.append((now, message))
+            depth = len(self._events)
+            if depth > self._stats['max_depth']:
+                self._stats['max_depth'] = depth
+
+    put_nowait = put
+
+    def _flush_latest(self):
+        for kind in COALESCED_TYPES:
+            entry = self._latest.pop(kind, None)
+            if entry is not None:
+                self._events.append(entry)
+
+    def get_nowait(self):
+        """Next message, raising queue.Empty when there is none"""
+        with self._lock:
+            if self._events:
+                queued_at, message = self._events.popleft()
+            else:
+                self._flush_latest()
+                if not self._events:
+                    raise queue.Empty
+                queued_at, message = self._events.popleft()
+            latency_ms = (time.perf_counter() - queued_at) * 1000.0
+            self._stats['delivered'] += 1
+            if latency_ms > self._stats['max_latency_ms']:
+                self._stats['max_latency_ms'] = latency_ms
+        self.metrics.observe('gui.queue_latency', latency_ms)
+        return message
+
+    def empty(self):
+        with self._lock:
+            return not self._events and not self._latest
+
+    def qsize(self):
+        with self._lock:
+            return len(self._events) + len(self._latest)
+
+    def stats(self):
+        """Backpressure counters: {'put', 'delivered', 'coalesced', 'dropped', 'depth', 'max_depth', 'max_latency_ms'}"""
+        with self._lock:
+            return dict(self._stats, depth=len(self._events) + len(self._latest))
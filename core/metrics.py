@@ -0,0 +1,196 @@
+import functools
+import json
+import threading
+import time
+
+from .config import get_config
+
+# Upper bounds (milliseconds) of the histogram buckets; larger values go in an overflow bucket
+HISTOGRAM_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """Fixed-bucket histogram of millisecond values, with exact count, sum, min and max"""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def observe(self, value_ms):
+        self.count += 1
+        self.total += value_ms
+        if value_ms < self.min:
+            self.min = value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+        index = 0
+        for bound in HISTOGRAM_BOUNDS_MS:
+            if value_ms <= bound:
+                break
+            index += 1
+        self.buckets[index] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of values (capped at the max seen)"""
+        if self.count == 0:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BOUNDS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        if self.count == 0:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'total_ms': self.total,
+            'mean_ms': self.total / self.count,
+            'min_ms': self.min,
+            'max_ms': self.max,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'buckets': dict(zip([f"<={b}" for b in HISTOGRAM_BOUNDS_MS] + ['inf'], self.buckets))
+        }
+
+
+class _Timer:
+    """Context manager that records its elapsed time in a histogram"""
+
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, (time.perf_counter() - self.start) * 1000.0)
+        return False
+
+
+class _NullTimer:
+    """Shared do-nothing timer handed out while metrics are disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+    Process-wide stage timers, counters and histograms.
+    While disabled, every recording call returns after one attribute check, so
+    instrumentation can stay in hot paths.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._started = time.monotonic()
+
+    def count(self, name, value=1):
+        """Add `value` to a counter"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name, value_ms):
+        """Record a value (milliseconds) in a histogram"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(value_ms)
+
+    def timer(self, name):
+        """Context manager timing its block into the `name` histogram"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def timed(self, name):
+        """Decorator timing every call of the function into the `name` histogram"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, (time.perf_counter() - start) * 1000.0)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        """Drop everything recorded so far"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._started = time.monotonic()
+
+    def snapshot(self):
+        """Everything recorded so far: {'enabled', 'uptime_s', 'counters', 'timers'}"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'uptime_s': time.monotonic() - self._started,
+                'counters': dict(self._counters),
+                'timers': {name: histogram.snapshot() for name, histogram in sorted(self._histograms.items())}
+            }
+
+    def dump(self, path=None):
+        """Write the snapshot as JSON to `path` ('metrics.dump_file' by default), returns the path"""
+        path = path or get_config().get('metrics.dump_file', 'metrics.json')
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        return path
+
+
+def summarize(snapshot, names):
+    """One-line summary of the mean time of the given timers, e.g. for a status bar"""
+    parts = []
+    for name in names:
+        timer = snapshot['timers'].get(name)
+        if timer and timer['count']:
+            parts.append(f"{name} {timer['mean_ms']:.1f} ms")
+    return " | ".join(parts)
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Get the global metrics registry, enabled from the 'metrics.enabled' config"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics(enabled=bool(get_config().get('metrics.enabled', False)))
+    return _metrics
@@ -0,0 +1,450 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .click_path import ClickCostModel, schedule_clicks
+from .config import get_config
+from .input_backend import ClickDispatcher, get_input_backend
+from .logger import get_logger
+from .metrics import get_metrics
+from .verification import verify_placements
+
+# Pointer distance (pixels) from the last bot click that counts as the user taking the mouse
+MOUSE_MOVE_THRESHOLD = 10
+# How often the cancellation watcher polls the pointer and the external stop condition
+CANCEL_POLL_INTERVAL_S = 0.05
+# Minimum time between progress events; updates in between are coalesced into the next one
+PROGRESS_INTERVAL_S = 0.1
+# Wait after a palette click for the selection to register
+COLOR_SELECT_DELAY_S = 0.2
+
+
+class PaintEngine:
+    """
+    Event-driven painting on one asyncio loop, with separate tasks for:
+    - click dispatch: clicks go out on the ClickDispatcher's monotonic schedule, awaiting
+      the next slot instead of sleeping the thread
+    - verification: each clicked batch settles and is re-sampled on a capture thread
+      while the next batch is being clicked
+    - cancellation: the pointer and `should_stop()` are polled while no click is due
+      (the pointer is also checked right before every click)
+    - progress: updates are coalesced into at most one event per PROGRESS_INTERVAL_S
+
+    Events are the bot message dicts ('progress', 'bot_paused', 'bot_resumed',
+    'bot_complete', 'bot_error') passed to `on_event`. pause(), resume() and stop()
+    may be called from any thread.
+    """
+
+    def __init__(self, data_manager, on_event, input_backend=None, should_stop=None):
+        self.data_manager = data_manager
+        self.on_event = on_event
+        self.input = input_backend
+        self.should_stop = should_stop
+        self.logger = get_logger()
+        self.metrics = get_metrics()
+
+        self.stop_requested = False
+        self.paused = False
+        self.mouse_moved = False
+        self.out_of_charges = False
+        self.last_bot_mouse_pos = None
+        self.click_count = 0
+        self.failed_pixels = 0
+        self.total_painted = 0
+        self.dispatcher = None
+
+        self._loop = None
+        self._resumed = None
+        self._progress_changed = None
+        self._progress = (0, 1, '')
+        self._selected_rgb = None
+        self._verify_executor = None
+        self._stop_on_rejected_batch = False
+
+    # Control API (thread-safe)
+
+    def pause(self):
+        """Hold clicking after the current click; outstanding verifications still finish"""
+        if not self.paused:
+            self.paused = True
+            self._call_in_loop(self._on_pause_changed)
+
+    def resume(self):
+        """Continue a paused run: the current color is selected again and the schedule restarts"""
+        if self.paused:
+            self.paused = False
+            self._call_in_loop(self._on_pause_changed)
+
+    def stop(self):
+        """End the run after the current click"""
+        self.stop_requested = True
+        self._call_in_loop(self._sync_resumed)
+
+    def _call_in_loop(self, callback):
+        """Run `callback` on the engine loop (before run() starts, the flags are read at startup)"""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            # Called from an engine task: apply now, so the caller already sees the new state
+            callback()
+            return
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            pass  # loop already closed, the run is over
+
+    def _sync_resumed(self):
+        """Make the resume event match the pause flag (a stop also releases a paused run)"""
+        if self._resumed is None:
+            return
+        if self.paused and not self.stop_requested:
+            self._resumed.clear()
+        else:
+            self._resumed.set()
+
+    def _on_pause_changed(self):
+        self._sync_resumed()
+        if self.paused:
+            self.logger.info("Bot paused")
+            self._emit({'type': 'bot_paused', 'reason': 'mouse' if self.mouse_moved else 'user'})
+        else:
+            self.logger.info("Bot resumed")
+            self._emit({'type': 'bot_resumed'})
+
+    def _emit(self, message):
+        if self.on_event is not None:
+            self.on_event(message)
+
+    # Run
+
+    async def run(self, enabled_colors, settings):
+        """
+        Paint until the schedule is done, the pixel limit is reached or the run is stopped.
+        Emits and returns the 'bot_complete' message ('bot_error' and None on failure).
+        """
+        self._resumed = asyncio.Event()
+        self._progress_changed = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._sync_resumed()
+
+        if self.input is None:
+            self.input = get_input_backend()
+        self.last_bot_mouse_pos = self.input.position()
+        self.mouse_moved = False
+        self.out_of_charges = False
+        self.click_count = 0
+        self.failed_pixels = 0
+        self.total_painted = 0
+        self._selected_rgb = None
+        self._verify_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='verify')
+
+        watcher = asyncio.create_task(self._watch_cancellation())
+        reporter = asyncio.create_task(self._report_progress())
+        try:
+            result = await self._paint(enabled_colors, settings)
+        except Exception as e:
+            self._emit({'type': 'bot_error', 'error': str(e)})
+            return None
+        finally:
+            for task in (watcher, reporter):
+                task.cancel()
+            await asyncio.gather(watcher, reporter, return_exceptions=True)
+            self._verify_executor.shutdown(wait=True)
+            self._loop = None
+
+        if self._progress_changed.is_set():
+            self._send_progress()
+        self._emit(result)
+        return result
+
+    async def _paint(self, enabled_colors, settings):
+        pixel_limit = settings['pixel_limit']
+        tolerance = settings['tolerance']
+        delay = settings['delay']
+        verify = settings.get('verify', False)
+        # A verified batch with no placement at all means the account ran out of charges
+        self._stop_on_rejected_batch = verify and settings.get('stop_on_rejected_batch', False)
+        self.dispatcher = ClickDispatcher(self.input, delay / 1000.0)
+        self._progress = (0, pixel_limit, '')
+
+        self.logger.bot_start(pixel_limit)
+
+        # One pass over the pixel map groups every pending pixel by color
+        plan = self.data_manager.get_paint_plan(tolerance)
+
+        # Order clicks and colors to minimize time per placed pixel
+        schedule = schedule_clicks(
+            plan, enabled_colors, self.data_manager.color_position_map,
+            self.data_manager.canvas_region, pixel_limit,
+            strategy=get_config().get('bot.click_order', 'optimized'),
+            row_height=self.data_manager.pixel_size or 1,
+            start=self.last_bot_mouse_pos,
+            cost_model=ClickCostModel.for_delay(delay)
+        )
+
+        for color, positions in schedule:
+            if self._halted() or self.total_painted >= pixel_limit:
+                break
+
+            if verify:
+                # Unscheduled cells of the same color back-fill placements that fail verification
+                scheduled = set(positions)
+                backfill = [pos for pos in plan.positions_for(color["rgb"]) if pos not in scheduled]
+                await self._paint_color_verified(color, positions + backfill, pixel_limit, tolerance)
+            else:
+                await self._paint_color(color, positions, pixel_limit)
+
+        if verify:
+            # Verification rewrote pixel map entries, the cached plan is stale
+            self.data_manager.invalidate_paint_plan()
+            self.logger.info(f"Verified {self.total_painted} placements from {self.click_count} clicks "
+                             f"({self.failed_pixels} pixels gave up after retries)")
+
+        click_stats = self.dispatcher.stats()
+        self.logger.info(f"Sent {click_stats['clicks']} clicks at {click_stats['clicks_per_second']:.1f} clicks/s")
+
+        return {
+            'type': 'bot_complete',
+            'total_painted': self.total_painted,
+            'limit_reached': self.total_painted >= pixel_limit,
+            'cancelled_by_mouse': self.mouse_moved,
+            'verified': verify,
+            'total_clicks': self.click_count,
+            'failed_pixels': self.failed_pixels,
+            'out_of_charges': self.out_of_charges,
+            'clicks_per_second': click_stats['clicks_per_second']
+        }
+
+    # Click dispatch
+
+    def _halted(self):
+        return self.stop_requested or self.out_of_charges or (self.mouse_moved and not self.paused)
+
+    def _check_mouse_movement(self):
+        """
+        Check if the pointer left the last bot click (the user took the mouse).
+        Cancels the run, or pauses it with 'bot.mouse_move_action' = 'pause'.
+        """
+        if self.last_bot_mouse_pos is None or self.paused:
+            return False
+
+        current_x, current_y = self.input.position()
+        last_x, last_y = self.last_bot_mouse_pos
+        moved = abs(current_x - last_x) > MOUSE_MOVE_THRESHOLD or abs(current_y - last_y) > MOUSE_MOVE_THRESHOLD
+        if not moved:
+            return False
+
+        self.mouse_moved = True
+        if get_config().get('bot.mouse_move_action', 'cancel') == 'pause':
+            self.logger.info("User mouse movement detected - pausing bot")
+            self.pause()
+        else:
+            self.logger.info("User mouse movement detected - cancelling bot")
+        return True
+
+    def _bot_click(self, x, y):
+        """Bot click that records where the pointer was left"""
+        with self.metrics.timer('bot.click'):
+            self.input.click(x, y)
+        self.last_bot_mouse_pos = (x, y)
+
+    async def _select_color(self, target_rgb):
+        """Click a color in the palette and wait for the selection to register"""
+        px, py = self.data_manager.color_position_map[target_rgb]
+        self._bot_click(px, py)
+        self.metrics.count('bot.palette_switches')
+        self._selected_rgb = target_rgb
+        await asyncio.sleep(COLOR_SELECT_DELAY_S)
+        self.dispatcher.pause()
+
+    async def _ready_to_click(self):
+        """
+        Wait for the next click slot, and while paused. Returns False if the run has to end.
+        The pointer is checked right before the click, so the click cannot undo a user move.
+        """
+        await self._wait_for_slot()
+        while not (self.stop_requested or self.out_of_charges):
+            if not self.paused:
+                if not self._check_mouse_movement():
+                    return True
+                if not self.paused:
+                    return False  # cancelled by mouse movement
+
+            await self._resumed.wait()
+            if self.stop_requested:
+                break
+            # The user had the mouse: reset the pointer baseline and select the color again
+            self.mouse_moved = False
+            self.last_bot_mouse_pos = self.input.position()
+            if self._selected_rgb is not None:
+                await self._select_color(self._selected_rgb)
+            await self._wait_for_slot()
+        return False
+
+    async def _wait_for_slot(self):
+        """Sleep until the dispatcher's next click slot, recording how late the wakeup was"""
+        wait = self.dispatcher.next_wait()
+        if not self.metrics.enabled or wait <= 0:
+            await asyncio.sleep(wait)
+            return
+        start = time.perf_counter()
+        await asyncio.sleep(wait)
+        self.metrics.observe('bot.sleep_overshoot', max(0.0, (time.perf_counter() - start - wait) * 1000.0))
+
+    async def _click_cells(self, positions):
+        """Click canvas-relative positions on the dispatcher schedule, returns the number clicked"""
+        left, top = self.data_manager.canvas_region[:2]
+        sent = 0
+        for x, y in positions:
+            # Awaited even with no delay, so the watcher and verifications get to run
+            if not await self._ready_to_click():
+                break
+            self._bot_click(x + left, y + top)
+            self.dispatcher.record_click()
+            self.click_count += 1
+            sent += 1
+        self.metrics.count('bot.clicks', sent)
+        return sent
+
+    async def _paint_color(self, color, positions, pixel_limit):
+        """Paint a specific color at the scheduled positions"""
+        target_rgb = tuple(color["rgb"])
+        if target_rgb not in self.data_manager.color_position_map or not positions:
+            return
+
+        # Limit positions to not exceed pixel limit
+        positions = positions[:pixel_limit - self.total_painted]
+        self.logger.debug(f"Painting {len(positions)} pixels with {color['name']} "
+                          f"(Total: {self.total_painted + len(positions)}/{pixel_limit})")
+
+        await self._select_color(target_rgb)
+        for position in positions:
+            if not await self._click_cells([position]):
+                break
+            self.total_painted += 1
+            self._set_progress(pixel_limit, color['name'])
+
+    async def _paint_color_verified(self, color, positions, pixel_limit, tolerance):
+        """
+        Paint a specific color in batches; each batch is verified by its own task while
+        clicking continues. Only confirmed placements count towards the limit, and clicks
+        awaiting verification are reserved against it. Cells that did not take are retried
+        within the same color run (no extra palette click) up to 'bot.verify_retries' times.
+        """
+        target_rgb = tuple(color["rgb"])
+        if target_rgb not in self.data_manager.color_position_map or not positions:
+            return
+
+        config = get_config()
+        batch_size = max(1, config.get('bot.verify_batch_size', 20))
+        max_retries = config.get('bot.verify_retries', 2)
+        settle_delay = config.get('bot.verify_settle_ms', 250) / 1000.0
+
+        pending = deque(positions)
+        attempts = {}
+        verifications = set()
+        in_flight = 0
+
+        self.logger.debug(f"Painting up to {len(positions)} pixels with {color['name']} (verified)")
+        await self._select_color(target_rgb)
+
+        while True:
+            # Finished verifications go first: they free budget, requeue cells or end the run
+            done = {task for task in verifications if task.done()}
+            budget = pixel_limit - self.total_painted - in_flight
+            can_click = pending and budget > 0 and not self._halted()
+            if not done and not can_click:
+                if not verifications:
+                    break
+                done, _ = await asyncio.wait(verifications, return_when=asyncio.FIRST_COMPLETED)
+
+            if done:
+                verifications -= done
+                for task in done:
+                    placed, failed = task.result()
+                    self.metrics.count('bot.placed', len(placed))
+                    self.metrics.count('bot.rejected', len(failed))
+                    in_flight -= len(placed) + len(failed)
+                    self.total_painted += len(placed)
+                    if failed and not placed and self._stop_on_rejected_batch and not self.out_of_charges:
+                        self.out_of_charges = True
+                        self.logger.info("No placement in a verified batch - out of charges, ending the burst")
+                    for pos in failed:
+                        if attempts[pos] <= max_retries:
+                            pending.append(pos)
+                        else:
+                            self.failed_pixels += 1
+                            self.logger.warning(f"Pixel at {pos} did not take {color['name']} after {attempts[pos]} attempts")
+                self._set_progress(pixel_limit, color['name'])
+                continue
+
+            count = min(batch_size, budget, len(pending))
+            batch = [pending.popleft() for _ in range(count)]
+            sent = await self._click_cells(batch)
+
+            # Anything not sent is dropped: the run was stopped or the user moved the mouse
+            batch = batch[:sent]
+            for pos in batch:
+                attempts[pos] = attempts.get(pos, 0) + 1
+            if batch:
+                in_flight += len(batch)
+                verifications.add(asyncio.create_task(
+                    self._verify_batch(batch, target_rgb[::-1], tolerance, settle_delay)
+                ))
+
+    # Verification
+
+    async def _verify_batch(self, batch, target_bgr, tolerance, settle_delay):
+        """Let the clicks land, then re-sample the batch on the capture thread"""
+        await asyncio.sleep(settle_delay)
+        data_manager = self.data_manager
+        with self.metrics.timer('bot.verify'):
+            return await asyncio.get_running_loop().run_in_executor(
+                self._verify_executor, verify_placements,
+                batch, target_bgr, data_manager.pixel_map, data_manager.canvas_region,
+                data_manager.pixel_size, tolerance, data_manager.get_color_matcher()
+            )
+
+    # Cancellation
+
+    async def _watch_cancellation(self):
+        """Poll the external stop condition, and the pointer between clicks"""
+        while not self.stop_requested:
+            await asyncio.sleep(CANCEL_POLL_INTERVAL_S)
+            if self.should_stop is not None and self.should_stop():
+                self.logger.info("Stop requested - stopping bot")
+                self.stop()
+            elif not self._halted():
+                self._check_mouse_movement()
+
+    # Progress
+
+    def _set_progress(self, pixel_limit, color_name):
+        """Record the latest progress; the reporter task sends it"""
+        self._progress = (self.total_painted, pixel_limit, color_name)
+        self._progress_changed.set()
+
+    async def _report_progress(self):
+        """Send at most one progress event per PROGRESS_INTERVAL_S, with the latest numbers"""
+        while True:
+            await self._progress_changed.wait()
+            self._send_progress()
+            await asyncio.sleep(PROGRESS_INTERVAL_S)
+
+    def _send_progress(self):
+        """Log and emit the latest progress update"""
+        self._progress_changed.clear()
+        painted, pixel_limit, color_name = self._progress
+        progress = (painted / pixel_limit) * 100
+        self.logger.bot_progress(painted, pixel_limit, color_name)
+        self._emit({
+            'type': 'progress',
+            'progress': min(progress, 100),
+            'status': f"Painting {color_name} ({painted}/{pixel_limit} pixels)"
+        })
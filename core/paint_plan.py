@@ -0,0 +1,102 @@
+import numpy as np
+from .pixel_mapping import pixel_map_arrays
+
+
+class PaintPlan:
+    """Pending pixels grouped by target palette color, built in a single pass over the pixel map"""
+
+    def __init__(self, buckets, tolerance, matcher=None):
+        # {rgb tuple: [(x, y), ...]} in palette order, positions in pixel map order
+        self.buckets = buckets
+        self.tolerance = tolerance
+        self.matcher = matcher
+
+    @classmethod
+    def build(cls, pixel_map, color_palette, tolerance=5, pixel_arrays=None, matcher=None):
+        """
+        Snaps every preview color to its nearest palette entry and keeps the cells
+        whose pixel is not yet that color.
+        A preview only counts when the nearest entry is within `tolerance` on every channel,
+        or within `tolerance` CIEDE2000 with a ColorMatcher built for `color_palette`.
+        """
+        if pixel_arrays is None:
+            pixel_arrays = pixel_map_arrays(pixel_map)
+        positions, preview_colors, pixel_colors = pixel_arrays
+
+        palette_rgb = [tuple(color["rgb"]) for color in color_palette]
+        if not palette_rgb or len(positions) == 0:
+            return cls({}, tolerance, matcher)
+
+        palette_bgr = np.array([rgb[::-1] for rgb in palette_rgb], dtype=np.int16)
+        has_target, pixel_correct, targets = _classify(preview_colors, pixel_colors, palette_bgr, tolerance, matcher)
+        pending = np.flatnonzero(has_target & ~pixel_correct)
+
+        # Stable sort keeps pixel map order inside each color bucket
+        pending = pending[np.argsort(targets[pending], kind="stable")]
+        pending_targets = targets[pending]
+        split_points = np.flatnonzero(np.diff(pending_targets)) + 1
+
+        buckets = {}
+        for indices in np.split(pending, split_points):
+            if len(indices) == 0:
+                continue
+            rgb = palette_rgb[targets[indices[0]]]
+            buckets[rgb] = [tuple(pos) for pos in positions[indices].tolist()]
+
+        return cls(buckets, tolerance, matcher)
+
+    def positions_for(self, rgb):
+        """Get pending positions for a palette color"""
+        return self.buckets.get(tuple(rgb), [])
+
+    def counts(self):
+        """Get pending pixel count per palette color"""
+        return {rgb: len(positions) for rgb, positions in self.buckets.items()}
+
+    def total_pending(self, colors=None):
+        """Total pending pixels, optionally restricted to the given palette colors"""
+        if colors is None:
+            return sum(len(positions) for positions in self.buckets.values())
+        return sum(len(self.positions_for(color["rgb"])) for color in colors)
+
+
+def _classify(preview_colors, pixel_colors, palette_bgr, tolerance, matcher):
+    """(has_target, pixel_correct, targets) for every cell"""
+    if matcher is not None:
+        targets = matcher.snap(preview_colors, tolerance)
+        pixel_index, pixel_delta_e = matcher.classify(pixel_colors)
+        has_target = targets >= 0
+        return has_target, (pixel_index == targets) & (pixel_delta_e <= tolerance), targets
+
+    targets = snap_to_palette(preview_colors, palette_bgr, tolerance)
+    has_target = targets >= 0
+    target_bgr = palette_bgr[np.maximum(targets, 0)]
+    pixel_correct = np.all(np.abs(pixel_colors.astype(np.int16) - target_bgr) <= tolerance, axis=1)
+    return has_target, pixel_correct, targets
+
+
+def snap_to_palette(colors_bgr, palette_bgr, tolerance):
+    """
+    Returns the index of the nearest palette color for every row of `colors_bgr` among
+    the colors within `tolerance` on every channel, or -1 where no palette color is.
+    Distances are computed once per unique color (a lookup table), not once per cell.
+    """
+    packed = (
+        colors_bgr[:, 0].astype(np.uint32) << 16
+        | colors_bgr[:, 1].astype(np.uint32) << 8
+        | colors_bgr[:, 2].astype(np.uint32)
+    )
+    unique_packed, inverse = np.unique(packed, return_inverse=True)
+    unique_bgr = np.stack(
+        [(unique_packed >> 16) & 0xFF, (unique_packed >> 8) & 0xFF, unique_packed & 0xFF], axis=1
+    ).astype(np.int32)
+
+    palette = np.asarray(palette_bgr, dtype=np.int32)
+    diff = unique_bgr[:, None, :] - palette[None, :, :]
+    # Rule out colors outside the tolerance before picking the nearest, so a closer
+    # color that fails the per-channel check cannot hide one that passes it
+    candidate = np.all(np.abs(diff) <= tolerance, axis=2)
+    distance = np.where(candidate, (diff * diff).sum(axis=2), np.iinfo(np.int32).max)
+    nearest = np.argmin(distance, axis=1)
+    lookup = np.where(candidate.any(axis=1), nearest, -1)
+    return lookup[inverse.reshape(-1)]
@@ -0,0 +1,200 @@
+import numpy as np
+
+
+class PixelMap:
+    """
+    Preview positions with their preview and pixel colors, stored in contiguous arrays:
+    - positions: (N, 2) int16 preview (x, y) coordinates in the canvas image
+    - preview_colors / pixel_colors: (N, 3) uint8 BGR
+    - grid: (N, 2) int16 (column, row) of each entry on the canvas grid
+    Rows keep insertion order. Reads like the old {(x, y): {'preview_color', 'pixel_color'}} dict.
+    """
+
+    def __init__(self, positions, preview_colors, pixel_colors, pixel_size):
+        self.positions = np.ascontiguousarray(positions, dtype=np.int16).reshape(-1, 2)
+        self.preview_colors = np.ascontiguousarray(preview_colors, dtype=np.uint8).reshape(-1, 3)
+        self.pixel_colors = np.ascontiguousarray(pixel_colors, dtype=np.uint8).reshape(-1, 3)
+        self.pixel_size = pixel_size
+        # Per axis: sorted distinct coordinates and their grid indices
+        self._axes = [_axis_indices(self.positions[:, axis], pixel_size) for axis in (0, 1)]
+        self.grid = np.stack([
+            indices[np.searchsorted(unique, self.positions[:, axis])]
+            for axis, (unique, indices) in enumerate(self._axes)
+        ], axis=1).astype(np.int16)
+        self._cell_index = None
+
+    @classmethod
+    def from_samples(cls, img, pixel_size, preview_positions):
+        """
+        Samples the preview color at each position and the pixel color at
+        (x - pixel_size // 2 + 2, y - pixel_size // 2 + 2); positions whose samples
+        fall outside the image are skipped and duplicates keep their first occurrence.
+        """
+        positions = np.asarray(preview_positions, dtype=np.int64).reshape(-1, 2)
+        height, width = img.shape[:2]
+        pixel_x = positions[:, 0] - pixel_size // 2
+        pixel_y = positions[:, 1] - pixel_size // 2
+        inside = (
+            (pixel_y + 2 < height) & (pixel_x + 2 < width)
+            & (pixel_y >= 0) & (pixel_x >= 0)
+            & (positions[:, 1] >= 0) & (positions[:, 0] >= 0)
+            & (positions[:, 1] < height) & (positions[:, 0] < width)
+        )
+        keep = np.flatnonzero(inside)
+        if len(keep):
+            packed = positions[keep, 0] * (1 << 20) + positions[keep, 1]
+            _, first = np.unique(packed, return_index=True)
+            keep = keep[np.sort(first)]
+
+        xs, ys = positions[keep, 0], positions[keep, 1]
+        return cls(positions[keep], img[ys, xs], img[pixel_y[keep] + 2, pixel_x[keep] + 2], pixel_size)
+
+    @classmethod
+    def from_dict(cls, pixel_map, pixel_size):
+        """Convert a {(x, y): {'preview_color', 'pixel_color'}} dictionary"""
+        values = list(pixel_map.values())
+        return cls(
+            list(pixel_map.keys()),
+            [v["preview_color"] for v in values],
+            [v["pixel_color"] for v in values],
+            pixel_size
+        )
+
+    @classmethod
+    def empty(cls, pixel_size):
+        """A map without entries"""
+        return cls(np.zeros((0, 2)), np.zeros((0, 3)), np.zeros((0, 3)), pixel_size)
+
+    def arrays(self):
+        """(positions int32, preview_colors, pixel_colors), the layout of pixel_map_arrays"""
+        return self.positions.astype(np.int32), self.preview_colors, self.pixel_colors
+
+    def take(self, indices):
+        """New map with the given rows, in the given order"""
+        return PixelMap(self.positions[indices], self.preview_colors[indices],
+                        self.pixel_colors[indices], self.pixel_size)
+
+    def concatenate(self, other):
+        """New map with the rows of `other` appended"""
+        return PixelMap(
+            np.concatenate([self.positions, other.positions]),
+            np.concatenate([self.preview_colors, other.preview_colors]),
+            np.concatenate([self.pixel_colors, other.pixel_colors]),
+            self.pixel_size
+        )
+
+    # Lookups
+
+    def index_at(self, column, row):
+        """Row index of the entry at a grid coordinate, or -1"""
+        cells = self._cells()
+        if 0 <= row < cells.shape[0] and 0 <= column < cells.shape[1]:
+            return int(cells[row, column])
+        return -1
+
+    def index_of(self, position):
+        """Row index of the entry at a preview (x, y) position, or -1"""
+        return int(self.indices_of([position])[0])
+
+    def indices_of(self, positions):
+        """Row indices for a sequence of preview (x, y) positions, -1 where missing"""
+        query = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+        result = np.full(len(query), -1, dtype=np.int64)
+        if len(self.positions) == 0 or len(query) == 0:
+            return result
+
+        # Coordinate -> grid index through the sorted distinct coordinates of each axis
+        found = np.ones(len(query), dtype=bool)
+        grid = np.zeros_like(query)
+        for axis, (unique, indices) in enumerate(self._axes):
+            slot = np.minimum(np.searchsorted(unique, query[:, axis]), len(unique) - 1)
+            found &= unique[slot] == query[:, axis]
+            grid[:, axis] = indices[slot]
+
+        cells = self._cells()
+        candidates = np.where(found, cells[grid[:, 1], grid[:, 0]], -1)
+        hit = candidates >= 0
+        hit[hit] = np.all(self.positions[candidates[hit]] == query[hit], axis=1)
+        result[hit] = candidates[hit]
+
+        # Two previews in one grid cell (contour jitter): fall back to a scan for the rest
+        for i in np.flatnonzero(found & ~hit):
+            matches = np.flatnonzero(np.all(self.positions == query[i], axis=1))
+            if len(matches):
+                result[i] = matches[0]
+        return result
+
+    def _cells(self):
+        """Dense (rows, columns) grid of row indices, -1 for empty cells; first entry wins"""
+        if self._cell_index is None:
+            if len(self.grid) == 0:
+                self._cell_index = np.full((0, 0), -1, dtype=np.int32)
+            else:
+                columns, rows = self.grid[:, 0], self.grid[:, 1]
+                unset = np.iinfo(np.int32).max
+                cells = np.full((int(rows.max()) + 1, int(columns.max()) + 1), unset, dtype=np.int32)
+                np.minimum.at(cells, (rows, columns), np.arange(len(self.grid), dtype=np.int32))
+                cells[cells == unset] = -1
+                self._cell_index = cells
+        return self._cell_index
+
+    # Updates
+
+    def update_pixel_colors(self, positions, colors):
+        """Overwrite the pixel colors of the given positions (unknown positions are ignored)"""
+        indices = self.indices_of(positions)
+        known = indices >= 0
+        self.pixel_colors[indices[known]] = np.asarray(colors, dtype=np.uint8).reshape(-1, 3)[known]
+
+    @property
+    def nbytes(self):
+        """Memory held by the entry arrays"""
+        return self.positions.nbytes + self.preview_colors.nbytes + self.pixel_colors.nbytes + self.grid.nbytes
+
+    # Read-only dictionary view
+
+    def _entry(self, index):
+        return {
+            "preview_color": tuple(self.preview_colors[index].tolist()),
+            "pixel_color": tuple(self.pixel_colors[index].tolist()),
+        }
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, position):
+        return self.index_of(position) >= 0
+
+    def __getitem__(self, position):
+        index = self.index_of(position)
+        if index < 0:
+            raise KeyError(position)
+        return self._entry(index)
+
+    def get(self, position, default=None):
+        index = self.index_of(position)
+        return default if index < 0 else self._entry(index)
+
+    def keys(self):
+        return [tuple(position) for position in self.positions.tolist()]
+
+    def values(self):
+        return [self._entry(i) for i in range(len(self))]
+
+    def items(self):
+        return list(zip(self.keys(), self.values()))
+
+
+def _axis_indices(coords, pitch):
+    """
+    Grid indices along one axis, as (sorted distinct coordinates, their indices).
+    Neighbouring coordinates are stepped by round(gap / pitch), so contour jitter
+    and an off-by-one pitch estimate do not accumulate across the canvas.
+    """
+    unique = np.unique(np.asarray(coords, dtype=np.int64))
+    gaps = np.diff(unique)
+    steps = np.where(gaps * 2 > pitch, np.maximum(1, np.rint(gaps / max(pitch, 1))), 0).astype(np.int64)
+    return unique, np.concatenate([[0], np.cumsum(steps)])[:len(unique)]
@@ -1,28 +1,57 @@
-def find_pixels_to_paint_from_map(pixel_map, target_bgr, tolerance=5):
+import numpy as np
+from .pixel_map import PixelMap
+
+
+def pixel_map_arrays(pixel_map):
     """
-    Uses the pre-built pixel map to find pixels that need painting.
-    Only paints pixels where:
-    1. The preview shows the target color (indicating intention to paint this color)
-    2. The actual pixel container is NOT yet the target color
+    Converts a pixel map into parallel NumPy arrays so it can be scanned in one pass.
+    Returns (positions, preview_colors, pixel_colors):
+    - positions: (N, 2) int32 array of preview (x, y) coordinates
+    - preview_colors / pixel_colors: (N, 3) uint8 BGR arrays
+    Rows keep the pixel map iteration order.
     """
-    matches = []
+    if isinstance(pixel_map, PixelMap):
+        return pixel_map.arrays()
+    positions = np.array(list(pixel_map.keys()), dtype=np.int32).reshape(-1, 2)
+    colors = list(pixel_map.values())
+    preview_colors = np.array([c["preview_color"] for c in colors], dtype=np.uint8).reshape(-1, 3)
+    pixel_colors = np.array([c["pixel_color"] for c in colors], dtype=np.uint8).reshape(-1, 3)
+    return positions, preview_colors, pixel_colors
 
-    for (preview_x, preview_y), colors in pixel_map.items():
-        preview_color = colors["preview_color"]
-        pixel_color = colors["pixel_color"]
 
-        # Check if preview shows the target color (user wants to paint this color here)
-        preview_matches_target = all(
-            abs(int(preview_color[i]) - target_bgr[i]) <= tolerance for i in range(3)
-        )
+def color_match_mask(colors, target_bgr, tolerance=5, matcher=None):
+    """
+    Vectorized per-channel tolerance check.
+    Returns a boolean mask of the rows in `colors` within `tolerance` of `target_bgr` on every channel.
+    With a ColorMatcher, rows match when their nearest palette color is the target's within
+    `tolerance` CIEDE2000 instead.
+    """
+    if matcher is not None:
+        return matcher.matches(colors, target_bgr, tolerance)
+    target = np.asarray(target_bgr, dtype=np.int16)
+    diff = np.abs(colors.astype(np.int16) - target)
+    return np.all(diff <= tolerance, axis=1)
 
-        # Check if pixel is already the correct color
-        pixel_already_correct = all(
-            abs(int(pixel_color[i]) - target_bgr[i]) <= tolerance for i in range(3)
-        )
 
-        # Only paint if preview shows target color but pixel isn't painted yet
-        if preview_matches_target and not pixel_already_correct:
-            matches.append((preview_x, preview_y))
+def find_pixels_to_paint_from_arrays(pixel_arrays, target_bgr, tolerance=5, matcher=None):
+    """
+    Same rules as find_pixels_to_paint_from_map, evaluated on the arrays
+    returned by pixel_map_arrays. Build the arrays once and reuse them for every color.
+    """
+    positions, preview_colors, pixel_colors = pixel_arrays
 
-    return matches
\ No newline at end of file
+    preview_matches_target = color_match_mask(preview_colors, target_bgr, tolerance, matcher)
+    pixel_already_correct = color_match_mask(pixel_colors, target_bgr, tolerance, matcher)
+
+    selected = positions[preview_matches_target & ~pixel_already_correct]
+    return [tuple(pos) for pos in selected.tolist()]
+
+
+def find_pixels_to_paint_from_map(pixel_map, target_bgr, tolerance=5, matcher=None):
+    """
+    Uses the pre-built pixel map to find pixels that need painting.
+    Only paints pixels where:
+    1. The preview shows the target color (indicating intention to paint this color)
+    2. The actual pixel container is NOT yet the target color
+    """
+    return find_pixels_to_paint_from_arrays(pixel_map_arrays(pixel_map), target_bgr, tolerance, matcher)
@@ -1,8 +1,192 @@
-import pyautogui
+import threading
 import numpy as np
+from .config import get_config
+from .metrics import get_metrics
+
+
+class CaptureBackend:
+    """
+    Base class for screen capture backends.
+    Regions are (left, top, width, height) in screen coordinates, None means the whole screen.
+    Returned frames may be read-only views into the backend's buffer; copy before drawing on them.
+    """
+
+    name = 'base'
+
+    def grab(self, region=None):
+        """Capture a region as an RGB array"""
+        return self.grab_bgr(region)[:, :, ::-1]
+
+    def grab_bgr(self, region=None):
+        """Capture a region as a BGR array (OpenCV order)"""
+        return self.grab(region)[:, :, ::-1]
+
+    def close(self):
+        """Release any resources held by the backend"""
+        pass
+
+
+class PyAutoGuiBackend(CaptureBackend):
+    """Portable fallback: full PIL screenshot through pyautogui on every call"""
+
+    name = 'pyautogui'
+
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def grab(self, region=None):
+        screenshot = self._pyautogui.screenshot(region=_as_region(region))
+        return np.asarray(screenshot)
+
+
+class MssBackend(CaptureBackend):
+    """
+    Persistent mss grabber (XShm on Linux, BitBlt on Windows, CoreGraphics on macOS).
+    Grabs only the requested region and wraps the raw BGRA buffer without a PIL round trip.
+    mss handles are not shareable across threads, so one grabber is kept per thread.
+    """
+
+    name = 'mss'
+
+    def __init__(self):
+        import mss
+        self._mss = mss
+        self._local = threading.local()
+        self._grabbers = []
+        self._lock = threading.Lock()
+
+    def _grabber(self):
+        grabber = getattr(self._local, 'grabber', None)
+        if grabber is None:
+            grabber = self._mss.mss()
+            self._local.grabber = grabber
+            with self._lock:
+                self._grabbers.append(grabber)
+        return grabber
+
+    def _grab_bgra(self, region):
+        grabber = self._grabber()
+        if region is None:
+            monitor = grabber.monitors[1] if len(grabber.monitors) > 1 else grabber.monitors[0]
+        else:
+            left, top, width, height = _as_region(region)
+            monitor = {'left': left, 'top': top, 'width': width, 'height': height}
+
+        shot = grabber.grab(monitor)
+        return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+    def grab(self, region=None):
+        return self._grab_bgra(region)[:, :, 2::-1]
+
+    def grab_bgr(self, region=None):
+        return self._grab_bgra(region)[:, :, :3]
+
+    def close(self):
+        with self._lock:
+            for grabber in self._grabbers:
+                grabber.close()
+            self._grabbers.clear()
+        self._local = threading.local()
+
+
+class FrameBackend(CaptureBackend):
+    """
+    Serves regions of an in-memory RGB frame, for headless runs and benchmarks.
+    `frame_source` is either an RGB array or a callable returning the current RGB frame;
+    the frame covers the whole virtual screen starting at (0, 0).
+    """
+
+    name = 'frame'
+
+    def __init__(self, frame_source):
+        self.frame_source = frame_source
+
+    def set_frame(self, frame):
+        """Replace the frame served by the backend"""
+        self.frame_source = frame
+
+    def _frame(self):
+        return self.frame_source() if callable(self.frame_source) else self.frame_source
+
+    def grab(self, region=None):
+        frame = self._frame()
+        if region is None:
+            return frame
+
+        left, top, width, height = _as_region(region)
+        frame_height, frame_width = frame.shape[:2]
+        if left < 0 or top < 0 or left + width > frame_width or top + height > frame_height:
+            raise ValueError(f"Region {region} is outside the {frame_width}x{frame_height} frame")
+        return frame[top:top + height, left:left + width]
+
+
+class FileBackend(FrameBackend):
+    """Serves regions of an image file loaded once (e.g. a saved full-screen capture)"""
+
+    name = 'file'
+
+    def __init__(self, path):
+        import cv2
+        frame_bgr = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame_bgr is None:
+            raise FileNotFoundError(f"Could not read capture image: {path}")
+        super().__init__(np.ascontiguousarray(frame_bgr[:, :, ::-1]))
+        self.path = path
+
+
+def _as_region(region):
+    """Normalize a stored region (list or tuple) to an int tuple"""
+    if region is None:
+        return None
+    return tuple(int(v) for v in region)
+
+
+def create_capture_backend(name='auto'):
+    """
+    Create a capture backend by name: 'auto', 'mss' or 'pyautogui'.
+    'auto' prefers mss and falls back to pyautogui when mss is not installed.
+    """
+    if name in ('auto', 'mss'):
+        try:
+            return MssBackend()
+        except ImportError:
+            if name == 'mss':
+                raise
+    if name in ('auto', 'pyautogui'):
+        return PyAutoGuiBackend()
+    raise ValueError(f"Unknown capture backend: {name}")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_capture_backend():
+    """Get the active capture backend, created from the 'capture.backend' config on first use"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_capture_backend(get_config().get('capture.backend', 'auto'))
+        return _backend
+
+
+def set_capture_backend(backend):
+    """Replace the active capture backend (e.g. with a FrameBackend for headless runs)"""
+    global _backend
+    with _backend_lock:
+        if _backend is not None and _backend is not backend:
+            _backend.close()
+        _backend = backend
 
 
 def get_screen(region=None):
-    """Capture screen region using pyautogui."""
-    screenshot = pyautogui.screenshot(region=region)
-    return np.array(screenshot)
\ No newline at end of file
+    """Capture screen region as an RGB array using the active capture backend."""
+    with get_metrics().timer('capture.grab'):
+        return get_capture_backend().grab(region)
+
+
+def get_screen_bgr(region=None):
+    """Capture screen region as a BGR array, skipping the RGB->BGR conversion where the backend allows."""
+    with get_metrics().timer('capture.grab'):
+        return get_capture_backend().grab_bgr(region)
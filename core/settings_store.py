@@ -0,0 +1,107 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .logger import get_logger
+
+SAVE_DELAY_S = 0.5  # quiet time after the last change before the file is written
+MAX_SAVE_DELAY_S = 2.0  # longest a change waits while changes keep coming
+
+
+class SettingsStore:
+    """
+    Debounced JSON persistence: save() serializes the data on the calling thread (so later
+    changes cannot race the writer) and a background thread writes the latest version once
+    changes settle, atomically through a temporary file and os.replace.
+    Inside batch(), saves only mark the data dirty and one save happens when the batch ends.
+    """
+
+    def __init__(self, path, delay=SAVE_DELAY_S, max_delay=MAX_SAVE_DELAY_S):
+        self.path = path
+        self.delay = delay
+        self.max_delay = max_delay
+        self.logger = get_logger()
+        self.writes = 0
+        self._condition = threading.Condition()
+        self._pending = None
+        self._first_request = None
+        self._last_request = None
+        self._writing = False
+        self._batch_depth = 0
+        self._batch_data = None
+        self._thread = None
+        atexit.register(self.flush)
+
+    def save(self, data):
+        """Schedule `data` to be written (deferred to the end of the batch inside batch())"""
+        if self._batch_depth:
+            self._batch_data = data
+            return
+        text = json.dumps(data, indent=2)
+        with self._condition:
+            now = time.monotonic()
+            if self._pending is None:
+                self._first_request = now
+            self._pending = text
+            self._last_request = now
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._writer, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    @contextmanager
+    def batch(self):
+        """Group changes so they cause at most one write"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._batch_data is not None:
+                data, self._batch_data = self._batch_data, None
+                self.save(data)
+
+    def flush(self):
+        """Write any pending data now and wait until it is on disk"""
+        with self._condition:
+            while self._writing:
+                self._condition.wait()
+            text, self._pending = self._pending, None
+            if text is not None:
+                self._write(text)
+
+    def _writer(self):
+        with self._condition:
+            while True:
+                while self._pending is None:
+                    self._condition.wait()
+                # Wait for changes to settle, but not longer than max_delay after the first one
+                due = min(self._last_request + self.delay, self._first_request + self.max_delay)
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                text, self._pending = self._pending, None
+                self._writing = True
+                self._condition.release()
+                try:
+                    self._write(text)
+                finally:
+                    self._condition.acquire()
+                    self._writing = False
+                    self._condition.notify_all()
+
+    def _write(self, text):
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            self.writes += 1
+        except Exception as e:
+            self.logger.warning(f"Failed to save {self.path}: {e}")
@@ -0,0 +1,172 @@
+import json
+import random
+import threading
+import time
+import numpy as np
+from .input_backend import RecordingBackend
+from .screen_capture import FrameBackend
+
+# Unpainted canvas cells, away from every palette color
+CANVAS_BACKGROUND_RGB = (236, 228, 212)
+# Page background around the canvas and behind the palette swatches
+PAGE_BACKGROUND_RGB = (33, 37, 46)
+SWATCH_SIZE = 24
+SWATCH_GAP = 6
+
+
+def load_palette(path='colors.json'):
+    """Non-ignored palette entries from colors.json, as loaded by DataManager"""
+    with open(path, 'r') as f:
+        return [color for color in json.load(f)['color_palette'] if not color.get('ignore', False)]
+
+
+class SimulatedCanvas:
+    """
+    Headless wplace-style screen: a canvas of `cols` x `rows` cells of `pitch` screen pixels
+    with Blue Marble preview dots (center third of each template cell) and a palette strip
+    of swatches below it.
+
+    Frames are served through a FrameBackend and clicks arrive through a RecordingBackend,
+    so the analysis and bot workers run unchanged. Clicking a swatch selects its color;
+    clicking a cell paints it after `latency_s` (simulated delivery delay) unless it is
+    dropped, which happens with probability `failure_rate`.
+    """
+
+    def __init__(self, cols=60, rows=40, pitch=15, palette=None, template_colors=8,
+                 template_fraction=0.7, painted_fraction=0.3, latency_s=0.0, failure_rate=0.0,
+                 seed=0, margin=40, clock=time.monotonic):
+        self.cols = cols
+        self.rows = rows
+        self.pitch = pitch
+        self.palette = palette if palette is not None else load_palette()
+        self.latency_s = latency_s
+        self.failure_rate = failure_rate
+        self.clock = clock
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        rng = np.random.default_rng(seed)
+        palette_rgb = np.array([color['rgb'] for color in self.palette], dtype=np.uint8)
+
+        # Template: blobby regions of a few palette colors (nearest of random seed points)
+        chosen = rng.choice(len(palette_rgb), min(template_colors, len(palette_rgb)), replace=False)
+        seeds = rng.random((len(chosen) * 3, 2)) * (cols, rows)
+        grid_x, grid_y = np.meshgrid(np.arange(cols), np.arange(rows))
+        dist = (grid_x[..., None] - seeds[:, 0]) ** 2 + (grid_y[..., None] - seeds[:, 1]) ** 2
+        self.template = palette_rgb[chosen[np.argmin(dist, axis=2) % len(chosen)]]
+        self.template_mask = rng.random((rows, cols)) < template_fraction
+
+        # Current canvas: background, with part of the template already painted
+        self.cells = np.empty((rows, cols, 3), dtype=np.uint8)
+        self.cells[:] = CANVAS_BACKGROUND_RGB
+        painted = self.template_mask & (rng.random((rows, cols)) < painted_fraction)
+        self.cells[painted] = self.template[painted]
+
+        # Screen layout
+        canvas_width = int(round(cols * pitch))
+        canvas_height = int(round(rows * pitch))
+        self.canvas_region = (margin, margin, canvas_width, canvas_height)
+
+        per_row = max(1, (canvas_width + SWATCH_GAP) // (SWATCH_SIZE + SWATCH_GAP))
+        swatch_rows = -(-len(self.palette) // per_row)
+        palette_top = margin + canvas_height + margin
+        palette_width = per_row * (SWATCH_SIZE + SWATCH_GAP) + SWATCH_GAP
+        palette_height = swatch_rows * (SWATCH_SIZE + SWATCH_GAP) + SWATCH_GAP
+        self.palette_region = (margin, palette_top, palette_width, palette_height)
+        self.swatches = []  # [(left, top, rgb tuple), ...] in screen coordinates
+        for i, color in enumerate(self.palette):
+            row, col = divmod(i, per_row)
+            left = margin + SWATCH_GAP + col * (SWATCH_SIZE + SWATCH_GAP)
+            top = palette_top + SWATCH_GAP + row * (SWATCH_SIZE + SWATCH_GAP)
+            self.swatches.append((left, top, tuple(color['rgb'])))
+
+        self.screen_size = (max(margin * 2 + canvas_width, margin * 2 + palette_width),
+                            palette_top + palette_height + margin)
+
+        # Screen pixel -> cell index lookups for the canvas area
+        self._cell_x = np.minimum((np.arange(canvas_width) / pitch).astype(np.int64), cols - 1)
+        self._cell_y = np.minimum((np.arange(canvas_height) / pitch).astype(np.int64), rows - 1)
+        fraction_x = np.arange(canvas_width) / pitch - self._cell_x
+        fraction_y = np.arange(canvas_height) / pitch - self._cell_y
+        self._dot_mask = np.outer((fraction_y >= 1 / 3) & (fraction_y < 2 / 3),
+                                  (fraction_x >= 1 / 3) & (fraction_x < 2 / 3))
+
+        self.selected_color = None
+        self._pending_clicks = []  # [(apply_at, row, col, rgb), ...]
+        self._frame = None
+        self.stats = {'clicks': 0, 'palette_clicks': 0, 'placed': 0, 'dropped': 0, 'missed': 0}
+
+    def _base_screen(self):
+        """Page background with palette swatches"""
+        width, height = self.screen_size
+        screen = np.empty((height, width, 3), dtype=np.uint8)
+        screen[:] = PAGE_BACKGROUND_RGB
+        for left, top, rgb in self.swatches:
+            screen[top:top + SWATCH_SIZE, left:left + SWATCH_SIZE] = rgb
+        return screen
+
+    def _apply_due_clicks(self):
+        """Apply clicks whose simulated latency has elapsed"""
+        if not self._pending_clicks:
+            return
+        now = self.clock()
+        still_pending = []
+        for apply_at, row, col, rgb in self._pending_clicks:
+            if apply_at <= now:
+                self.cells[row, col] = rgb
+                self._frame = None
+            else:
+                still_pending.append((apply_at, row, col, rgb))
+        self._pending_clicks = still_pending
+
+    def frame(self):
+        """Current RGB screen frame"""
+        with self._lock:
+            self._apply_due_clicks()
+            if self._frame is None:
+                screen = self._base_screen()
+                left, top, width, height = self.canvas_region
+                canvas = self.cells[self._cell_y][:, self._cell_x]
+                dots = self._dot_mask & self.template_mask[self._cell_y][:, self._cell_x]
+                canvas[dots] = self.template[self._cell_y][:, self._cell_x][dots]
+                screen[top:top + height, left:left + width] = canvas
+                self._frame = screen
+            return self._frame
+
+    def click(self, x, y):
+        """Apply a click at screen coordinates"""
+        with self._lock:
+            self.stats['clicks'] += 1
+            for left, top, rgb in self.swatches:
+                if left <= x < left + SWATCH_SIZE and top <= y < top + SWATCH_SIZE:
+                    self.selected_color = rgb
+                    self.stats['palette_clicks'] += 1
+                    return
+
+            left, top, width, height = self.canvas_region
+            if not (left <= x < left + width and top <= y < top + height) or self.selected_color is None:
+                self.stats['missed'] += 1
+                return
+            if self._random.random() < self.failure_rate:
+                self.stats['dropped'] += 1
+                return
+
+            row, col = self._cell_y[y - top], self._cell_x[x - left]
+            self.stats['placed'] += 1
+            self._pending_clicks.append((self.clock() + self.latency_s, row, col, self.selected_color))
+            self._apply_due_clicks()
+
+    def remaining_pixels(self):
+        """Template cells that do not have their template color yet"""
+        with self._lock:
+            self._apply_due_clicks()
+            wrong = np.any(self.cells != self.template, axis=2)
+            return int((wrong & self.template_mask).sum())
+
+    def capture_backend(self):
+        """Capture backend serving this simulator's frames"""
+        return FrameBackend(self.frame)
+
+    def input_backend(self):
+        """Input backend that delivers clicks to this simulator"""
+        return RecordingBackend(on_click=self.click, clock=self.clock)
@@ -0,0 +1,146 @@
+import os
+
+import cv2
+import numpy as np
+
+from .image_analysis import lattice_cell_centers
+from .pixel_map import PixelMap
+
+# Template pixels with less alpha than this are left alone
+TEMPLATE_MIN_ALPHA = 128
+# Amplitude (in RGB units) of the ordered dithering threshold map
+DITHER_STRENGTH = 32
+# Distinct colors per nearest-color distance block
+QUANTIZE_CHUNK = 65536
+
+# 4x4 Bayer matrix, normalized to thresholds in [-0.5, 0.5)
+BAYER_4X4 = (np.array([
+    [0, 8, 2, 10],
+    [12, 4, 14, 6],
+    [3, 11, 1, 9],
+    [15, 7, 13, 5],
+], dtype=np.float32) + 0.5) / 16 - 0.5
+
+
+def load_template(path):
+    """
+    Load a template image as (rgb, mask): an (H, W, 3) uint8 RGB array and an (H, W) bool
+    array that is False for transparent pixels. Raises ValueError if the file cannot be read.
+    """
+    img = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if img is None:
+        raise ValueError(f"Could not read template image: {path}")
+
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2RGB), np.ones(img.shape, dtype=bool)
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2RGB), img[:, :, 3] >= TEMPLATE_MIN_ALPHA
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB), np.ones(img.shape[:2], dtype=bool)
+
+
+def nearest_palette_indices(colors_rgb, palette_rgb):
+    """
+    Index of the nearest palette color (squared RGB distance) for every row of `colors_rgb`.
+    Distances are computed once per unique color, which templates have few of.
+    """
+    colors = np.asarray(colors_rgb, dtype=np.int32).reshape(-1, 3)
+    palette = np.asarray(palette_rgb, dtype=np.int32).reshape(-1, 3)
+    packed = colors[:, 0] << 16 | colors[:, 1] << 8 | colors[:, 2]
+    unique_packed, inverse = np.unique(packed, return_inverse=True)
+    unique_rgb = np.stack([unique_packed >> 16, (unique_packed >> 8) & 0xFF, unique_packed & 0xFF], axis=1)
+
+    # |c - p|^2 = |c|^2 - 2 c.p + |p|^2, and |c|^2 does not change the argmin. Exact in
+    # float32 for 8-bit channels; chunked so photo-like templates stay within memory.
+    unique_rgb = unique_rgb.astype(np.float32)
+    palette_f = palette.astype(np.float32)
+    palette_norms = (palette_f ** 2).sum(axis=1)
+    nearest = np.empty(len(unique_rgb), dtype=np.int64)
+    for start in range(0, len(unique_rgb), QUANTIZE_CHUNK):
+        chunk = unique_rgb[start:start + QUANTIZE_CHUNK]
+        nearest[start:start + QUANTIZE_CHUNK] = np.argmin(palette_norms - 2 * chunk @ palette_f.T, axis=1)
+    return nearest[inverse.ravel()]
+
+
+def quantize_to_palette(rgb, palette, dither=False):
+    """
+    Map every pixel of an RGB image to its nearest palette color, optionally with ordered
+    (Bayer) dithering so gradients keep their tone with a small palette.
+    Returns the quantized (H, W, 3) uint8 RGB image.
+    """
+    palette_rgb = np.array([color['rgb'] for color in palette], dtype=np.uint8).reshape(-1, 3)
+    if len(palette_rgb) == 0:
+        raise ValueError("No palette colors to quantize to")
+
+    height, width = rgb.shape[:2]
+    source = rgb.astype(np.int32)
+    if dither:
+        thresholds = np.tile(BAYER_4X4, ((height + 3) // 4, (width + 3) // 4))[:height, :width]
+        offsets = np.rint(thresholds * DITHER_STRENGTH).astype(np.int32)
+        source = np.clip(source + offsets[:, :, None], 0, 255)
+
+    indices = nearest_palette_indices(source.reshape(-1, 3), palette_rgb)
+    return palette_rgb[indices].reshape(height, width, 3)
+
+
+class TemplateImage:
+    """A target image loaded from disk, quantized on demand and cached per palette"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rgb, self.mask = load_template(path)
+        self._quantized_key = None
+        self._quantized = None
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    @property
+    def size(self):
+        """(width, height) in canvas pixels"""
+        return self.rgb.shape[1], self.rgb.shape[0]
+
+    def quantized(self, palette, dither=False):
+        """The template quantized to `palette` (cached until the palette or dithering changes)"""
+        key = (tuple(tuple(color['rgb']) for color in palette), dither)
+        if key != self._quantized_key:
+            self._quantized = quantize_to_palette(self.rgb, palette, dither)
+            self._quantized_key = key
+        return self._quantized
+
+
+def template_pixel_map(img, lattice, template_rgb, template_mask, offset=(0, 0)):
+    """
+    Pixel map with one entry per opaque template pixel that lands on a visible grid cell.
+    Template pixel (0, 0) sits on the grid cell `offset` (columns, rows) from the first whole
+    cell of the capture. The template color takes the place of the preview color, so the
+    usual paint plan diff against the sampled pixel color gives the cells to paint.
+    """
+    pixel_size = int(round(lattice['pitch']))
+    centers_x, centers_y = lattice_cell_centers(img.shape, lattice)
+    height, width = img.shape[:2]
+
+    # Visible cells whose pixel sample (same offset as build_pixel_map) falls inside the capture
+    keep_x = (centers_x - pixel_size // 2 >= 0) & (centers_x - pixel_size // 2 + 2 < width)
+    keep_y = (centers_y - pixel_size // 2 >= 0) & (centers_y - pixel_size // 2 + 2 < height)
+    columns, rows = np.flatnonzero(keep_x), np.flatnonzero(keep_y)
+
+    # Grid cell -> template pixel, counting cells from the first whole one
+    template_x = np.arange(len(columns)) - offset[0]
+    template_y = np.arange(len(rows)) - offset[1]
+    inside_x = (template_x >= 0) & (template_x < template_rgb.shape[1])
+    inside_y = (template_y >= 0) & (template_y < template_rgb.shape[0])
+    columns, template_x = columns[inside_x], template_x[inside_x]
+    rows, template_y = rows[inside_y], template_y[inside_y]
+    if len(columns) == 0 or len(rows) == 0:
+        return PixelMap.empty(pixel_size)
+
+    grid_y, grid_x = np.meshgrid(template_y, template_x, indexing='ij')
+    opaque = template_mask[grid_y, grid_x]
+    cell_y, cell_x = np.meshgrid(rows, columns, indexing='ij')
+    cell_x, cell_y = cell_x[opaque], cell_y[opaque]
+
+    positions = np.stack([centers_x[cell_x], centers_y[cell_y]], axis=1)
+    pixel_map = PixelMap.from_samples(img, pixel_size, positions)
+    pixel_map.preview_colors[:] = template_rgb[grid_y[opaque], grid_x[opaque]][:, ::-1]
+    return pixel_map
@@ -0,0 +1,63 @@
+import numpy as np
+from .pixel_mapping import color_match_mask
+from .screen_capture import get_screen_bgr
+
+# Larger bounding boxes are split so a spread-out batch does not capture the whole canvas
+MAX_VERIFY_AREA = 512 * 512
+
+
+def pixel_sample_points(positions, pixel_size):
+    """Pixel-color sample point of each preview position (same offset as build_pixel_map)"""
+    points = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+    return points - pixel_size // 2 + 2
+
+
+def sample_pixel_colors(positions, canvas_region, pixel_size):
+    """
+    Captures only the bounding box of the given cells and returns their current
+    pixel colors as an (N, 3) BGR array, in the order of `positions`.
+    """
+    points = pixel_sample_points(positions, pixel_size)
+    colors = np.zeros((len(points), 3), dtype=np.uint8)
+    if len(points) == 0:
+        return colors
+
+    order = np.argsort(points[:, 1], kind="stable")
+    _sample_into(points, order, canvas_region, colors)
+    return colors
+
+
+def _sample_into(points, indices, canvas_region, colors):
+    """Capture the bounding box of points[indices] (splitting it if too large) and fill colors"""
+    subset = points[indices]
+    left, top = subset.min(axis=0)
+    right, bottom = subset.max(axis=0) + 1
+    width, height = right - left, bottom - top
+
+    if width * height > MAX_VERIFY_AREA and len(indices) > 1:
+        # indices are sorted by y, so halves are horizontal bands
+        half = len(indices) // 2
+        _sample_into(points, indices[:half], canvas_region, colors)
+        _sample_into(points, indices[half:], canvas_region, colors)
+        return
+
+    region = (canvas_region[0] + int(left), canvas_region[1] + int(top), int(width), int(height))
+    capture = get_screen_bgr(region)
+    colors[indices] = capture[subset[:, 1] - top, subset[:, 0] - left]
+
+
+def verify_placements(positions, target_bgr, pixel_map, canvas_region, pixel_size, tolerance=5, matcher=None):
+    """
+    Re-samples the pixel color of recently clicked cells and updates their pixel_map entries.
+    Returns (placed, failed) lists of positions.
+    """
+    if not positions:
+        return [], []
+
+    colors = sample_pixel_colors(positions, canvas_region, pixel_size)
+    is_placed = color_match_mask(colors, target_bgr, tolerance, matcher)
+
+    pixel_map.update_pixel_colors(positions, colors)
+    placed = [position for position, ok in zip(positions, is_placed) if ok]
+    failed = [position for position, ok in zip(positions, is_placed) if not ok]
+    return placed, failed
@@ -1,5 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import keyboard
+from core import get_config, ChargeScheduler
+
+# Global hotkey that pauses and resumes a running bot (the browser has focus while painting)
+PAUSE_HOTKEY = "p"
 
 class ControlTab:
     """Control tab for running the bot"""
@@ -19,11 +24,21 @@ class ControlTab:
         self.progress_var = None
         self.progress_bar = None
         self.start_btn = None
+        self.pause_btn = None
         self.log_text = None
         self.pixel_limit_var = None
         self.pixel_limit_entry = None
         self.pixel_limit_scale = None
         self.reanalyze_var = None
+        self.incremental_var = None
+        self.verify_var = None
+        self.unattended_var = None
+        self.charges_var = None
+        
+        # Unattended mode: burst sizes and timing come from the charge model
+        self.charge_scheduler = None
+        self._burst_timer = None
+        self._pause_hotkey = None
         
         # Create the UI
         self._create_ui()
@@ -56,9 +71,14 @@ class ControlTab:
                                    command=self._start_bot, state='disabled')
         self.start_btn.pack(pady=5)
         
+        self.pause_btn = ttk.Button(button_frame, text="Pause",
+                                   command=self._toggle_pause, state='disabled')
+        self.pause_btn.pack(pady=5)
+        
         # Mouse movement cancellation info with scaled font
         scaled_font = self.main_window.get_scaled_font(9, 'italic')
-        self.cancel_info = ttk.Label(status_frame, text="Move mouse to cancel bot", 
+        self.cancel_info = ttk.Label(status_frame, text=f"Move mouse to {self._mouse_move_action()} bot, "
+                                                       f"press {PAUSE_HOTKEY.upper()} to pause/resume", 
                                foreground='blue', font=scaled_font)
         self.cancel_info.pack(pady=(5, 0))
     
@@ -112,6 +132,40 @@ class ControlTab:
                                       command=self._on_reanalyze_change)
         reanalyze_cb.pack(side='left')
         
+        saved_incremental = self.data_manager.user_settings['preferences'].get('incremental_reanalysis', True)
+        self.incremental_var = tk.BooleanVar(value=saved_incremental)
+        
+        incremental_cb = ttk.Checkbutton(options_frame, text="Only re-check changed areas", 
+                                        variable=self.incremental_var, 
+                                        command=self._debounced_save)
+        incremental_cb.pack(side='left', padx=(15, 0))
+        
+        saved_verify = self.data_manager.user_settings['preferences'].get('verify_placements', True)
+        self.verify_var = tk.BooleanVar(value=saved_verify)
+        
+        verify_cb = ttk.Checkbutton(options_frame, text="Verify placements", 
+                                   variable=self.verify_var, 
+                                   command=self._debounced_save)
+        verify_cb.pack(side='left', padx=(15, 0))
+        
+        # Unattended painting in charge-sized bursts
+        unattended_frame = ttk.Frame(bot_settings_frame)
+        unattended_frame.pack(fill='x', pady=(5, 0))
+        
+        saved_unattended = self.data_manager.user_settings['preferences'].get('unattended', False)
+        self.unattended_var = tk.BooleanVar(value=saved_unattended)
+        
+        unattended_cb = ttk.Checkbutton(unattended_frame, text="Unattended: paint in charge bursts", 
+                                       variable=self.unattended_var, 
+                                       command=self._on_unattended_change)
+        unattended_cb.pack(side='left')
+        
+        self.charges_var = tk.IntVar(value=get_config().get('charges.capacity', 30))
+        charges_entry = ttk.Entry(unattended_frame, textvariable=self.charges_var, width=5,
+                                  validate='key', validatecommand=vcmd)
+        charges_entry.pack(side='right')
+        ttk.Label(unattended_frame, text="Charges now:").pack(side='right', padx=(0, 5))
+        
         # Update button state after creating checkbox
         self._update_start_button_state()
     
@@ -170,6 +224,11 @@ class ControlTab:
     
     def _start_bot(self):
         """Start the painting bot"""
+        self._cancel_next_burst()
+        if self.unattended_var.get() and self.charge_scheduler is None:
+            self.charge_scheduler = ChargeScheduler.from_config()
+            self.charge_scheduler.bucket.set_charges(self._charges_now())
+        
         # Force immediate save of any pending changes before starting
         if hasattr(self, '_save_timer'):
             self.main_window.root.after_cancel(self._save_timer)
@@ -179,7 +238,7 @@ class ControlTab:
             self.log_message("Starting reanalysis before painting...")
             if self.main_window.setup_tab and hasattr(self.main_window.setup_tab, '_analyze_regions'):
                 self._prepare_bot_start()
-                self.main_window.setup_tab._analyze_regions()
+                self.main_window.setup_tab._analyze_regions(incremental=self.incremental_var.get())
             else:
                 from tkinter import messagebox
                 messagebox.showerror(
@@ -205,18 +264,75 @@ class ControlTab:
             self._prepare_bot_start()
             self._execute_bot_start()
     
+    def _mouse_move_action(self):
+        """What moving the mouse does to a running bot: 'cancel' or 'pause'"""
+        return get_config().get('bot.mouse_move_action', 'cancel')
+    
     def _prepare_bot_start(self):
         """Prepare UI for bot start"""
         self.main_window.is_running = True
         self.start_btn.config(state='disabled')
-        self.status_label.config(text="Painting... (move mouse to cancel)")
-        self.log_message("Starting painting bot... Move mouse to cancel.")
+        action = self._mouse_move_action()
+        self.status_label.config(text=f"Painting... (move mouse to {action})")
+        self.log_message(f"Starting painting bot... Move mouse to {action}.")
+    
+    def _toggle_pause(self):
+        """Pause or resume the running bot"""
+        if self.bot_worker.is_paused:
+            self.bot_worker.resume_bot()
+        else:
+            self.bot_worker.pause_bot()
     
     def _execute_bot_start(self):
         """Execute the actual bot start"""
         enabled_colors = self.main_window.get_enabled_colors()
         
-        # Check if pixel limit is valid before starting
+        if self.charge_scheduler is not None:
+            # Unattended: spend exactly the charges the model says are available
+            pixel_limit = self.charge_scheduler.burst_size()
+            if pixel_limit == 0:
+                self.main_window.is_running = False
+                self.start_btn.config(state='normal')
+                self._schedule_next_burst()
+                return
+        else:
+            pixel_limit = self._read_pixel_limit()
+            if pixel_limit is None:
+                return
+        
+        settings = {
+            'pixel_limit': pixel_limit,
+            'tolerance': self.main_window.setup_tab.tolerance_var.get(),
+            'delay': self.main_window.setup_tab.delay_var.get(),
+            'verify': self.verify_var.get(),
+            'stop_on_rejected_batch': self.charge_scheduler is not None
+        }
+        self.bot_worker.start_bot(self.message_queue, enabled_colors, settings)
+        self._add_pause_hotkey()
+        # Reaching the button moves the mouse away from the last click, which cancels the run
+        # in 'cancel' mode; there the hotkey is the only way to pause
+        pause_state = 'normal' if self._mouse_move_action() == 'pause' else 'disabled'
+        self.pause_btn.config(state=pause_state, text="Pause")
+    
+    def _add_pause_hotkey(self):
+        """Register the pause/resume hotkey for the current run"""
+        if self._pause_hotkey is None:
+            try:
+                self._pause_hotkey = keyboard.add_hotkey(PAUSE_HOTKEY, self._toggle_pause)
+            except Exception as e:
+                self.log_message(f"Pause hotkey unavailable: {e}")
+    
+    def _remove_pause_hotkey(self):
+        """Unregister the pause/resume hotkey once the run has ended"""
+        if self._pause_hotkey is not None:
+            try:
+                keyboard.remove_hotkey(self._pause_hotkey)
+            except Exception:
+                pass
+            self._pause_hotkey = None
+    
+    def _read_pixel_limit(self):
+        """Validated pixel limit from the entry, or None after telling the user what is wrong"""
         try:
             pixel_limit = self.pixel_limit_var.get()
             if not (1 <= pixel_limit <= 1000):
@@ -228,7 +344,7 @@ class ControlTab:
                     f"Please adjust the value and try again."
                 )
                 self.pixel_limit_entry.focus_set()  # Focus the field for easy editing
-                return
+                return None
         except tk.TclError:
             from tkinter import messagebox
             messagebox.showerror(
@@ -239,14 +355,61 @@ class ControlTab:
                 "• Use the slider for quick selection"
             )
             self.pixel_limit_entry.focus_set()
+            return None
+        return pixel_limit
+    
+    def _charges_now(self):
+        """Charges the user says the account holds right now"""
+        try:
+            return self.charges_var.get()
+        except tk.TclError:
+            return get_config().get('charges.capacity', 30)
+    
+    def _on_unattended_change(self):
+        """Handle unattended checkbox change: turning it off cancels the next burst"""
+        self._debounced_save()
+        if not self.unattended_var.get():
+            self._cancel_next_burst()
+            self.charge_scheduler = None
+            if not self.main_window.is_running:
+                self.status_label.config(text="Ready")
+    
+    def _schedule_next_burst(self, result=None):
+        """Start the next burst on a timer, when the charge model expects enough charges"""
+        seconds = self.charge_scheduler.seconds_until_next_burst(result)
+        # Small margin so the model counts the last charge as regenerated when the timer fires
+        self._burst_timer = self.main_window.root.after(int(seconds * 1000) + 100, self._start_next_burst)
+        minutes, secs = divmod(int(round(seconds)), 60)
+        self.status_label.config(text=f"Waiting for charges - next burst in {minutes}:{secs:02d}")
+        self.log_message(f"Next burst in {minutes}:{secs:02d} "
+                         f"({self.charge_scheduler.pixels_per_hour():.0f} pixels/hour so far)")
+    
+    def _start_next_burst(self):
+        """Timer callback: start the scheduled burst unless unattended mode was turned off"""
+        self._burst_timer = None
+        if self.unattended_var.get() and self.charge_scheduler is not None and not self.main_window.is_running:
+            self._start_bot()
+    
+    def _cancel_next_burst(self):
+        """Cancel a scheduled burst"""
+        if self._burst_timer is not None:
+            self.main_window.root.after_cancel(self._burst_timer)
+            self._burst_timer = None
+    
+    def on_burst_complete(self, message):
+        """In unattended mode, correct the charge model from the finished burst and time the next one"""
+        if self.charge_scheduler is None:
             return
-        
-        settings = {
-            'pixel_limit': pixel_limit,
-            'tolerance': self.main_window.setup_tab.tolerance_var.get(),
-            'delay': self.main_window.setup_tab.delay_var.get()
-        }
-        self.bot_worker.start_bot(self.message_queue, enabled_colors, settings)
+        if message.get('cancelled_by_mouse'):
+            # The user took over: stop scheduling bursts
+            self.unattended_var.set(False)
+            self._on_unattended_change()
+            self.log_message("Unattended mode stopped by mouse movement")
+            return
+        self.charge_scheduler.record_burst(message)
+        if message.get('out_of_charges'):
+            self.log_message("Out of charges - charge estimate reset to 0")
+        self._schedule_next_burst(message)
     
     def _on_reanalyze_change(self):
         """Handle reanalyze checkbox change"""
@@ -271,10 +434,24 @@ class ControlTab:
         self.progress_var.set(progress)
         self.status_label.config(text=status_text)
     
+    def on_bot_paused(self, reason):
+        """Handle bot pause (from the Pause button or mouse movement)"""
+        self.pause_btn.config(text="Resume")
+        self.status_label.config(text="Paused")
+        self.log_message("Bot paused by mouse movement" if reason == 'mouse' else "Bot paused")
+    
+    def on_bot_resumed(self):
+        """Handle bot resume"""
+        self.pause_btn.config(text="Pause")
+        self.status_label.config(text="Painting...")
+        self.log_message("Bot resumed")
+    
     def on_bot_complete(self, total_painted, limit_reached):
         """Handle bot completion"""
         self.main_window.is_running = False
+        self._remove_pause_hotkey()
         self.start_btn.config(state='normal')
+        self.pause_btn.config(state='disabled', text="Pause")
         
         if limit_reached:
             self.status_label.config(text=f"Pixel limit reached! ({total_painted} pixels)")
@@ -285,8 +462,11 @@ class ControlTab:
     
     def on_bot_error(self, error_message):
         """Handle bot error"""
+        self._cancel_next_burst()
         self.main_window.is_running = False
+        self._remove_pause_hotkey()
         self.start_btn.config(state='normal')
+        self.pause_btn.config(state='disabled', text="Pause")
         self.status_label.config(text=f"Error: {error_message}")
         self.log_message(f"Bot error: {error_message}")
     
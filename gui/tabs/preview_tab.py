@@ -103,6 +103,15 @@ class PreviewTab:
         enabled_count = len([var for var in colors_tab.color_vars.values() if var.get()]) if colors_tab else 0
         total_count = len(self.data_manager.color_palette)
         
+        # Pending pixels per color come from the cached paint plan, no extra scan
+        plan = self.data_manager.get_paint_plan(tolerance)
+        enabled_colors = self.main_window.get_enabled_colors()
+        pending_lines = [
+            f"  {color['name']}: {len(plan.positions_for(color['rgb']))}"
+            for color in enabled_colors if plan.positions_for(color['rgb'])
+        ]
+        pending_text = "\n".join(pending_lines) if pending_lines else "  None"
+        
         stats = f"""Analysis Results:
         
 Pixel Size: {self.data_manager.pixel_size}x{self.data_manager.pixel_size}
@@ -116,6 +125,9 @@ Settings:
 Color Tolerance: {tolerance}
 Click Delay: {delay}ms
 Pixel Limit: {pixel_limit}
+
+Pixels To Paint (enabled colors): {plan.total_pending(enabled_colors)}
+{pending_text}
 """
         
         self.stats_text.config(state='normal')
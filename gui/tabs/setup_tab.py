@@ -1,5 +1,6 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog, messagebox
+from core import get_config
 from gui.region_selector import RegionSelector
 
 class SetupTab:
@@ -24,6 +25,11 @@ class SetupTab:
         self.delay_var = None
         self.tolerance_label = None
         self.delay_label = None
+        self.template_status = None
+        self.template_enabled_var = None
+        self.template_dither_var = None
+        self.template_offset_x_var = None
+        self.template_offset_y_var = None
         
         # Create the UI
         self._create_ui()
@@ -37,6 +43,8 @@ class SetupTab:
         self._add_separator()
         self._create_analysis_frame()
         self._add_separator()
+        self._create_template_frame()
+        self._add_separator()
         self._create_settings_frame()
     
     def _create_instructions(self):
@@ -93,6 +101,95 @@ class SetupTab:
         self.analysis_status = ttk.Label(analysis_frame, text="Select regions first")
         self.analysis_status.pack(pady=5)
     
+    def _create_template_frame(self):
+        """Create template-file mode frame"""
+        template_frame = ttk.LabelFrame(self.frame, text="Template", padding=10)
+        template_frame.pack(fill='x', padx=10, pady=5)
+        preferences = self.data_manager.user_settings['preferences']
+        
+        # Template file
+        file_frame = ttk.Frame(template_frame)
+        file_frame.pack(fill='x', pady=2)
+        ttk.Label(file_frame, text="Template Image:").pack(side='left')
+        self.template_status = ttk.Label(file_frame, text="Not loaded", foreground="red")
+        self.template_status.pack(side='left', padx=(10, 0))
+        load_btn = ttk.Button(file_frame, text="Load Template...", command=self._load_template)
+        load_btn.pack(side='right')
+        self._create_tooltip(load_btn, "Image to paint, one image pixel per canvas pixel")
+        
+        # Mode and dithering
+        options_frame = ttk.Frame(template_frame)
+        options_frame.pack(fill='x', pady=2)
+        self.template_enabled_var = tk.BooleanVar(value=preferences.get('template_enabled', False))
+        enabled_cb = ttk.Checkbutton(options_frame, text="Paint from template instead of preview overlay",
+                                     variable=self.template_enabled_var, command=self._on_template_option_change)
+        enabled_cb.pack(side='left')
+        self.template_dither_var = tk.BooleanVar(value=preferences.get('template_dither', False))
+        dither_cb = ttk.Checkbutton(options_frame, text="Dither", variable=self.template_dither_var,
+                                    command=self._on_template_option_change)
+        dither_cb.pack(side='left', padx=(15, 0))
+        self._create_tooltip(dither_cb, "Ordered dithering when mapping template colors to the palette")
+        
+        # Offset in grid cells from the first whole cell of the canvas region
+        offset_frame = ttk.Frame(template_frame)
+        offset_frame.pack(fill='x', pady=2)
+        offset_x, offset_y = preferences.get('template_offset', [0, 0])
+        self.template_offset_x_var = tk.IntVar(value=offset_x)
+        self.template_offset_y_var = tk.IntVar(value=offset_y)
+        # Negative offsets place a template that starts left of or above the first whole cell
+        vcmd = (self.frame.register(self._is_offset_text), '%P')
+        ttk.Label(offset_frame, text="Offset (cells):").pack(side='left')
+        for label, var in (("X", self.template_offset_x_var), ("Y", self.template_offset_y_var)):
+            ttk.Label(offset_frame, text=label).pack(side='left', padx=(10, 2))
+            entry = ttk.Entry(offset_frame, textvariable=var, width=6, validate='key', validatecommand=vcmd)
+            entry.pack(side='left')
+            entry.bind('<FocusOut>', lambda e: self._on_template_option_change())
+            entry.bind('<Return>', lambda e: self._on_template_option_change())
+            self._create_tooltip(entry, "Grid cells from the top-left whole cell of the canvas region "
+                                       "(negative when the template starts left of or above it)")
+        
+        self._update_template_status()
+    
+    @staticmethod
+    def _is_offset_text(value):
+        """Accept partial input of a signed whole number while typing ("", "-", "-12")"""
+        digits = value[1:] if value.startswith('-') else value
+        return digits == "" or digits.isdigit()
+    
+    def _load_template(self):
+        """Choose and load a template image"""
+        path = filedialog.askopenfilename(
+            title="Select Template Image",
+            filetypes=[("Images", "*.png *.bmp *.gif *.jpg *.jpeg"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            template = self.data_manager.load_template(path)
+        except ValueError as e:
+            messagebox.showerror("Template", str(e))
+            return
+        self.main_window.log_message(f"Loaded template {template.name} ({template.size[0]}x{template.size[1]})")
+        self._update_template_status()
+    
+    def _on_template_option_change(self):
+        """Save template mode, dithering and offset"""
+        try:
+            offset = [self.template_offset_x_var.get(), self.template_offset_y_var.get()]
+        except tk.TclError:
+            offset = self.data_manager.get_preference('template_offset', [0, 0])
+        with self.data_manager.settings_batch():
+            self.data_manager.update_preference('template_enabled', self.template_enabled_var.get())
+            self.data_manager.update_preference('template_dither', self.template_dither_var.get())
+            self.data_manager.update_preference('template_offset', offset)
+    
+    def _update_template_status(self):
+        """Show the loaded template"""
+        template = self.data_manager.template
+        if template is not None:
+            self.template_status.config(text=f"{template.name} ({template.size[0]}x{template.size[1]})",
+                                        foreground="green")
+    
     def _create_settings_frame(self):
         """Create settings frame"""
         settings_frame = ttk.LabelFrame(self.frame, text="Settings", padding=10)
@@ -105,12 +202,15 @@ class SetupTab:
         # Tolerance setting
         tolerance_frame = ttk.Frame(settings_frame)
         tolerance_frame.pack(fill='x', pady=2)
-        ttk.Label(tolerance_frame, text="Color Tolerance:").pack(side='left')
+        # The same number means per-channel RGB units or a CIEDE2000 delta E, depending on the matching mode
+        lab_matching = get_config().get('color_matching.mode', 'rgb') == 'lab'
+        ttk.Label(tolerance_frame, text="Color Tolerance (ΔE):" if lab_matching else "Color Tolerance (RGB):").pack(side='left')
         self.tolerance_var = tk.IntVar(value=saved_tolerance)
         tolerance_scale = ttk.Scale(tolerance_frame, from_=1, to=20, variable=self.tolerance_var, 
                                    orient='horizontal', command=self._update_tolerance_label)
         tolerance_scale.pack(side='right', fill='x', expand=True, padx=(10, 0))
-        self._create_tooltip(tolerance_scale, "How closely colors must match (1=exact, 20=loose)")
+        self._create_tooltip(tolerance_scale, "How closely colors must match (1=exact, 20=loose), as "
+                             + ("a CIEDE2000 color difference" if lab_matching else "the largest difference per RGB channel"))
         self.tolerance_label = ttk.Label(tolerance_frame, text=str(saved_tolerance))
         self.tolerance_label.pack(side='right', padx=(5, 10))
         
@@ -175,14 +275,14 @@ class SetupTab:
         if self.data_manager.canvas_region and self.data_manager.palette_region:
             self.analyze_btn.config(state='normal')
     
-    def _analyze_regions(self):
-        """Run analysis in a separate thread"""
+    def _analyze_regions(self, incremental=False):
+        """Run analysis in a separate thread (incremental re-uses the previous frame when possible)"""
         self.analyze_btn.config(state='disabled', text="Analyzing...")
         self.analysis_status.config(text="Running analysis...")
         self.main_window.log_message("Starting analysis...")
         
         # Use the analysis worker
-        self.analysis_worker.start_analysis(self.message_queue)
+        self.analysis_worker.start_analysis(self.message_queue, incremental=incremental)
     
     def _update_tolerance_label(self, value):
         """Update tolerance value display and save"""
@@ -204,7 +304,7 @@ class SetupTab:
         """Handle analysis completion from main window"""
         self.analyze_btn.config(state='normal', text="Analyze Canvas & Palette")
         self.analysis_status.config(
-            text=f"Analysis complete! Pixel size: {message['pixel_size']}, "
+            text=f"{'Analysis restored' if message.get('restored') else 'Analysis complete'}! Pixel size: {message['pixel_size']}, "
                  f"Pixels: {message['pixel_count']}, Colors: {message['colors_found']}"
         )
     
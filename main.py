@@ -1,3 +1,4 @@
+import asyncio
 import pyautogui
 import numpy as np
 from PIL import Image, ImageDraw
@@ -146,7 +147,7 @@ def main():
     palette_region = select_palette_region()
 
     # Take screenshots for analysis
-    from core import get_screen, estimate_pixel_size, detect_palette_colors, save_palette_debug_image, auto_click_positions, build_pixel_map, get_preview_positions_from_estimation
+    from core import get_screen, analyze_canvas, detect_palette_colors, save_palette_debug_image, DataManager, PaintEngine, get_config
     palette_img_rgb = get_screen(palette_region)
     canvas_img_rgb = get_screen(canvas_region)
 
@@ -154,16 +155,12 @@ def main():
     palette_img_bgr = cv2.cvtColor(palette_img_rgb, cv2.COLOR_RGB2BGR)
     canvas_img_bgr = cv2.cvtColor(canvas_img_rgb, cv2.COLOR_RGB2BGR)
 
-    # --- DYNAMIC PIXEL SIZE ESTIMATION ---
-    print("Estimating pixel size from canvas...")
-    pixel_size = estimate_pixel_size(canvas_img_bgr)
+    # --- DYNAMIC PIXEL SIZE ESTIMATION + PIXEL MAP ---
+    print("Analyzing canvas...")
+    canvas_analysis = analyze_canvas(canvas_img_bgr)
+    pixel_size = canvas_analysis['pixel_size']
+    pixel_map = canvas_analysis['pixel_map']
     print(f"Estimated pixel size: {pixel_size}x{pixel_size}")
-
-    print("Building pixel map...")
-    preview_positions = get_preview_positions_from_estimation(
-        canvas_img_bgr, pixel_size
-    )
-    pixel_map = build_pixel_map(canvas_img_bgr, pixel_size, preview_positions)
     print(f"Built pixel map with {len(pixel_map)} pixels")
 
     # Detect colors and their positions from the selected palette region
@@ -184,32 +181,60 @@ def main():
             return
         time.sleep(0.05)
 
-    is_first_color = True
+    enabled_colors = []
     for color in color_palette:
-        if keyboard.is_pressed("esc"):
-            print("Stopped by user.")
-            break
-
         # Check bought status from user_settings.json ONLY
         if not is_color_bought(color, user_settings):
             print(f"Skipping {color['name']} - not bought")
             continue
-
-        target_rgb = tuple(color["rgb"])
-        if target_rgb in color_position_map:
-            target_bgr = target_rgb[::-1]
-            positions = find_pixels_to_paint_from_map(pixel_map, target_bgr)
-            print(f"Found {len(positions)} spots to paint for {color['name']}")
-
-            if positions:
-                px, py = color_position_map[target_rgb]
-                pyautogui.click(px, py)
-                time.sleep(0.2)
-                auto_click_positions(
-                    positions, offset=(canvas_region[0], canvas_region[1])
-                )
-            # time.sleep(0.5)
-
+        enabled_colors.append(color)
+
+    # The same engine as the GUI, driven from the terminal
+    data_manager = DataManager()
+    # Assigned directly: the setters would overwrite the GUI's saved regions
+    data_manager.canvas_region = canvas_region
+    data_manager.palette_region = palette_region
+    data_manager.set_analysis_results(pixel_size, pixel_map, color_position_map)
+
+    config = get_config()
+    tolerance = config.get('bot.default_tolerance', 5)
+    plan = data_manager.get_paint_plan(tolerance)
+    for color in enabled_colors:
+        count = len(plan.positions_for(color["rgb"]))
+        if count and tuple(color["rgb"]) in color_position_map:
+            print(f"Found {count} spots to paint for {color['name']}")
+
+    settings = {
+        'pixel_limit': max(1, plan.total_pending(enabled_colors)),
+        'tolerance': tolerance,
+        'delay': config.get('bot.default_delay', 50),
+        'verify': False
+    }
+    engine = PaintEngine(data_manager, on_event=print_bot_event, should_stop=lambda: keyboard.is_pressed("esc"))
+    keyboard.add_hotkey("p", lambda: engine.resume() if engine.paused else engine.pause())
+    print("Painting... Press P to pause/resume, ESC to stop.")
+    try:
+        asyncio.run(engine.run(enabled_colors, settings))
+    finally:
+        keyboard.remove_hotkey("p")
+
+
+def print_bot_event(message):
+    """Print PaintEngine events to the terminal"""
+    kind = message['type']
+    if kind == 'progress':
+        print(message['status'])
+    elif kind == 'bot_paused':
+        print("Paused. Press P to resume.")
+    elif kind == 'bot_resumed':
+        print("Resumed.")
+    elif kind == 'bot_complete':
+        if message['cancelled_by_mouse']:
+            print("Stopped by mouse movement.")
+        print(f"Done: {message['total_painted']} pixels painted "
+              f"({message['clicks_per_second']:.1f} clicks/s).")
+    elif kind == 'bot_error':
+        print(f"Bot error: {message['error']}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
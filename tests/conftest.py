@@ -0,0 +1,42 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def data_manager(tmp_path, monkeypatch):
+    """DataManager working in a scratch directory holding a copy of colors.json"""
+    from core.config import get_config
+    from core.data_manager import DataManager
+    from core.logger import get_logger
+
+    # Config and log file belong to the repository, so open them before leaving it
+    get_config()
+    get_logger()
+    shutil.copy(os.path.join(ROOT, 'colors.json'), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    manager = DataManager()
+    yield manager
+    manager.flush_user_settings()
+
+
+@pytest.fixture
+def set_config():
+    """Override config values for one test: set_config('bot.verify_settle_ms', 0)"""
+    from core.config import get_config
+
+    config = get_config()
+    previous = []
+
+    def override(key_path, value):
+        previous.append((key_path, config.get(key_path)))
+        config.set(key_path, value)
+
+    yield override
+    for key_path, value in reversed(previous):
+        config.set(key_path, value)
@@ -0,0 +1,58 @@
+import cv2
+import numpy as np
+
+from core.analysis_cache import difference_hash
+from core.analysis_snapshot import check_snapshot, load_snapshot, save_snapshot
+from core.image_analysis import analyze_canvas
+from core.simulator import SimulatedCanvas
+
+
+COLS, ROWS, PITCH = 80, 60, 15
+
+
+def capture(simulator, pan=0):
+    """(canvas BGR, palette RGB) captures of the simulated screen, the canvas panned by `pan` cells"""
+    frame = simulator.frame()
+    left, top = simulator.canvas_region[:2]
+    left += pan * PITCH
+    canvas = cv2.cvtColor(frame[top:top + ROWS * PITCH, left:left + COLS * PITCH], cv2.COLOR_RGB2BGR)
+    left, top, width, height = simulator.palette_region
+    return canvas, frame[top:top + height, left:left + width]
+
+
+def saved_snapshot(data_manager, simulator, path):
+    canvas, palette = capture(simulator)
+    result = analyze_canvas(canvas, debug_filename=None)
+    data_manager.canvas_region = simulator.canvas_region[:2] + canvas.shape[1::-1]
+    data_manager.palette_region = simulator.palette_region
+    data_manager.set_analysis_results(result['pixel_size'], result['pixel_map'], {(0, 0, 0): (0, 0)},
+                                      canvas_frame=canvas, grid_lattice=result['lattice'])
+    save_snapshot(path, data_manager, difference_hash(palette))
+    snapshot, reason = load_snapshot(path)
+    assert reason is None
+    return snapshot
+
+
+def test_snapshot_survives_painting(data_manager, tmp_path):
+    simulator = SimulatedCanvas(cols=COLS, rows=ROWS, pitch=PITCH, palette=data_manager.color_palette, seed=0)
+    snapshot = saved_snapshot(data_manager, simulator, str(tmp_path / 'snapshot.npz'))
+
+    rows, cols = np.nonzero(simulator.template_mask & np.any(simulator.cells != simulator.template, axis=2))
+    simulator.cells[rows[:40], cols[:40]] = simulator.template[rows[:40], cols[:40]]
+    simulator._frame = None
+
+    assert check_snapshot(snapshot, data_manager, *capture(simulator)) is None
+
+
+def test_snapshot_rejects_canvas_panned_by_one_cell(data_manager, tmp_path):
+    for seed in range(3):
+        # One spare column, so the panned capture shows a real neighbouring cell
+        simulator = SimulatedCanvas(cols=COLS + 1, rows=ROWS, pitch=PITCH, palette=data_manager.color_palette, seed=seed)
+        snapshot = saved_snapshot(data_manager, simulator, str(tmp_path / 'snapshot.npz'))
+
+        canvas, palette = capture(simulator, pan=1)
+        assert check_snapshot(snapshot, data_manager, canvas, palette) is not None
+        # The coarse hash cannot always tell a pan from painting, and the lattice still fits:
+        # the preview dots must catch it on their own
+        snapshot['canvas_hash'] = difference_hash(canvas[..., ::-1])
+        assert check_snapshot(snapshot, data_manager, canvas, palette).startswith("preview dots moved")
@@ -0,0 +1,28 @@
+import numpy as np
+
+from core.color_detection import MIN_SWATCH_AREA, detect_palette_colors
+
+KNOWN_COLORS = [{"rgb": [237, 28, 36]}, {"rgb": [19, 230, 123]}]
+BACKGROUND_RGB = (33, 37, 46)
+
+
+def palette_image():
+    img = np.empty((40, 80, 3), dtype=np.uint8)
+    img[:] = BACKGROUND_RGB
+    return img
+
+
+def test_swatch_holes_count_towards_area_and_centroid():
+    img = palette_image()
+    # 24x24 swatch with an icon hole in its top-left quadrant
+    img[8:32, 8:32] = KNOWN_COLORS[0]["rgb"]
+    img[10:20, 10:20] = BACKGROUND_RGB
+    # 14x14 ring: fewer than MIN_SWATCH_AREA pixels, but a larger filled swatch
+    img[8:22, 50:64] = KNOWN_COLORS[1]["rgb"]
+    img[10:20, 52:62] = BACKGROUND_RGB
+    assert (img[8:22, 50:64] == KNOWN_COLORS[1]["rgb"]).all(axis=2).sum() <= MIN_SWATCH_AREA
+
+    color_map = detect_palette_colors(img, (100, 200, 80, 40), KNOWN_COLORS)
+
+    assert color_map[(237, 28, 36)] == (100 + 19, 200 + 19)
+    assert color_map[(19, 230, 123)] == (100 + 56, 200 + 14)
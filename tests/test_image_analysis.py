@@ -0,0 +1,41 @@
+import os
+
+import cv2
+import numpy as np
+
+from core.image_analysis import LATTICE_MIN_PREVIEWS, analyze_canvas, estimate_grid_lattice, validate_lattice
+from core.simulator import SimulatedCanvas, load_palette
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PALETTE = load_palette(os.path.join(ROOT, 'colors.json'))
+
+
+def canvas_bgr(simulator):
+    left, top, width, height = simulator.canvas_region
+    return cv2.cvtColor(simulator.frame()[top:top + height, left:left + width], cv2.COLOR_RGB2BGR)
+
+
+def test_cached_lattice_is_kept_when_few_previews_remain():
+    pitch = 20.5
+    # Lattice measured earlier in the job, while plenty of previews were visible
+    start = SimulatedCanvas(cols=60, rows=40, pitch=pitch, palette=PALETTE, seed=1, painted_fraction=0.3)
+    lattice = estimate_grid_lattice(canvas_bgr(start))
+    assert lattice is not None
+
+    # Same canvas near completion: only a few template cells still differ
+    done = SimulatedCanvas(cols=60, rows=40, pitch=pitch, palette=PALETTE, seed=1, painted_fraction=1.0)
+    rows, cols = np.nonzero(done.template_mask)
+    for row, col in list(zip(rows, cols))[:3]:
+        done.cells[row, col] = (255, 255, 255) if tuple(done.template[row, col]) != (255, 255, 255) else (0, 0, 0)
+    done._frame = None
+    assert done.remaining_pixels() == 3
+
+    img = canvas_bgr(done)
+    assert validate_lattice(img, lattice)
+    result = analyze_canvas(img, debug_filename=None, cached_lattices=[lattice])
+
+    assert result['method'] == 'cached'
+    assert result['pixel_size'] == int(round(lattice['pitch']))
+    assert abs(lattice['pitch'] - pitch) < 0.5
+    assert len(result['preview_positions']) < LATTICE_MIN_PREVIEWS
+    assert len(result['pixel_map']) == len(result['preview_positions'])
@@ -0,0 +1,98 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from core.image_analysis import analyze_canvas, build_pixel_map, get_preview_positions_from_lattice
+from core.incremental_analysis import incremental_update
+from core.simulator import SimulatedCanvas, load_palette
+
+PALETTE = load_palette(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'colors.json'))
+COLS, ROWS, PITCH = 60, 40, 15
+
+
+def capture(simulator, pan=(0, 0)):
+    """BGR canvas capture, the view panned by `pan` screen pixels"""
+    left, top = simulator.canvas_region[:2]
+    left, top = left + pan[0], top + pan[1]
+    frame = simulator.frame()[top:top + ROWS * PITCH, left:left + COLS * PITCH]
+    return cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+
+
+def entries(pixel_map):
+    """{(x, y): (preview BGR, pixel BGR)} of a pixel map"""
+    return {
+        tuple(position): (tuple(preview), tuple(pixel))
+        for position, preview, pixel in zip(pixel_map.positions.tolist(), pixel_map.preview_colors.tolist(),
+                                             pixel_map.pixel_colors.tolist())
+    }
+
+
+def repaint(simulator, cells, colors):
+    for (row, col), rgb in zip(cells, colors):
+        simulator.cells[row, col] = rgb
+    simulator._frame = None
+
+
+@pytest.mark.parametrize('use_lattice', [True, False])
+def test_changed_tiles_update_only_their_cells(use_lattice):
+    simulator = SimulatedCanvas(cols=COLS + 2, rows=ROWS + 2, pitch=PITCH, palette=PALETTE, seed=0)
+    before = capture(simulator)
+    analysis = analyze_canvas(before, debug_filename=None)
+    assert analysis['method'] == 'lattice'
+    pixel_map, pixel_size, lattice = analysis['pixel_map'], analysis['pixel_size'], analysis['lattice']
+    old_entries = entries(pixel_map)
+
+    # One cell painted with its template color, one griefed with another color
+    rows, cols = np.nonzero(simulator.template_mask & np.any(simulator.cells != simulator.template, axis=2))
+    painted, griefed = (rows[10], cols[10]), (rows[200], cols[200])
+    wrong = next(color['rgb'] for color in PALETTE if tuple(color['rgb']) != tuple(simulator.template[griefed]))
+    repaint(simulator, [painted, griefed], [simulator.template[painted], wrong])
+    after = capture(simulator)
+
+    update = incremental_update(before, after, pixel_map, pixel_size, lattice if use_lattice else None)
+
+    assert update['full_analysis_reason'] is None
+    assert 0 < update['changed_tiles'] <= 4
+    new_entries = entries(update['pixel_map'])
+    # Only entries inside the two repainted cells differ from the previous map
+    changed = set(old_entries.items()) ^ set(new_entries.items())
+    changed_cells = {(y // PITCH, x // PITCH) for (x, y), _ in changed}
+    assert changed and changed_cells <= {tuple(painted), tuple(griefed)}
+    if use_lattice:
+        # Same result as a full rebuild on the new capture
+        full = build_pixel_map(after, pixel_size, get_preview_positions_from_lattice(after, lattice))
+        assert new_entries == entries(full)
+    # The previous map is left as it was
+    assert entries(pixel_map) == old_entries
+
+
+@pytest.mark.parametrize('pan, template_fraction', [
+    ((PITCH, 0), 0.7),
+    ((0, 3), 0.7),
+    # Sparse template: few tiles change, so the pan is caught by phase correlation
+    ((PITCH, 0), 0.01),
+])
+def test_pan_asks_for_full_analysis(pan, template_fraction):
+    simulator = SimulatedCanvas(cols=COLS + 2, rows=ROWS + 2, pitch=PITCH, palette=PALETTE, seed=1,
+                                template_fraction=template_fraction)
+    before = capture(simulator)
+    analysis = analyze_canvas(before, debug_filename=None)
+
+    update = incremental_update(before, capture(simulator, pan), analysis['pixel_map'], analysis['pixel_size'],
+                                analysis['lattice'])
+
+    assert update['full_analysis_reason'] is not None
+    assert update['pixel_map'] is None
+
+
+def test_zoom_asks_for_full_analysis():
+    before = capture(SimulatedCanvas(cols=COLS + 2, rows=ROWS + 2, pitch=PITCH, palette=PALETTE, seed=2))
+    zoomed = capture(SimulatedCanvas(cols=COLS + 2, rows=ROWS + 2, pitch=PITCH + 1, palette=PALETTE, seed=2))
+    analysis = analyze_canvas(before, debug_filename=None)
+
+    update = incremental_update(before, zoomed, analysis['pixel_map'], analysis['pixel_size'], analysis['lattice'])
+
+    assert update['full_analysis_reason'] is not None
+    assert update['pixel_map'] is None
@@ -0,0 +1,154 @@
+import asyncio
+
+import cv2
+import pytest
+
+from core import paint_engine
+from core.color_detection import detect_palette_colors
+from core.image_analysis import analyze_canvas
+from core.paint_engine import PaintEngine
+from core.screen_capture import set_capture_backend
+from core.simulator import SimulatedCanvas
+
+
+@pytest.fixture
+def simulator(data_manager, set_config, monkeypatch):
+    """Analyzed SimulatedCanvas serving the captures, with no waits between clicks"""
+    monkeypatch.setattr(paint_engine, 'COLOR_SELECT_DELAY_S', 0)
+    set_config('bot.verify_settle_ms', 0)
+    set_config('bot.click_order', 'optimized')
+    set_config('bot.mouse_move_action', 'cancel')
+
+    yield analyzed_simulator(data_manager, seed=0)
+    set_capture_backend(None)
+
+
+def analyzed_simulator(data_manager, **options):
+    """SimulatedCanvas serving the captures, analyzed into `data_manager`"""
+    simulator = SimulatedCanvas(palette=data_manager.color_palette, **options)
+    set_capture_backend(simulator.capture_backend())
+    frame = simulator.frame()
+    left, top, width, height = simulator.canvas_region
+    analysis = analyze_canvas(cv2.cvtColor(frame[top:top + height, left:left + width], cv2.COLOR_RGB2BGR),
+                              debug_filename=None)
+    left, top, width, height = simulator.palette_region
+    color_positions = detect_palette_colors(frame[top:top + height, left:left + width],
+                                            simulator.palette_region, data_manager.color_palette)
+    data_manager.canvas_region = simulator.canvas_region
+    data_manager.palette_region = simulator.palette_region
+    data_manager.set_analysis_results(analysis['pixel_size'], analysis['pixel_map'], color_positions)
+    return simulator
+
+
+def paint(data_manager, backend, pixel_limit, verify=False, stop_on_rejected_batch=False, delay=0):
+    """Run a PaintEngine to completion; returns (engine, events)"""
+    events = []
+    engine = PaintEngine(data_manager, on_event=events.append, input_backend=backend)
+    settings = {'pixel_limit': pixel_limit, 'tolerance': 5, 'delay': delay, 'verify': verify,
+                'stop_on_rejected_batch': stop_on_rejected_batch}
+    asyncio.run(engine.run(data_manager.color_palette, settings))
+    return engine, events
+
+
+def on_canvas(simulator, x, y):
+    left, top, width, height = simulator.canvas_region
+    return left <= x < left + width and top <= y < top + height
+
+
+def canvas_clicks(simulator, backend):
+    return [(x, y) for _, x, y in backend.clicks if on_canvas(simulator, x, y)]
+
+
+def after_canvas_clicks(simulator, count, action):
+    """Input backend for `simulator` that calls action(backend) once `count` canvas clicks went out"""
+    backend = simulator.input_backend()
+
+    def on_click(x, y):
+        simulator.click(x, y)
+        if on_canvas(simulator, x, y) and len(canvas_clicks(simulator, backend)) == count:
+            action(backend)
+
+    backend.on_click = on_click
+    return backend
+
+
+def test_stop_mid_batch_finishes_the_sent_clicks_only(data_manager, simulator, set_config):
+    set_config('bot.verify_batch_size', 20)
+    engine = None
+    backend = after_canvas_clicks(simulator, 5, lambda backend: engine.stop())
+    engine = PaintEngine(data_manager, on_event=None, input_backend=backend)
+    settings = {'pixel_limit': 100, 'tolerance': 5, 'delay': 0, 'verify': True}
+    result = asyncio.run(engine.run(data_manager.color_palette, settings))
+
+    # The rest of the batch is dropped, and the clicks already sent are still verified
+    assert len(canvas_clicks(simulator, backend)) == 5
+    assert result['total_clicks'] == 5
+    assert result['total_painted'] == simulator.stats['placed'] == 5
+    assert not result['limit_reached']
+
+
+def test_pause_then_resume_selects_the_color_again(data_manager, simulator):
+    engine = None
+    pause = {}
+
+    def pause_then_resume(backend):
+        pause['clicks'] = len(backend.clicks)
+        pause['color'] = engine._selected_rgb
+        engine.pause()
+        asyncio.get_running_loop().call_later(0.05, engine.resume)
+
+    backend = after_canvas_clicks(simulator, 3, pause_then_resume)
+    events = []
+    engine = PaintEngine(data_manager, on_event=events.append, input_backend=backend)
+    settings = {'pixel_limit': 10, 'tolerance': 5, 'delay': 0}
+    result = asyncio.run(engine.run(data_manager.color_palette, settings))
+
+    kinds = [event['type'] for event in events]
+    assert kinds.index('bot_paused') < kinds.index('bot_resumed') < kinds.index('bot_complete')
+    assert events[kinds.index('bot_paused')]['reason'] == 'user'
+    # The first click after the pause is on the palette, at the color that was selected
+    clicked_at, x, y = backend.clicks[pause['clicks']]
+    assert (x, y) == data_manager.color_position_map[pause['color']]
+    assert clicked_at - backend.clicks[pause['clicks'] - 1][0] >= 0.05
+    assert result['total_painted'] == 10
+
+
+def test_mouse_movement_cancels_the_run(data_manager, simulator):
+    backend = after_canvas_clicks(simulator, 4, lambda backend: backend.move_to(0, 0))
+    _, events = paint(data_manager, backend, pixel_limit=50)
+
+    assert events[-1]['type'] == 'bot_complete'
+    assert events[-1]['cancelled_by_mouse']
+    assert len(canvas_clicks(simulator, backend)) == 4
+
+
+def test_pixel_limit_holds_with_verifications_in_flight(data_manager, simulator, set_config):
+    set_config('bot.verify_batch_size', 4)
+    set_config('bot.verify_settle_ms', 20)
+    for seed in range(3):
+        simulator = analyzed_simulator(data_manager, seed=seed, latency_s=0.01, failure_rate=0.3)
+        placed_at_click = []
+        backend = simulator.input_backend()
+        backend.on_click = lambda x, y: (simulator.click(x, y), placed_at_click.append(simulator.stats['placed']))
+        _, events = paint(data_manager, backend, pixel_limit=25, verify=True)
+
+        result = events[-1]
+        # Failed placements were retried, yet no more than the limit ever landed on the canvas
+        assert result['total_clicks'] > 25
+        assert max(placed_at_click) <= 25
+        assert result['total_painted'] == simulator.stats['placed'] == 25
+        assert result['limit_reached']
+
+
+def test_rejected_batch_ends_the_burst(data_manager, simulator, set_config):
+    set_config('bot.verify_batch_size', 5)
+    simulator.failure_rate = 1.0
+    backend = simulator.input_backend()
+    # Clicks 5 ms apart, so the first verification returns while the second batch goes out
+    _, events = paint(data_manager, backend, pixel_limit=50, verify=True, stop_on_rejected_batch=True, delay=5)
+
+    result = events[-1]
+    assert result['out_of_charges']
+    assert result['total_painted'] == 0
+    # Without the stop every cell would be tried 1 + verify_retries times
+    assert len(canvas_clicks(simulator, backend)) <= 10
@@ -0,0 +1,10 @@
+import numpy as np
+
+from core.paint_plan import snap_to_palette
+
+
+def test_snap_picks_nearest_color_within_tolerance():
+    palette_bgr = [(11, 0, 0), (8, 8, 8), (200, 200, 200)]
+    colors_bgr = np.array([(0, 0, 0), (12, 1, 0), (100, 100, 100)], dtype=np.uint8)
+    # (0, 0, 0): (11, 0, 0) is nearer but 11 off on one channel; (8, 8, 8) is within 10 on all
+    assert snap_to_palette(colors_bgr, palette_bgr, 10).tolist() == [1, 0, -1]